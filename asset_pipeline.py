@@ -0,0 +1,419 @@
+import base64
+import json
+import multiprocessing
+import os
+import shutil
+import struct
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from file_lock import FileLock
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional; textures are then copied untouched
+    Image = None
+
+
+# --- 3D/AR Asset Pipeline (Immersive Engine) ---
+# Uploaded glTF/OBJ models are processed in a pool of worker processes, off
+# the Streamlit request path: the mesh is parsed, decimated into smaller
+# level-of-detail meshes by vertex clustering, textures are downscaled and
+# re-encoded, and the results are recorded in a JSON manifest. Textures
+# embedded in glTF/GLB files are extracted to a scratch folder first, so they
+# are compressed like OBJ textures. Workers are spawned rather than forked,
+# since forking the threaded Streamlit process can copy locks held by other
+# threads and deadlock the child.
+#
+# Several apps share the asset store, and their listing IDs overlap, so each
+# pipeline has a namespace (its app) that prefixes its asset IDs. The
+# manifest is re-read and merged under a file lock on every write, so
+# processes never overwrite each other's entries.
+#
+# Once a glTF/GLB model has been processed, which also validates that it is
+# self-contained, the original is copied under PUBLISHED_DIR/models so AR
+# viewers can stream the full-quality file. 360° tours are placed under
+# PUBLISHED_DIR/tours by hand or by deployment.
+
+ASSET_DIR = os.environ.get("RENAISSANCE_ASSET_DIR", "asset_store")
+PUBLISHED_DIR = "published"  # Relative to ASSET_DIR; everything below it is served as is
+
+# (name, share of original triangles, max texture edge in px)
+LOD_LEVELS = [
+    ("lod0", 1.0, 2048),
+    ("lod1", 0.25, 1024),
+    ("lod2", 0.05, 256),
+]
+
+MODEL_EXTENSIONS = (".obj", ".gltf", ".glb")
+PUBLISHED_MODEL_EXTENSIONS = (".gltf", ".glb")  # OBJ originals reference side files, so only LODs are served
+
+GLTF_COMPONENTS = {5121: "B", 5123: "H", 5125: "I", 5126: "f"}
+GLTF_WIDTHS = {"SCALAR": 1, "VEC2": 2, "VEC3": 3, "VEC4": 4}
+GLB_MAGIC = 0x46546C67
+GLB_JSON_CHUNK = 0x4E4F534A
+GLB_BIN_CHUNK = 0x004E4942
+# Core glTF images are PNG or JPEG; others (e.g. KTX2 via extensions) are left alone
+GLTF_IMAGE_SIGNATURES = ((b"\x89PNG\r\n\x1a\n", ".png"), (b"\xff\xd8\xff", ".jpg"))
+
+
+class AssetError(ValueError):
+    """Raised when an uploaded model cannot be parsed."""
+
+
+def _contained(base_dir, relative):
+    """`relative` joined onto `base_dir`; raises AssetError if it resolves outside it.
+
+    Models arrive as a single uploaded file, so a reference that leaves the
+    upload folder can only point at files on the host.
+    """
+    root = os.path.realpath(base_dir)
+    path = os.path.realpath(os.path.join(root, relative))
+    if os.path.commonpath([root, path]) != root:
+        raise AssetError(f"Model references a file outside its upload: {relative}")
+    return path
+
+
+# --- Parsing ---
+def parse_obj(path):
+    """Returns (vertices, triangles, texture paths) from a Wavefront OBJ file."""
+    vertices, triangles, materials = [], [], []
+    with open(path, encoding="utf-8", errors="replace") as fh:
+        for line in fh:
+            parts = line.split()
+            if not parts:
+                continue
+            if parts[0] == "v":
+                vertices.append(tuple(float(p) for p in parts[1:4]))
+            elif parts[0] == "f":
+                # Face entries look like v, v/vt or v/vt/vn; indices may be negative
+                idx = [int(p.split("/")[0]) for p in parts[1:]]
+                idx = [i - 1 if i > 0 else len(vertices) + i for i in idx]
+                for k in range(1, len(idx) - 1):  # Fan-triangulate polygons
+                    triangles.append((idx[0], idx[k], idx[k + 1]))
+            elif parts[0] == "mtllib":
+                materials.append(_contained(os.path.dirname(path), " ".join(parts[1:])))
+
+    textures = []
+    for mtl in materials:
+        if not os.path.exists(mtl):
+            continue
+        with open(mtl, encoding="utf-8", errors="replace") as fh:
+            for line in fh:
+                parts = line.split()
+                if parts and parts[0].startswith("map_"):
+                    textures.append(_contained(os.path.dirname(path), os.path.join(os.path.dirname(mtl), parts[-1])))
+    return vertices, triangles, textures
+
+
+def _gltf_document(path):
+    with open(path, "rb") as fh:
+        data = fh.read()
+    if path.lower().endswith(".glb"):
+        magic, _, _ = struct.unpack_from("<III", data, 0)
+        if magic != GLB_MAGIC:
+            raise AssetError("Not a binary glTF file.")
+        offset, doc, binary = 12, None, b""
+        while offset < len(data):
+            length, kind = struct.unpack_from("<II", data, offset)
+            chunk = data[offset + 8:offset + 8 + length]
+            if kind == GLB_JSON_CHUNK:
+                doc = json.loads(chunk)
+            elif kind == GLB_BIN_CHUNK:
+                binary = chunk
+            offset += 8 + length
+        if doc is None:
+            raise AssetError("GLB file has no JSON chunk.")
+        return doc, binary
+    return json.loads(data), None
+
+
+def _data_uri(uri, what):
+    try:
+        return base64.b64decode(uri.split(",", 1)[1], validate=True)
+    except (IndexError, ValueError):
+        raise AssetError(f"glTF {what} has a malformed data: URI.") from None
+
+
+def _gltf_buffer(uri):
+    # Only the model file itself is uploaded, so buffers must be embedded
+    if not uri.startswith("data:"):
+        raise AssetError("glTF buffers must be embedded as data: URIs; upload a .glb or an embedded .gltf.")
+    return _data_uri(uri, "buffer")
+
+
+def _gltf_images(doc, buffers, texture_dir):
+    """Writes the embedded PNG/JPEG images to `texture_dir`; returns their paths."""
+    paths = []
+    for index, image in enumerate(doc.get("images", [])):
+        if "uri" in image:
+            data = _data_uri(image["uri"], "image")
+        else:
+            view = doc["bufferViews"][image["bufferView"]]
+            start = view.get("byteOffset", 0)
+            data = buffers[view["buffer"]][start:start + view["byteLength"]]
+        ext = next((ext for signature, ext in GLTF_IMAGE_SIGNATURES if data.startswith(signature)), None)
+        if ext is None:
+            continue
+        path = os.path.join(texture_dir, f"image{index}{ext}")
+        with open(path, "wb") as fh:
+            fh.write(data)
+        paths.append(path)
+    return paths
+
+
+def _gltf_accessor(doc, buffers, index):
+    accessor = doc["accessors"][index]
+    view = doc["bufferViews"][accessor["bufferView"]]
+    fmt = GLTF_COMPONENTS[accessor["componentType"]]
+    width = GLTF_WIDTHS[accessor["type"]]
+    item_size = struct.calcsize(fmt) * width
+    stride = view.get("byteStride") or item_size
+    start = view.get("byteOffset", 0) + accessor.get("byteOffset", 0)
+    buffer = buffers[view["buffer"]]
+    unpack = struct.Struct("<" + fmt * width).unpack_from
+    return [unpack(buffer, start + i * stride) for i in range(accessor["count"])]
+
+
+def parse_gltf(path, texture_dir=None):
+    """Returns (vertices, triangles, texture paths) from a .gltf or .glb file.
+
+    Embedded textures are written to `texture_dir`, if given.
+    """
+    doc, glb_binary = _gltf_document(path)
+    buffers = []
+    for buffer in doc.get("buffers", []):
+        buffers.append(_gltf_buffer(buffer["uri"]) if "uri" in buffer else glb_binary)
+
+    vertices, triangles = [], []
+    for mesh in doc.get("meshes", []):
+        for primitive in mesh.get("primitives", []):
+            if primitive.get("mode", 4) != 4:  # Only triangle lists carry surface geometry
+                continue
+            base = len(vertices)
+            positions = _gltf_accessor(doc, buffers, primitive["attributes"]["POSITION"])
+            vertices.extend(positions)
+            if "indices" in primitive:
+                flat = [i[0] for i in _gltf_accessor(doc, buffers, primitive["indices"])]
+            else:
+                flat = list(range(len(positions)))
+            triangles.extend((base + flat[k], base + flat[k + 1], base + flat[k + 2]) for k in range(0, len(flat) - 2, 3))
+
+    if any(not image["uri"].startswith("data:") for image in doc.get("images", []) if "uri" in image):
+        raise AssetError("glTF images must be embedded; external image files are not uploaded.")
+    return vertices, triangles, _gltf_images(doc, buffers, texture_dir) if texture_dir else []
+
+
+def parse_model(path, texture_dir=None):
+    """`texture_dir` receives textures embedded in the model, which OBJ files never have."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".obj":
+        return parse_obj(path)
+    if ext in (".gltf", ".glb"):
+        return parse_gltf(path, texture_dir)
+    raise AssetError(f"Unsupported model format: {ext}")
+
+
+# --- Level of detail ---
+def cluster_decimate(vertices, triangles, resolution):
+    """Vertex-clustering decimation on a `resolution`^3 grid over the bounding box."""
+    if not vertices:
+        return [], []
+    lo = [min(v[axis] for v in vertices) for axis in range(3)]
+    hi = [max(v[axis] for v in vertices) for axis in range(3)]
+    cell = max(max(h - l for h, l in zip(hi, lo)) / resolution, 1e-9)
+
+    cluster_of, sums = {}, {}
+    remap = []
+    for v in vertices:
+        key = tuple(int((v[axis] - lo[axis]) / cell) for axis in range(3))
+        if key not in cluster_of:
+            cluster_of[key] = len(cluster_of)
+            sums[key] = [0.0, 0.0, 0.0, 0]
+        acc = sums[key]
+        for axis in range(3):
+            acc[axis] += v[axis]
+        acc[3] += 1
+        remap.append(cluster_of[key])
+
+    new_vertices = [None] * len(cluster_of)
+    for key, index in cluster_of.items():
+        x, y, z, n = sums[key]
+        new_vertices[index] = (x / n, y / n, z / n)
+
+    seen, new_triangles = set(), []
+    for a, b, c in triangles:
+        tri = (remap[a], remap[b], remap[c])
+        if tri[0] == tri[1] or tri[1] == tri[2] or tri[0] == tri[2]:
+            continue  # Collapsed into an edge or a point
+        canonical = tuple(sorted(tri))
+        if canonical not in seen:
+            seen.add(canonical)
+            new_triangles.append(tri)
+    return new_vertices, new_triangles
+
+
+def build_lod(vertices, triangles, ratio):
+    """Coarsens the clustering grid until the mesh is at most `ratio` of the original."""
+    if ratio >= 1.0:
+        return vertices, triangles
+    target = max(int(len(triangles) * ratio), 1)
+    resolution = 256
+    lod = cluster_decimate(vertices, triangles, resolution)
+    while len(lod[1]) > target and resolution > 2:
+        resolution //= 2
+        lod = cluster_decimate(vertices, triangles, resolution)
+    return lod
+
+
+def write_obj(path, vertices, triangles):
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.writelines(f"v {x:.6g} {y:.6g} {z:.6g}\n" for x, y, z in vertices)
+        fh.writelines(f"f {a + 1} {b + 1} {c + 1}\n" for a, b, c in triangles)
+
+
+def compress_texture(src, dest_stem, max_edge):
+    """Downscales and re-encodes a texture as JPEG; copies it when Pillow is missing."""
+    if Image is None:
+        dest = dest_stem + os.path.splitext(src)[1]
+        shutil.copyfile(src, dest)
+        return dest
+    dest = dest_stem + ".jpg"
+    with Image.open(src) as img:
+        img.thumbnail((max_edge, max_edge))
+        img.convert("RGB").save(dest, "JPEG", quality=80, optimize=True)
+    return dest
+
+
+# --- Worker (runs in a child process) ---
+def process_asset(asset_id, source_path, out_dir):
+    """Parses one model and writes every LOD; returns its manifest entry."""
+    with tempfile.TemporaryDirectory(prefix="asset-") as scratch:
+        return _process_asset(asset_id, source_path, out_dir, scratch)
+
+
+def _process_asset(asset_id, source_path, out_dir, scratch):
+    started = time.time()
+    vertices, triangles, textures = parse_model(source_path, scratch)
+    if not triangles:
+        raise AssetError("Model contains no triangles.")
+
+    asset_dir = os.path.join(out_dir, str(asset_id))
+    os.makedirs(asset_dir, exist_ok=True)
+    lods = []
+    for name, ratio, max_edge in LOD_LEVELS:
+        lod_vertices, lod_triangles = build_lod(vertices, triangles, ratio)
+        mesh_path = os.path.join(asset_dir, f"{name}.obj")
+        write_obj(mesh_path, lod_vertices, lod_triangles)
+        lod_textures = [
+            compress_texture(tex, os.path.join(asset_dir, f"{name}_tex{i}"), max_edge)
+            for i, tex in enumerate(textures) if os.path.exists(tex)
+        ]
+        lods.append({
+            "level": name,
+            "mesh": mesh_path,
+            "vertices": len(lod_vertices),
+            "triangles": len(lod_triangles),
+            "bytes": os.path.getsize(mesh_path),
+            "textures": lod_textures,
+        })
+    return {
+        "asset_id": asset_id,
+        "source": source_path,
+        "status": "ready",
+        "lods": lods,
+        "original": publish_original(asset_id, source_path, out_dir),
+        "seconds": round(time.time() - started, 3),
+    }
+
+
+def publish_original(asset_id, source_path, out_dir):
+    """Copies a processed glTF/GLB into the published folder; returns its path relative to `out_dir`."""
+    ext = os.path.splitext(source_path)[1].lower()
+    if ext not in PUBLISHED_MODEL_EXTENSIONS:
+        return None
+    relative = os.path.join(PUBLISHED_DIR, "models", f"{asset_id}{ext}")
+    dest = os.path.join(out_dir, relative)
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    tmp = f"{dest}.{os.getpid()}.tmp"
+    shutil.copyfile(source_path, tmp)
+    os.replace(tmp, dest)
+    return relative
+
+
+# --- Pipeline (lives in the Streamlit process) ---
+class AssetPipeline:
+    """Queues model uploads onto a process pool and keeps the manifest current.
+
+    `namespace` names the app or catalog whose listing IDs are the asset IDs.
+    """
+
+    def __init__(self, namespace, out_dir=ASSET_DIR, max_workers=None):
+        self.namespace = namespace
+        self.out_dir = out_dir
+        self.manifest_path = os.path.join(out_dir, "manifest.json")
+        os.makedirs(out_dir, exist_ok=True)
+        self._manifest_lock = FileLock(self.manifest_path + ".lock")
+        self._pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def key(self, asset_id):
+        """The store-wide asset ID: manifest key and output folder name."""
+        return f"{self.namespace}-{asset_id}"
+
+    def save_upload(self, asset_id, filename, data):
+        """Writes uploaded bytes to the source folder and returns the path."""
+        ext = os.path.splitext(filename)[1].lower()
+        if ext not in MODEL_EXTENSIONS:
+            raise AssetError(f"Unsupported model format: {ext}")
+        source_dir = os.path.join(self.out_dir, "uploads")
+        os.makedirs(source_dir, exist_ok=True)
+        path = os.path.join(source_dir, f"{self.key(asset_id)}{ext}")
+        with open(path, "wb") as fh:
+            fh.write(data)
+        return path
+
+    def submit(self, asset_id, source_path):
+        """Queues a model for processing and returns immediately."""
+        key = self.key(asset_id)
+        self._record(asset_id, {"asset_id": key, "source": source_path, "status": "processing", "lods": []})
+        future = self._pool.submit(process_asset, key, source_path, self.out_dir)
+        future.add_done_callback(lambda f: self._finish(asset_id, source_path, f))
+        return future
+
+    def status(self, asset_id):
+        return self._load_manifest().get(self.key(asset_id))
+
+    def entries(self):
+        """This namespace's manifest entries, including those written by other processes."""
+        return [entry for entry in self._load_manifest().values() if entry.get("namespace") == self.namespace]
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True)
+
+    def _finish(self, asset_id, source_path, future):
+        try:
+            entry = future.result()
+        except Exception as exc:
+            entry = {"asset_id": self.key(asset_id), "source": source_path, "status": "failed", "error": str(exc),
+                     "lods": []}
+        self._record(asset_id, entry)
+
+    def _record(self, asset_id, entry):
+        entry.update(namespace=self.namespace, listing=asset_id)
+        # Merge into the file's current contents; the temporary name is per
+        # process and thread so concurrent writers never share one.
+        with self._manifest_lock:
+            manifest = self._load_manifest()
+            manifest[entry["asset_id"]] = entry
+            tmp = f"{self.manifest_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump(manifest, fh, indent=2)
+            os.replace(tmp, self.manifest_path)
+
+    def _load_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return {}
+        with open(self.manifest_path, encoding="utf-8") as fh:
+            return json.load(fh)
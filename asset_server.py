@@ -0,0 +1,301 @@
+import argparse
+import email.utils
+import mimetypes
+import os
+import re
+import secrets
+import shutil
+import threading
+import time
+import urllib.parse
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from asset_pipeline import ASSET_DIR, LOD_LEVELS, PUBLISHED_DIR
+
+
+# --- Immersive Asset Server (Immersive Engine) ---
+# Large AR models and 360° tours are served by this small HTTP server rather
+# than pushed through the Streamlit script. It supports byte-range requests
+# and ETags so viewers can fetch the start of a file and begin rendering
+# early, resume interrupted downloads and revalidate cached copies cheaply.
+# File bodies go out via socket.sendfile (zero-copy os.sendfile on Linux).
+#
+# The server has no authentication, so it binds to loopback unless
+# RENAISSANCE_ASSET_HOST says otherwise. It only serves published outputs:
+# LOD meshes and their textures, grid sprite sheets, and the models and
+# tours under the published folder. Uploaded sources, the manifest and lock
+# or temporary files are never served.
+#
+# It also serves private downloads, such as invoice archives and ledger
+# exports, which the apps write to disk rather than keep in session state.
+# Each sits under downloads/<random token>/, so only the session that was
+# given the link can fetch it. They are sent as attachments, never cached
+# or shared cross-origin, and expire after DOWNLOAD_TTL_SECONDS.
+
+DEFAULT_HOST = os.environ.get("RENAISSANCE_ASSET_HOST", "127.0.0.1")
+DEFAULT_PORT = int(os.environ.get("RENAISSANCE_ASSET_PORT", 8502))
+PUBLIC_URL = os.environ.get("RENAISSANCE_ASSET_URL", f"http://localhost:{DEFAULT_PORT}")
+# Without an explicit URL, asset links only resolve in a browser on this host
+PUBLIC_URL_CONFIGURED = "RENAISSANCE_ASSET_URL" in os.environ
+SEND_CHUNK = 1024 * 1024
+SPRITE_DIR = "sprites"  # Relative to the asset root
+DOWNLOAD_DIR = "downloads"  # Relative to the asset root
+DOWNLOAD_TTL_SECONDS = 3600
+
+PUBLISHED_EXTENSIONS = ("glb", "gltf", "usdz", "mp4", "webm", "jpg", "jpeg", "png", "webp")
+
+_LOD_NAMES = "|".join(re.escape(name) for name, _, _ in LOD_LEVELS)
+# <asset ID>/<lod>.obj, <asset ID>/<lod>_tex<n>.<ext>, sprites/<sha1>.jpg,
+# original models and 360° tours anywhere under the published folder, and
+# downloads/<token>/<file name>
+PUBLISHED_PATH = re.compile(rf"(?!uploads/|{DOWNLOAD_DIR}/)[\w.-]+/(?:{_LOD_NAMES})(?:\.obj|_tex\d+\.[A-Za-z0-9]+)"
+                            rf"|{SPRITE_DIR}/[0-9a-f]+\.jpg"
+                            rf"|{PUBLISHED_DIR}/(?:[\w.-]+/)*[\w.-]+\.(?i:{'|'.join(PUBLISHED_EXTENSIONS)})"
+                            rf"|{DOWNLOAD_DIR}/[0-9a-f]{{32}}/[\w.-]+")
+
+mimetypes.add_type("model/gltf-binary", ".glb")
+mimetypes.add_type("model/gltf+json", ".gltf")
+mimetypes.add_type("model/obj", ".obj")
+mimetypes.add_type("model/vnd.usdz+zip", ".usdz")
+mimetypes.add_type("video/webm", ".webm")
+mimetypes.add_type("image/webp", ".webp")
+
+
+def is_published(relative_path):
+    """True for paths the asset server may serve, relative to the asset root."""
+    path = relative_path.replace(os.sep, "/")
+    if any(part in ("", ".", "..") for part in path.split("/")):
+        return False  # Only plain downward paths, so no pattern can be escaped
+    return PUBLISHED_PATH.fullmatch(path) is not None
+
+
+def is_download(relative_path):
+    return relative_path.replace(os.sep, "/").startswith(f"{DOWNLOAD_DIR}/")
+
+
+def make_etag(stat):
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def parse_range(header, size):
+    """Returns (start, end) inclusive for a single 'bytes=' range, or None.
+
+    Raises ValueError for a syntactically valid range that cannot be
+    satisfied, so the caller can answer 416.
+    """
+    if not header or not header.startswith("bytes="):
+        return None
+    spec = header[len("bytes="):].strip()
+    if "," in spec:
+        return None  # Multi-range requests get the whole file
+    first, _, last = spec.partition("-")
+    if (first and not first.isdigit()) or (last and not last.isdigit()) or not (first or last):
+        return None  # Malformed ranges are ignored and the whole file is sent
+    if not first:
+        length = int(last)
+        if length == 0:
+            raise ValueError("Empty suffix range.")
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError("Range not satisfiable.")
+    return start, min(end, size - 1)
+
+
+class AssetRequestHandler(BaseHTTPRequestHandler):
+    """Serves files under `root` with Range, ETag and conditional GET support."""
+
+    root = ASSET_DIR
+    protocol_version = "HTTP/1.1"
+    server_version = "RenaissanceAssets/1.0"
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def log_message(self, format, *args):
+        pass  # Keep the Streamlit console quiet
+
+    def _resolve(self):
+        path = urllib.parse.unquote(urllib.parse.urlsplit(self.path).path).lstrip("/")
+        if not is_published(path):
+            return None, False
+        root = os.path.realpath(self.root)
+        expected = os.path.join(root, *path.split("/"))
+        full = os.path.realpath(expected)
+        if full != expected:
+            return None, False  # A symlink would lead outside the published file's own path
+        return (full if os.path.isfile(full) else None), is_download(path)
+
+    def _serve(self, send_body):
+        path, private = self._resolve()
+        if path is None:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+
+        with open(path, "rb") as fh:
+            stat = os.fstat(fh.fileno())
+            if private and stat.st_mtime < time.time() - DOWNLOAD_TTL_SECONDS:
+                self.send_error(HTTPStatus.NOT_FOUND)  # Expired; pruned on the next new download
+                return
+            size = stat.st_size
+            etag = make_etag(stat)
+
+            if etag in [tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")]:
+                self.send_response(HTTPStatus.NOT_MODIFIED)
+                self._common_headers(etag, stat, private)
+                self.end_headers()
+                return
+
+            # If-Range: only honour the range if the client's copy is still current
+            range_header = self.headers.get("Range")
+            if_range = self.headers.get("If-Range")
+            if if_range and if_range != etag:
+                range_header = None
+
+            try:
+                byte_range = parse_range(range_header, size)
+            except ValueError:
+                self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+            if byte_range is None:
+                start, end = 0, size - 1
+                self.send_response(HTTPStatus.OK)
+            else:
+                start, end = byte_range
+                self.send_response(HTTPStatus.PARTIAL_CONTENT)
+                self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            length = max(end - start + 1, 0)
+
+            self._common_headers(etag, stat, private)
+            self.send_header("Content-Type", mimetypes.guess_type(path)[0] or "application/octet-stream")
+            self.send_header("Content-Length", str(length))
+            if private:
+                self.send_header("Content-Disposition", f'attachment; filename="{os.path.basename(path)}"')
+            self.end_headers()
+            if send_body and length:
+                self.wfile.flush()
+                self._send_file(fh, start, length)
+
+    def _common_headers(self, etag, stat, private=False):
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", email.utils.formatdate(stat.st_mtime, usegmt=True))
+        self.send_header("Accept-Ranges", "bytes")
+        if private:
+            self.send_header("Cache-Control", "private, no-store")
+            return
+        self.send_header("Cache-Control", "public, max-age=3600")
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.send_header("Access-Control-Expose-Headers", "Content-Range, Content-Length, ETag")
+
+    def _send_file(self, fh, offset, length):
+        # Sent in bounded slices so one huge tour cannot monopolise the socket
+        # buffer; socket.sendfile uses os.sendfile where the platform has it.
+        try:
+            while length > 0:
+                sent = self.connection.sendfile(fh, offset, min(SEND_CHUNK, length))
+                if not sent:
+                    break
+                offset += sent
+                length -= sent
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True  # Viewer cancelled; nothing left to do
+
+
+def make_server(root=ASSET_DIR, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    handler = type("BoundAssetRequestHandler", (AssetRequestHandler,), {"root": root})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def start_background(root=ASSET_DIR, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """Starts the server on a daemon thread and returns it."""
+    os.makedirs(root, exist_ok=True)
+    server = make_server(root, host, port)
+    threading.Thread(target=server.serve_forever, name="asset-server", daemon=True).start()
+    return server
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def ensure_running(root=ASSET_DIR):
+    """Starts the asset server once per process.
+
+    Returns None when another app process on this host already runs it.
+    """
+    global _server
+    with _server_lock:
+        if _server is None:
+            try:
+                _server = start_background(root)
+            except OSError:
+                return None
+        return _server
+
+
+def asset_url(relative_path):
+    return f"{PUBLIC_URL}/{urllib.parse.quote(relative_path.replace(os.sep, '/'))}"
+
+
+def prune_downloads(root=ASSET_DIR, max_age=DOWNLOAD_TTL_SECONDS):
+    """Deletes downloads older than `max_age` seconds."""
+    downloads = os.path.join(root, DOWNLOAD_DIR)
+    cutoff = time.time() - max_age
+    for entry in os.scandir(downloads) if os.path.isdir(downloads) else ():
+        if entry.stat().st_mtime < cutoff:
+            shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def new_download(file_name, root=ASSET_DIR):
+    """(path to write to, URL to fetch it from) for a private download.
+
+    The URL carries a random token; hand it only to the session it is for.
+    """
+    prune_downloads(root)
+    token = secrets.token_hex(16)
+    directory = os.path.join(root, DOWNLOAD_DIR, token)
+    os.makedirs(directory)
+    return os.path.join(directory, file_name), asset_url(f"{DOWNLOAD_DIR}/{token}/{file_name}")
+
+
+def list_assets(root=ASSET_DIR):
+    """Relative paths of the published files under `root`, without private downloads."""
+    found = []
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            relative = os.path.relpath(os.path.join(dirpath, name), root)
+            if is_published(relative) and not is_download(relative):
+                found.append(relative)
+    return sorted(found)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve AR models and VR tours with HTTP range support.")
+    parser.add_argument("--root", default=ASSET_DIR)
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+
+    server = make_server(args.root, args.host, args.port)
+    print(f"Serving {os.path.abspath(args.root)} on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
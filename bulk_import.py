@@ -0,0 +1,184 @@
+import csv
+import io
+import json
+import math
+
+
+# --- Bulk Artwork Import (FR-AM-01) ---
+# Streams CSV, JSON-array or JSON-lines uploads row by row, normalizes each
+# row against the tier and medium lists, and inserts valid listings into the
+# catalog in fixed-size batches. Nothing larger than one batch is held in
+# memory, and progress is reported per batch.
+
+DEFAULT_CHUNK_SIZE = 500
+READ_SIZE = 64 * 1024
+MAX_REPORTED_ERRORS = 50
+
+TRUE_VALUES = {"1", "true", "yes", "y", "x"}
+FALSE_VALUES = {"", "0", "false", "no", "n"}
+
+
+class ImportRowError(ValueError):
+    """Raised when a single import row cannot be turned into a listing."""
+
+
+class ImportReport:
+    """Running totals for one import."""
+
+    def __init__(self):
+        self.rows = 0
+        self.inserted = 0
+        self.rejected = 0
+        self.errors = []
+        self.failure = None  # Set when the file itself could not be read to the end
+
+    def reject(self, row_number, message):
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"Row": row_number, "Error": message})
+
+
+# --- Row sources ---
+def iter_csv(stream):
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    try:
+        yield from csv.DictReader(text)
+    finally:
+        text.detach()
+
+
+def iter_json(stream):
+    """Yields objects from a JSON array or JSON-lines stream without loading it whole."""
+    decoder = json.JSONDecoder()
+    reader = io.TextIOWrapper(stream, encoding="utf-8-sig")
+    buffer = ""
+    try:
+        while True:
+            chunk = reader.read(READ_SIZE)
+            buffer += chunk
+            while True:
+                # Skip the array brackets and separators between objects
+                buffer = buffer.lstrip(" \t\r\n,[]")
+                if not buffer:
+                    break
+                try:
+                    obj, end = decoder.raw_decode(buffer)
+                except json.JSONDecodeError:
+                    if not chunk:
+                        raise
+                    break  # Object continues in the next chunk
+                yield obj
+                buffer = buffer[end:]
+            if not chunk:
+                return
+    finally:
+        reader.detach()
+
+
+def iter_rows(stream, fmt):
+    if fmt == "csv":
+        return iter_csv(stream)
+    if fmt in ("json", "jsonl"):
+        return iter_json(stream)
+    raise ValueError(f"Unsupported import format: {fmt}")
+
+
+# --- Normalization ---
+def _lookup(value, allowed, field):
+    key = " ".join(str(value or "").replace("-", " ").replace("_", " ").split()).lower()
+    for option in allowed:
+        if key == " ".join(option.replace("-", " ").split()).lower():
+            return option
+    raise ImportRowError(f"Unknown {field} '{value}'. Expected one of: {', '.join(allowed)}.")
+
+
+def _flag(value, field):
+    if isinstance(value, bool):
+        return value
+    key = str(value or "").strip().lower()
+    if key in TRUE_VALUES:
+        return True
+    if key in FALSE_VALUES:
+        return False
+    raise ImportRowError(f"{field} must be yes/no, got '{value}'.")
+
+
+def _price(value):
+    try:
+        price = float(str(value).replace("$", "").replace(",", "").strip())
+    except ValueError:
+        raise ImportRowError(f"Price '{value}' is not a number.") from None
+    if not math.isfinite(price):
+        raise ImportRowError(f"Price '{value}' is not a finite number.")
+    if price <= 0:
+        raise ImportRowError("Price must be greater than zero.")
+    return int(price) if price.is_integer() else price
+
+
+def normalize_row(raw, tiers, mediums):
+    """Validates one raw import row and returns a catalog listing."""
+    title = str(raw.get("Title") or "").strip()
+    artist = str(raw.get("Artist") or "").strip()
+    if not title:
+        raise ImportRowError("Title is required.")
+    if not artist:
+        raise ImportRowError("Artist is required.")
+    return {
+        "Title": title,
+        "Artist": artist,
+        "Medium": _lookup(raw.get("Medium"), mediums, "medium"),
+        "Price": _price(raw.get("Price")),
+        "Tier": _lookup(raw.get("Tier"), list(tiers), "tier"),
+        "AR_Ready": _flag(raw.get("AR_Ready"), "AR_Ready"),
+        "VR_Ready": _flag(raw.get("VR_Ready"), "VR_Ready"),
+        "Description": str(raw.get("Description") or "").strip(),
+    }
+
+
+# --- Import driver ---
+def import_listings(stream, fmt, catalog, tiers, mediums, chunk_size=DEFAULT_CHUNK_SIZE, on_progress=None):
+    """Imports listings from a binary stream into `catalog` in batches.
+
+    `on_progress(report, fraction)` is called after every batch; `fraction`
+    is the share of the stream consumed, or None if its size is unknown.
+    """
+    start = stream.tell()
+    total_bytes = _stream_size(stream)
+    report = ImportReport()
+    batch = []
+
+    def flush():
+        report.inserted += len(catalog.insert_many(batch))
+        batch.clear()
+        if on_progress:
+            fraction = min((stream.tell() - start) / total_bytes, 1.0) if total_bytes else None
+            on_progress(report, fraction)
+
+    try:
+        for row_number, raw in enumerate(iter_rows(stream, fmt), start=1):
+            report.rows += 1
+            try:
+                if not isinstance(raw, dict):
+                    raise ImportRowError("Each JSON entry must be an object.")
+                batch.append(normalize_row(raw, tiers, mediums))
+            except ImportRowError as exc:
+                report.reject(row_number, str(exc))
+            if len(batch) >= chunk_size:
+                flush()
+    except UnicodeDecodeError:
+        report.failure = f"The file is not UTF-8 text (stopped after row {report.rows:,})."
+    except (json.JSONDecodeError, csv.Error) as exc:
+        report.failure = f"The file could not be parsed after row {report.rows:,}: {exc}."
+    # Rows read before a malformed section are still imported
+    flush()
+    return report
+
+
+def _stream_size(stream):
+    try:
+        position = stream.tell()
+        size = stream.seek(0, io.SEEK_END)
+        stream.seek(position)
+        return size - position
+    except (AttributeError, OSError):
+        return None
@@ -0,0 +1,117 @@
+import html
+import threading
+
+from metrics import record_cache
+
+
+# --- Card Grid Renderer (FR-DS-01) ---
+# Every Streamlit element is a separate delta on the wire, so a card built
+# from an image, a subheader, several markdown badges and an expander costs
+# ten or more deltas. Here each card's static markup (formatted price, tier
+# badge, AR/VR tags, details) is rendered to an HTML string once per catalog
+# version, and a whole page of cards is emitted as one markdown block. Only
+# the buttons remain real widgets.
+
+PLACEHOLDER_IMAGE = "https://placehold.co/600x400/1e293b/FFFFFF?text=ART+ID+{id}"
+
+GRID_CSS = """
+<style>
+.rn-grid { display: grid; grid-template-columns: repeat(var(--rn-cols), minmax(0, 1fr)); gap: 1rem; margin-bottom: 0.5rem; }
+.rn-card { border: 1px solid rgba(49, 51, 63, 0.2); border-radius: 0.5rem; padding: 0.75rem; }
+.rn-card img { width: 100%; border-radius: 0.4rem; }
+.rn-card h3 { margin: 0.5rem 0 0.25rem 0; padding: 0; font-size: 1.3em; }
+.rn-caption { color: gray; font-size: 0.8em; }
+.rn-price { font-size: 1.2em; color: #10b981; font-weight: bold; }
+.rn-badge { padding: 2px 8px; border-radius: 10px; font-size: 0.75em; margin-right: 4px; display: inline-block; }
+.rn-tag { background: #34d399; color: white; }
+.rn-standard { color: #ef4444; font-size: 0.8em; }
+.rn-card details { margin-top: 0.5rem; font-size: 0.9em; }
+.rn-feed { border-bottom: 1px solid #eee; padding-bottom: 0.5rem; margin-bottom: 0.25rem; }
+.rn-avatar { width: 40px; height: 40px; border-radius: 50%; display: inline-flex; align-items: center; justify-content: center; font-weight: bold; margin-right: 8px; }
+.rn-feed-head { display: flex; align-items: center; margin-bottom: 0.5rem; }
+</style>
+"""
+
+
+def _tier_badge(tier, color):
+    # Tier colours are either CSS names ("gold") or hex codes ("#eab308")
+    return (f"<span class='rn-badge' style='border: 1px solid {color}; color: {color};'>"
+            f"{html.escape(tier)}</span>")
+
+
+def _immersive_tags(listing):
+    tags = []
+    if listing.get("AR_Ready", listing.get("AR")):
+        tags.append("📱 AR View")
+    if listing.get("VR_Ready"):
+        tags.append("👓 VR Gallery")
+    if not tags:
+        return "<span class='rn-standard'>Standard Listing</span>"
+    return "".join(f"<span class='rn-badge rn-tag'>{tag}</span>" for tag in tags)
+
+
+def _image(listing):
+    return listing.get("Img") or listing.get("Image") or PLACEHOLDER_IMAGE.format(id=listing["ID"])
+
+
+def browser_card(listing, tiers):
+    """Static markup for one Art Discovery Portal card."""
+    e = html.escape
+    tier = listing["Tier"]
+    return (
+        "<div class='rn-card'>"
+        f"<img src='{e(_image(listing))}' alt='{e(listing['Title'])}' loading='lazy'>"
+        f"<div class='rn-caption'>{e(listing['Title'])} by {e(listing['Artist'])}</div>"
+        f"<h3>{e(listing['Title'])}</h3>"
+        f"<div><b>Price:</b> <span class='rn-price'>${listing['Price']:,}</span></div>"
+        f"<div><b>Tier:</b> {_tier_badge(tier, tiers[tier]['color'])}</div>"
+        f"<div style='margin-top: 4px;'>{_immersive_tags(listing)}</div>"
+        "<details><summary>Details</summary>"
+        f"<p><b>Artist:</b> {e(listing['Artist'])}<br><b>Medium:</b> {e(listing['Medium'])}</p>"
+        f"<p><i>{e(listing.get('Description') or listing.get('Desc') or '')}</i></p>"
+        "</details></div>"
+    )
+
+
+def feed_card(listing, tiers):
+    """Static markup for one Instagram-style feed post."""
+    e = html.escape
+    tier = listing["Tier"]
+    return (
+        "<div class='rn-feed'>"
+        "<div class='rn-feed-head'>"
+        f"<span class='rn-avatar' style='border: 2px solid {tiers[tier]['color']};'>{e(listing['Artist'][0])}</span>"
+        f"<span><b>{e(listing['Artist'])}</b> <span class='rn-caption'>- {e(tier)}</span><br>"
+        f"<span class='rn-caption'>{e(listing['Title'])}</span></span></div>"
+        f"<img src='{e(_image(listing))}' style='width: 100%;' alt='{e(listing['Title'])}' loading='lazy'>"
+        f"<p style='text-align: right; font-size: 1.4em; color: #10b981; margin: 0.25rem 0;'><b>${listing['Price']:,}</b></p>"
+        f"<div class='rn-caption'><b>{e(listing['Artist'])}</b>: {e(listing['Title'])} - <i>{e(listing['Medium'])}</i></div>"
+        "</div>"
+    )
+
+
+class ViewModelCache:
+    """Per-listing HTML, rebuilt only when the catalog version changes."""
+
+    def __init__(self, name, build, tiers):
+        self.name = name
+        self._build = build
+        self._tiers = tiers
+        self._lock = threading.Lock()
+        self._version = None
+        self._cards = {}
+
+    def get(self, version, load_listings):
+        """Returns {listing ID: card HTML}; `load_listings` is only called on a miss."""
+        with self._lock:
+            hit = self._version == version
+            record_cache(self.name, hit)
+            if not hit:
+                self._cards = {listing["ID"]: self._build(listing, self._tiers) for listing in load_listings()}
+                self._version = version
+            return self._cards
+
+
+def grid_html(cards, columns=3):
+    """One HTML block laying `cards` out in a responsive grid."""
+    return f"<div class='rn-grid' style='--rn-cols: {columns};'>{''.join(cards)}</div>"
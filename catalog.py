@@ -0,0 +1,204 @@
+import heapq
+import threading
+import time
+from collections import deque
+
+
+# --- Artwork Catalog Store (FR-AM-01) ---
+# Listings keyed by ID with secondary indexes on the fields the discovery
+# pages filter by. Writes bump `version`, which callers use as a cache key
+# for anything derived from the catalog, and are recorded in a bounded change
+# log so clients can fetch only what changed since the version they hold.
+# Per-artist counters (listings, AR/VR-ready, listed value) are kept up to
+# date on every write, so artist dashboards never scan the catalog.
+
+INDEXED_FIELDS = ("Artist", "Medium", "Tier")
+ARTIST_STATS = ("listings", "ar_ready", "vr_ready", "listed_value")
+CHANGE_LOG_LIMIT = 100_000
+
+
+class CatalogStore:
+    """Thread-safe in-memory artwork catalog."""
+
+    def __init__(self, listings=()):
+        self._lock = threading.RLock()
+        self._listings = {}
+        self._indexes = {field: {} for field in INDEXED_FIELDS}
+        self._artist_stats = {}
+        self._next_id = 1
+        self.version = 0
+        # (version, listing ID) per write; deltas can be served to any client
+        # whose version is at least `_log_floor`.
+        self._changes = deque()
+        self._log_floor = 0
+        if listings:
+            self.insert_many(listings)
+
+    # --- Writes ---
+    def insert(self, listing):
+        return self.insert_many([listing])[0]
+
+    def insert_many(self, listings):
+        """Inserts a batch under one lock acquisition and one version bump."""
+        ids = []
+        with self._lock:
+            now = time.time()
+            version = self.version + 1
+            # Assign and check every ID before the first write, so a
+            # duplicate rejects the whole batch and leaves the store untouched.
+            batch = []
+            seen = set()
+            next_id = self._next_id
+            for listing in listings:
+                listing = dict(listing)
+                listing_id = listing.get("ID")
+                if listing_id is None:
+                    listing_id = next_id
+                if listing_id in self._listings or listing_id in seen:
+                    raise ValueError(f"Listing {listing_id} already exists.")
+                listing["ID"] = listing_id
+                listing.setdefault("Listed", now)
+                next_id = max(next_id, listing_id + 1)
+                batch.append(listing)
+                seen.add(listing_id)
+                ids.append(listing_id)
+            for listing in batch:
+                listing_id = listing["ID"]
+                self._listings[listing_id] = listing
+                self._index(listing)
+                self._log(version, listing_id)
+            self._next_id = next_id
+            if ids:
+                self.version = version
+        return ids
+
+    def update(self, listing_id, **changes):
+        with self._lock:
+            old = self._listings[listing_id]
+            new = dict(old, **changes, ID=listing_id)
+            self._unindex(old)
+            self._listings[listing_id] = new
+            self._index(new)
+            self.version += 1
+            self._log(self.version, listing_id)
+        return new
+
+    def delete(self, listing_id):
+        with self._lock:
+            old = self._listings.pop(listing_id)
+            self._unindex(old)
+            self.version += 1
+            self._log(self.version, listing_id)
+        return old
+
+    # --- Reads ---
+    def get(self, listing_id):
+        with self._lock:
+            return dict(self._listings[listing_id])
+
+    def listings(self):
+        """Copies of every listing, in ID order."""
+        with self._lock:
+            return [dict(self._listings[listing_id]) for listing_id in sorted(self._listings)]
+
+    def ids_where(self, field, value):
+        with self._lock:
+            return set(self._indexes[field].get(value, ()))
+
+    def artist_ids(self, artist):
+        """IDs of the artist's listings, from the artist index."""
+        return self.ids_where("Artist", artist)
+
+    def artist_stats(self, artist):
+        """Listing count, AR-ready, VR-ready and listed value for one artist, in O(1)."""
+        with self._lock:
+            return dict(self._artist_stats.get(artist) or dict.fromkeys(ARTIST_STATS, 0))
+
+    def values(self, field):
+        with self._lock:
+            return sorted(value for value, ids in self._indexes[field].items() if ids)
+
+    def __len__(self):
+        return len(self._listings)
+
+    def page(self, where=None, search="", sort="ID", descending=False, offset=0, limit=25, fields=None):
+        """(total matches, listings on one page) without copying the rest of the catalog.
+
+        `where` maps indexed fields to a required value and is answered from
+        the indexes; `search` is a case-insensitive match on title and artist.
+        Only the first offset + limit rows in sort order are selected, with a
+        bounded heap rather than a full sort.
+        """
+        search = search.strip().lower()
+        with self._lock:
+            if where:
+                ids = set.intersection(*(self._indexes[field].get(value, set()) for field, value in where.items()))
+            else:
+                ids = self._listings.keys()
+            if search:
+                ids = [i for i in ids if search in self._listings[i].get("Title", "").lower()
+                       or search in self._listings[i].get("Artist", "").lower()]
+            total = len(ids)
+
+            def key(listing_id):
+                value = self._listings[listing_id].get(sort)
+                return (value is None, value, listing_id)
+
+            select = heapq.nlargest if descending else heapq.nsmallest
+            page_ids = select(offset + limit, ids, key=key)[offset:]
+            rows = []
+            for listing_id in page_ids:
+                listing = self._listings[listing_id]
+                rows.append({field: listing.get(field) for field in fields} if fields else dict(listing))
+        return total, rows
+
+    def snapshot(self):
+        """(version, listings) read atomically."""
+        with self._lock:
+            return self.version, self.listings()
+
+    def changes_since(self, version):
+        """Net changes after `version`, or None if a full snapshot is needed.
+
+        Several writes to one listing collapse into its current state, so the
+        delta is proportional to the number of listings touched.
+        """
+        with self._lock:
+            if version < self._log_floor or version > self.version:
+                return None
+            touched = set()
+            for change_version, listing_id in reversed(self._changes):
+                if change_version <= version:
+                    break
+                touched.add(listing_id)
+            return {
+                "from_version": version,
+                "version": self.version,
+                "upserts": [dict(self._listings[i]) for i in sorted(touched) if i in self._listings],
+                "deletes": sorted(i for i in touched if i not in self._listings),
+            }
+
+    # --- Index and log maintenance (caller holds the lock) ---
+    def _log(self, version, listing_id):
+        self._changes.append((version, listing_id))
+        if len(self._changes) > CHANGE_LOG_LIMIT:
+            self._log_floor = self._changes.popleft()[0]
+
+    def _index(self, listing):
+        for field in INDEXED_FIELDS:
+            self._indexes[field].setdefault(listing.get(field), set()).add(listing["ID"])
+        self._count(listing, 1)
+
+    def _unindex(self, listing):
+        for field in INDEXED_FIELDS:
+            self._indexes[field].get(listing.get(field), set()).discard(listing["ID"])
+        self._count(listing, -1)
+
+    def _count(self, listing, sign):
+        stats = self._artist_stats.setdefault(listing.get("Artist"), dict.fromkeys(ARTIST_STATS, 0))
+        stats["listings"] += sign
+        stats["ar_ready"] += sign * bool(listing.get("AR_Ready"))
+        stats["vr_ready"] += sign * bool(listing.get("VR_Ready"))
+        stats["listed_value"] += sign * (listing.get("Price") or 0)
+        if not stats["listings"]:
+            del self._artist_stats[listing.get("Artist")]
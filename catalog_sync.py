@@ -0,0 +1,94 @@
+import gzip
+import json
+import os
+import threading
+
+from metrics import record_cache
+
+
+# --- Offline Catalog Sync (NF-SR-03) ---
+# A client that has cached the catalog at version V asks for what changed
+# since V and gets back only the touched listings and the deleted IDs. Clients
+# that are too far behind for the change log (or have nothing cached) get a
+# full snapshot instead. Payloads are compact gzipped JSON; the snapshot for
+# the current version is encoded once and shared by every client asking.
+
+SNAPSHOT = "snapshot"
+DELTA = "delta"
+
+
+def _encode(payload):
+    return gzip.compress(json.dumps(payload, separators=(",", ":"), default=str).encode("utf-8"))
+
+
+def decode(blob):
+    return json.loads(gzip.decompress(blob).decode("utf-8"))
+
+
+class SyncServer:
+    """Serves snapshots and deltas for a CatalogStore."""
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self._lock = threading.Lock()
+        self._snapshot = (None, None)  # (version, encoded payload)
+
+    def snapshot(self):
+        """Encoded full snapshot at the current catalog version."""
+        with self._lock:
+            cached_version, blob = self._snapshot
+            hit = cached_version == self.catalog.version
+            record_cache("catalog_snapshot", hit)
+            if not hit:
+                version, listings = self.catalog.snapshot()
+                blob = _encode({"type": SNAPSHOT, "version": version, "listings": listings})
+                self._snapshot = (version, blob)
+            return blob
+
+    def sync(self, since=None):
+        """Encoded delta since `since`, falling back to a snapshot."""
+        delta = None if since is None else self.catalog.changes_since(since)
+        if delta is None:
+            return self.snapshot()
+        return _encode(dict(delta, type=DELTA))
+
+
+class OfflineCatalog:
+    """Client-side catalog cache persisted to a JSON file between sessions."""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.version = None
+        self.listings = {}
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as fh:
+                state = json.load(fh)
+            self.version = state["version"]
+            self.listings = {listing["ID"]: listing for listing in state["listings"]}
+
+    def apply(self, blob):
+        """Applies a snapshot or delta payload; returns the number of listings changed."""
+        payload = decode(blob)
+        if payload["type"] == SNAPSHOT:
+            self.listings = {listing["ID"]: listing for listing in payload["listings"]}
+            changed = len(self.listings)
+        else:
+            if payload["from_version"] != self.version:
+                raise ValueError(f"Delta starts at version {payload['from_version']}, cache is at {self.version}.")
+            for listing in payload["upserts"]:
+                self.listings[listing["ID"]] = listing
+            for listing_id in payload["deletes"]:
+                self.listings.pop(listing_id, None)
+            changed = len(payload["upserts"]) + len(payload["deletes"])
+        self.version = payload["version"]
+        return changed
+
+    def sync(self, server):
+        return self.apply(server.sync(self.version))
+
+    def save(self):
+        # Write-then-rename so a crash mid-save never leaves a torn cache
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump({"version": self.version, "listings": list(self.listings.values())}, fh, default=str)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,278 @@
+import hashlib
+import hmac
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from id_generator import next_ref
+from ledger_store import LEDGER_DB
+
+
+# --- Certificate of Authenticity Service (FR-EC-01) ---
+# Every purchased artwork gets a certificate whose hash becomes a leaf in a
+# Merkle tree. Pending certificates are sealed into a batch every
+# `batch_size` certificates or `max_delay_ms` milliseconds, whichever comes
+# first, and only the batch root is signed. A drop of thousands of sales
+# therefore costs one signature per batch instead of one per certificate.
+# Any certificate can still be verified on its own, with an inclusion proof
+# of log2(batch size) sibling hashes leading up to the signed root.
+# Sealed batches are immutable, so a certificate whose sale is undone is
+# revoked by a separate record; a revoked certificate never verifies.
+#
+# Documents, batch roots, signatures and tree levels live in the ledger DB,
+# so every app process can verify every certificate, across restarts.
+# Certificates a stopped process issued but never sealed are sealed by the
+# next process to start. The service refuses to start without a signing key
+# in RENAISSANCE_COA_KEY.
+
+DEFAULT_BATCH_SIZE = 256
+DEFAULT_MAX_DELAY_MS = 500
+SIGNING_KEY = os.environ.get("RENAISSANCE_COA_KEY", "").encode("utf-8")
+ORPHAN_AFTER_SECONDS = 60  # Unsealed for this long means the issuing process is gone
+LEVEL_CACHE_SIZE = 64
+
+# Domain separation keeps a leaf from ever being mistaken for an inner node
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+
+
+def _canonical(document):
+    return json.dumps(document, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+def leaf_hash(document):
+    return hashlib.sha256(LEAF_PREFIX + _canonical(document)).digest()
+
+
+def node_hash(left, right):
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+
+def build_levels(leaves):
+    """All tree levels, leaves first; an odd last node is promoted unchanged."""
+    levels = [list(leaves)]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        parents = [node_hash(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            parents.append(level[-1])
+        levels.append(parents)
+    return levels
+
+
+def inclusion_proof(levels, index):
+    """Sibling hashes from leaf `index` up to the root, as [(hex, side), ...]."""
+    proof = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            proof.append((level[sibling].hex(), "left" if sibling < index else "right"))
+        index //= 2
+    return proof
+
+
+def verify_proof(document, proof, root_hex):
+    current = leaf_hash(document)
+    for sibling_hex, side in proof:
+        sibling = bytes.fromhex(sibling_hex)
+        current = node_hash(sibling, current) if side == "left" else node_hash(current, sibling)
+    return hmac.compare_digest(current.hex(), root_hex)
+
+
+def sign_root(root, key):
+    return hmac.new(key, root, hashlib.sha256).hexdigest()
+
+
+class CertificateService:
+    """Issues certificates and seals them into signed Merkle batches, kept in the ledger DB."""
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, max_delay_ms=DEFAULT_MAX_DELAY_MS, key=None, path=LEDGER_DB):
+        key = key or SIGNING_KEY
+        if not key:
+            raise RuntimeError("Set RENAISSANCE_COA_KEY to the certificate signing key; refusing to sign without it.")
+        self.batch_size = batch_size
+        self.max_delay = max_delay_ms / 1000
+        self.path = path
+        self._key = key
+        self._local = threading.local()
+        self._lock = threading.Condition()
+        self._pending = []  # (certificate ID, document) issued here and not yet sealed
+        self._pending_since = None
+        self._levels = OrderedDict()  # batch ID -> tree levels, for recently read batches
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS certificate_batches ("
+                " id TEXT PRIMARY KEY, root TEXT NOT NULL, signature TEXT NOT NULL,"
+                " sealed REAL NOT NULL, levels TEXT NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS certificates ("
+                " id TEXT PRIMARY KEY, document TEXT NOT NULL, issued REAL NOT NULL,"
+                " batch TEXT, leaf INTEGER, revoked REAL, reason TEXT)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS certificates_unsealed ON certificates (issued) WHERE batch IS NULL")
+        self._seal_orphans()
+        self._thread = threading.Thread(target=self._run, name="coa-sealer", daemon=True)
+        self._thread.start()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # --- Issuing ---
+    def issue(self, artwork, buyer, payment_ref):
+        """Records a certificate for one artwork; it is verifiable once its batch is sealed."""
+        certificate_id = next_ref("COA")
+        document = {
+            "certificate": certificate_id, "artwork": artwork["ID"], "title": artwork["Title"],
+            "artist": artwork["Artist"], "buyer": buyer, "payment": payment_ref, "issued": time.time(),
+        }
+        with self._connection() as conn:
+            conn.execute("INSERT INTO certificates (id, document, issued) VALUES (?, ?, ?)",
+                         (certificate_id, _canonical(document).decode("utf-8"), document["issued"]))
+        with self._lock:
+            self._pending.append((certificate_id, document))
+            if self._pending_since is None:
+                self._pending_since = time.monotonic()
+            if len(self._pending) >= self.batch_size:
+                self._seal()
+            else:
+                self._lock.notify_all()
+        return certificate_id
+
+    def revoke(self, certificate_id, reason):
+        """Marks an issued certificate as void, e.g. because its sale was refunded."""
+        with self._connection() as conn:
+            if conn.execute("SELECT 1 FROM certificates WHERE id = ?", (certificate_id,)).fetchone() is None:
+                raise KeyError(certificate_id)
+            conn.execute("UPDATE certificates SET revoked = ?, reason = ? WHERE id = ? AND revoked IS NULL",
+                         (time.time(), reason, certificate_id))
+
+    def wait_sealed(self, certificate_ids, timeout=None):
+        """Blocks until none of the certificates is pending here; returns False on timeout."""
+        wanted = set(certificate_ids)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            while any(cid in wanted for cid, _ in self._pending):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._lock.wait(remaining)
+        return True
+
+    # --- Verification ---
+    def certificate(self, certificate_id):
+        """The certificate document plus, once sealed, its batch and inclusion proof.
+
+        Any process reads the same record; None for unknown IDs.
+        """
+        conn = self._connection()
+        row = conn.execute("SELECT document, batch, leaf, revoked, reason FROM certificates WHERE id = ?",
+                           (certificate_id,)).fetchone()
+        if row is None:
+            return None
+        document, batch_id, leaf_index, revoked, reason = row
+        record = {"document": json.loads(document), "status": "Pending"}
+        if batch_id is not None:
+            root, signature, levels = self._batch(conn, batch_id)
+            record.update(status="Sealed", batch=batch_id, root=root, signature=signature,
+                          proof=inclusion_proof(levels, leaf_index))
+        if revoked is not None:
+            record.update(status="Revoked", revoked=revoked, reason=reason)
+        return record
+
+    def _batch(self, conn, batch_id):
+        root, signature, levels = conn.execute(
+            "SELECT root, signature, levels FROM certificate_batches WHERE id = ?", (batch_id,)).fetchone()
+        with self._lock:
+            cached = self._levels.get(batch_id)
+            if cached is not None:
+                self._levels.move_to_end(batch_id)
+                return root, signature, cached
+        cached = [[bytes.fromhex(node) for node in level] for level in json.loads(levels)]
+        with self._lock:
+            self._levels[batch_id] = cached
+            if len(self._levels) > LEVEL_CACHE_SIZE:
+                self._levels.popitem(last=False)
+        return root, signature, cached
+
+    def verify(self, record):
+        """Checks the proof against the root and the root's signature."""
+        if record.get("status") != "Sealed":
+            return False
+        root = bytes.fromhex(record["root"])
+        return (hmac.compare_digest(sign_root(root, self._key), record["signature"])
+                and verify_proof(record["document"], record["proof"], record["root"]))
+
+    def stats(self):
+        conn = self._connection()
+        batches, = conn.execute("SELECT COUNT(*) FROM certificate_batches").fetchone()
+        sealed, revoked = conn.execute(
+            "SELECT COUNT(batch), COUNT(revoked) FROM certificates").fetchone()
+        with self._lock:
+            pending = len(self._pending)
+        return {"batches": batches, "certificates": sealed, "pending": pending, "revoked": revoked}
+
+    # --- Sealing ---
+    def _write_batch(self, conn, batch):
+        """Stores one sealed batch of (certificate ID, document) and links its leaves."""
+        levels = build_levels([leaf_hash(document) for _, document in batch])
+        root = levels[-1][0]
+        batch_id = next_ref("BATCH")
+        conn.execute("INSERT INTO certificate_batches (id, root, signature, sealed, levels) VALUES (?, ?, ?, ?, ?)",
+                     (batch_id, root.hex(), sign_root(root, self._key), time.time(),
+                      json.dumps([[node.hex() for node in level] for level in levels])))
+        conn.executemany("UPDATE certificates SET batch = ?, leaf = ? WHERE id = ?",
+                         [(batch_id, leaf_index, certificate_id)
+                          for leaf_index, (certificate_id, _) in enumerate(batch)])
+
+    def _seal(self):
+        # Caller holds the lock
+        batch, self._pending, self._pending_since = self._pending, [], None
+        with self._connection() as conn:
+            self._write_batch(conn, batch)
+        self._lock.notify_all()
+
+    def _seal_orphans(self):
+        """Seals certificates left unsealed by a process that stopped before its next batch."""
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute("SELECT id, document FROM certificates WHERE batch IS NULL AND issued < ?"
+                                " ORDER BY issued", (time.time() - ORPHAN_AFTER_SECONDS,)).fetchall()
+            for start in range(0, len(rows), self.batch_size):
+                self._write_batch(conn, [(certificate_id, json.loads(document))
+                                         for certificate_id, document in rows[start:start + self.batch_size]])
+
+    def _run(self):
+        with self._lock:
+            while True:
+                if self._pending_since is None:
+                    self._lock.wait()
+                    continue
+                remaining = self._pending_since + self.max_delay - time.monotonic()
+                if remaining > 0:
+                    self._lock.wait(remaining)
+                elif self._pending:
+                    self._seal()
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_service():
+    """The process-wide certificate service."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = CertificateService()
+        return _service
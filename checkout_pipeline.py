@@ -0,0 +1,132 @@
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+# --- Checkout Pipeline (FR-EC-01) ---
+# Checkout is a small DAG of stages. Each stage declares the stages it needs;
+# any stage whose dependencies have finished is started straight away on a
+# shared thread pool, and "for each" stages fan out into one task per cart
+# item. A checkout therefore takes as long as its critical path rather than
+# the sum of its steps. If a stage fails, stages that depend on it are
+# skipped, and the failure is raised once everything already running is done.
+
+MAX_WORKERS = 32
+
+
+class PipelineError(Exception):
+    """A stage failed; `run` holds whatever did complete."""
+
+    def __init__(self, stage, error, run):
+        super().__init__(f"{stage} failed: {error}")
+        self.stage = stage
+        self.error = error
+        self.run = run
+
+
+class PipelineRun:
+    def __init__(self):
+        self.results = {}
+        self.timings = {}  # stage -> (start, end) in seconds from the start of the run
+        self.skipped = []
+        self.partial = {}  # for_each stage that did not finish -> results of the items that did
+        self.elapsed = 0.0
+
+    def timeline(self):
+        """Rows of stage, start, end and duration in ms, ordered by start."""
+        return [{"Stage": name, "Start (ms)": round(start * 1000), "End (ms)": round(end * 1000),
+                 "Duration (ms)": round((end - start) * 1000)}
+                for name, (start, end) in sorted(self.timings.items(), key=lambda item: item[1])]
+
+
+class Pipeline:
+    def __init__(self):
+        self._stages = {}
+
+    def stage(self, name, func, after=(), for_each=None):
+        """Adds a stage.
+
+        `func(results)` receives the results of finished stages; with
+        `for_each`, `func(results, item)` runs once per item, concurrently, and
+        the stage's result is the list of per-item results in item order.
+        """
+        missing = [dep for dep in after if dep not in self._stages]
+        if missing:
+            raise ValueError(f"Stage {name} depends on unknown stages: {', '.join(missing)}")
+        self._stages[name] = (func, tuple(after), for_each)
+        return self
+
+    def run(self, executor=None):
+        executor = executor or get_executor()
+        run = PipelineRun()
+        started = time.perf_counter()
+        pending = dict(self._stages)
+        running = {}  # future -> (stage, item index)
+        outstanding = {}  # stage -> [per-item results, remaining count]
+        failure = None
+
+        def launch(name):
+            func, _, for_each = pending.pop(name)
+            run.timings[name] = (time.perf_counter() - started, None)
+            items = list(for_each) if for_each is not None else None
+            if items is None:
+                running[executor.submit(func, dict(run.results))] = (name, None)
+                return
+            outstanding[name] = [[None] * len(items), len(items)]
+            if not items:
+                finish(name, [])
+            for index, item in enumerate(items):
+                running[executor.submit(func, dict(run.results), item)] = (name, index)
+
+        def finish(name, result):
+            run.results[name] = result
+            run.timings[name] = (run.timings[name][0], time.perf_counter() - started)
+            outstanding.pop(name, None)
+
+        def ready():
+            return [name for name, (_, after, _) in pending.items() if all(dep in run.results for dep in after)]
+
+        while True:
+            if failure is None:
+                for name in ready():
+                    launch(name)
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, index = running.pop(future)
+                error = future.exception()
+                if error is not None:
+                    if failure is None:
+                        failure = (name, error)
+                    run.timings[name] = (run.timings[name][0], time.perf_counter() - started)
+                    continue
+                if index is None:
+                    finish(name, future.result())
+                elif name in outstanding:
+                    slot = outstanding[name]
+                    slot[0][index] = future.result()
+                    slot[1] -= 1
+                    if slot[1] == 0:
+                        finish(name, slot[0])
+
+        run.skipped = list(pending)
+        for name, (results, _) in outstanding.items():
+            run.partial[name] = [result for result in results if result is not None]
+        run.elapsed = time.perf_counter() - started
+        if failure is not None:
+            raise PipelineError(failure[0], failure[1], run)
+        return run
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Thread pool shared by every checkout in the process; stages mostly wait on I/O."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="checkout")
+        return _executor
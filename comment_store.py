@@ -0,0 +1,149 @@
+import threading
+import time
+import zlib
+from itertools import count
+
+from metrics import record_cache
+
+
+# --- Public Comment Store (FR-CM-01) ---
+# Like counters are split across lock stripes keyed by comment ID, so a like
+# storm on one piece only contends on a single small lock instead of the whole
+# store. Each artwork keeps a small "top comments" list that is patched on
+# every like rather than re-sorted from the full comment set on every render.
+
+DEFAULT_STRIPES = 16
+DEFAULT_TOP_N = 10
+
+
+def _stripe_of(key, stripes):
+    return zlib.crc32(str(key).encode("utf-8")) % stripes
+
+
+class CommentStore:
+    """Thread-safe store for public comments and their like counts."""
+
+    def __init__(self, stripes=DEFAULT_STRIPES, top_n=DEFAULT_TOP_N):
+        self.stripes = stripes
+        self.top_n = top_n
+        self._ids = count(1)
+        self._id_lock = threading.Lock()
+
+        # Comment bodies are written once and never mutated, so a plain dict is
+        # enough; like counts live in the striped shards below.
+        self._comments = {}
+        self._by_artwork = {}
+        self._comments_lock = threading.Lock()
+
+        self._like_locks = [threading.Lock() for _ in range(stripes)]
+        self._like_shards = [{} for _ in range(stripes)]
+
+        # Per-artwork top-N cache: artwork -> list of [likes, comment_id],
+        # kept sorted by likes descending. Dirty artworks are rebuilt lazily.
+        self._top_locks = [threading.Lock() for _ in range(stripes)]
+        self._top = {}
+        self._dirty = set()
+
+    # --- Writes ---
+    def add_comment(self, artwork, user, text, likes=0):
+        with self._id_lock:
+            comment_id = next(self._ids)
+        comment = {"ID": comment_id, "Artwork": artwork, "User": user, "Comment": text, "Posted": time.time()}
+        with self._comments_lock:
+            self._comments[comment_id] = comment
+            self._by_artwork.setdefault(artwork, []).append(comment_id)
+
+        stripe = _stripe_of(comment_id, self.stripes)
+        with self._like_locks[stripe]:
+            self._like_shards[stripe][comment_id] = likes
+        self._update_top(artwork, comment_id, likes)
+        return comment_id
+
+    def like(self, comment_id, delta=1):
+        """Adds `delta` likes to a comment and returns its new like count."""
+        comment = self._comments.get(comment_id)
+        if comment is None:
+            raise KeyError(f"Unknown comment: {comment_id}")
+
+        stripe = _stripe_of(comment_id, self.stripes)
+        with self._like_locks[stripe]:
+            shard = self._like_shards[stripe]
+            likes = max(shard[comment_id] + delta, 0)
+            shard[comment_id] = likes
+
+        if delta >= 0:
+            self._update_top(comment["Artwork"], comment_id, likes)
+        else:
+            # An unlike can push a comment below one that is not cached; the
+            # incremental list can no longer be trusted, so rebuild on read.
+            self._mark_dirty(comment["Artwork"])
+        return likes
+
+    def unlike(self, comment_id):
+        return self.like(comment_id, delta=-1)
+
+    # --- Reads ---
+    def likes(self, comment_id):
+        stripe = _stripe_of(comment_id, self.stripes)
+        with self._like_locks[stripe]:
+            return self._like_shards[stripe].get(comment_id, 0)
+
+    def comments_for(self, artwork):
+        """All comments on an artwork in posting order, with live like counts."""
+        with self._comments_lock:
+            ids = list(self._by_artwork.get(artwork, ()))
+        return [dict(self._comments[cid], Likes=self.likes(cid)) for cid in ids]
+
+    def top_comments(self, artwork, n=None):
+        """The `n` most liked comments on an artwork, served from the cache."""
+        n = self.top_n if n is None else min(n, self.top_n)
+        stripe = _stripe_of(artwork, self.stripes)
+        with self._top_locks[stripe]:
+            record_cache("top_comments", hit=artwork not in self._dirty)
+            if artwork in self._dirty:
+                self._rebuild_top(artwork)
+            entries = [tuple(entry) for entry in self._top.get(artwork, ())[:n]]
+        return [dict(self._comments[cid], Likes=likes) for likes, cid in entries]
+
+    def columns(self, artwork, n=None):
+        """Top comments as User/Comment/Likes columns, ready for a DataFrame."""
+        top = self.top_comments(artwork, n)
+        return {
+            "User": [c["User"] for c in top],
+            "Comment": [c["Comment"] for c in top],
+            "Likes": [c["Likes"] for c in top],
+        }
+
+    # --- Top-N maintenance ---
+    def _update_top(self, artwork, comment_id, likes):
+        stripe = _stripe_of(artwork, self.stripes)
+        with self._top_locks[stripe]:
+            if artwork in self._dirty:
+                return
+            top = self._top.setdefault(artwork, [])
+            for entry in top:
+                if entry[1] == comment_id:
+                    # Likes only grow on this path; max() keeps a late-arriving
+                    # update from a racing thread from rolling the count back.
+                    entry[0] = max(entry[0], likes)
+                    break
+            else:
+                if len(top) >= self.top_n and likes <= top[-1][0]:
+                    return
+                top.append([likes, comment_id])
+            # The list holds at most top_n entries, so this sort is effectively O(1).
+            top.sort(key=lambda entry: (-entry[0], entry[1]))
+            del top[self.top_n:]
+
+    def _mark_dirty(self, artwork):
+        stripe = _stripe_of(artwork, self.stripes)
+        with self._top_locks[stripe]:
+            self._dirty.add(artwork)
+
+    def _rebuild_top(self, artwork):
+        # Caller holds the artwork's top lock.
+        with self._comments_lock:
+            ids = list(self._by_artwork.get(artwork, ()))
+        top = sorted(([self.likes(cid), cid] for cid in ids), key=lambda entry: (-entry[0], entry[1]))
+        self._top[artwork] = top[:self.top_n]
+        self._dirty.discard(artwork)
@@ -0,0 +1,253 @@
+import bisect
+import itertools
+import threading
+from collections import OrderedDict
+
+from metrics import record_cache
+
+
+# --- Facet Counts (FR-DS-02) ---
+# The filter bar labels every option with the number of results it would
+# give, e.g. "Abstract (1,204)", and shows a price histogram of the current
+# results. One pass over the catalog builds a bitmap (a Python int, one bit
+# per listing) for each facet value, each flag and each price bin. After that
+# a count is a single AND plus a popcount, both done in C a machine word at a
+# time, so a rerun costs no scan of the listings. Counts are disjunctive:
+# each facet is counted against every filter except its own, so choosing
+# "Modern" still shows how many results the other categories would give.
+# Results are cached per filter state.
+#
+# Sort orders are permutations of the listings, presorted once per catalog
+# version. A sorted page walks the permutation and keeps the rows whose bit
+# is set in the filter result, stopping as soon as the page is full, so
+# the first pages never need a sort. Ascending and descending orders on one
+# field share a permutation, walked from opposite ends.
+
+PRICE_BINS = 12
+QUERY_CACHE_SIZE = 256
+
+# Label -> (field, descending); None keeps catalog order
+SORT_ORDERS = {
+    "Featured": None,
+    "Price: Low to High": ("Price", False),
+    "Price: High to Low": ("Price", True),
+    "Newest": ("Listed", True),
+    "Most Popular": ("Popularity", True),
+}
+
+
+def _bitmap(positions, size):
+    """Bitmap with the given bit positions set, built in one pass."""
+    bits = bytearray((size + 7) // 8)
+    for position in positions:
+        bits[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(bits, "little")
+
+
+def _positions(mask):
+    """Set bit positions of `mask`, in ascending order."""
+    bits = bin(mask)[:1:-1]
+    positions = []
+    index = bits.find("1")
+    while index != -1:
+        positions.append(index)
+        index = bits.find("1", index + 1)
+    return positions
+
+
+class FacetResult:
+    def __init__(self, mask, ids, counts, flags, histogram):
+        self.mask = mask  # Bitmap of matching listing positions
+        self.ids = ids  # Matching listing IDs, in listing order
+        self.counts = counts  # field -> {value: count}
+        self.flags = flags  # flag -> count
+        self.histogram = histogram  # [(low, high, count)] per price bin
+
+    def label(self, field, value, all_label="All"):
+        """Option label with its count, for a selectbox's format_func."""
+        if value == all_label:
+            return f"{value} ({sum(self.counts[field].values()):,})"
+        return f"{value} ({self.counts[field].get(value, 0):,})"
+
+
+class FacetIndex:
+    """Bitmaps over one catalog version; listings are not kept."""
+
+    def __init__(self, listings, fields, flags=(), price_field="Price", text_fields=("Title", "Artist"),
+                 price_bins=PRICE_BINS, sort_orders=SORT_ORDERS):
+        self.fields = tuple(fields)
+        values = {field: {} for field in self.fields}
+        flagged = {flag: [] for flag in flags}
+        self.sort_orders = dict(sort_orders)
+        sort_keys = {order[0]: [] for order in self.sort_orders.values() if order is not None}
+        sorted_fields = set()
+        self._ids = []
+        self._text = []
+        prices = []
+        for position, listing in enumerate(listings):
+            self._ids.append(listing["ID"])
+            self._text.append(" ".join(str(listing.get(field, "")) for field in text_fields).lower())
+            prices.append(listing[price_field])
+            for field in self.fields:
+                values[field].setdefault(listing.get(field), []).append(position)
+            for flag in flagged:
+                if listing.get(flag):
+                    flagged[flag].append(position)
+            for field, keys in sort_keys.items():
+                keys.append(listing.get(field) or 0)
+                if field in listing:
+                    sorted_fields.add(field)
+        size = len(self._ids)
+        self._values = {field: {value: _bitmap(positions, size) for value, positions in field_values.items()}
+                        for field, field_values in values.items()}
+        self._flags = {flag: _bitmap(positions, size) for flag, positions in flagged.items()}
+        self._all = (1 << size) - 1
+
+        # Equal-width price bins; each keeps its bitmap and its rows sorted by
+        # price, so a slider range is whole bins plus a bisect in the two edge bins.
+        width = int(max(prices, default=0) // price_bins) + 1
+        self._edges = [width * i for i in range(price_bins + 1)]
+        bin_rows = [[] for _ in range(price_bins)]
+        for position, price in enumerate(prices):
+            bin_rows[min(int(price // width), price_bins - 1)].append((price, position))
+        self._bins = [_bitmap((position for _, position in rows), size) for rows in bin_rows]
+        self._bin_rows = [sorted(rows) for rows in bin_rows]
+
+        # One ascending permutation per sort field; ties keep listing order.
+        # Orders on a field no listing has are dropped.
+        self._permutations = {field: sorted(range(size), key=keys.__getitem__)
+                              for field, keys in sort_keys.items() if field in sorted_fields}
+        self.sort_orders = {label: order for label, order in self.sort_orders.items()
+                            if order is None or order[0] in self._permutations}
+
+        self._queries = OrderedDict()
+        self._searches = OrderedDict()
+        self._lock = threading.Lock()
+
+    def values(self, field):
+        return sorted(value for value in self._values[field] if value is not None)
+
+    def __len__(self):
+        return len(self._ids)
+
+    # --- Masks ---
+    def _search_mask(self, search):
+        search = search.strip().lower()
+        if not search:
+            return self._all
+        mask = self._searches.get(search)
+        if mask is None:
+            mask = _bitmap((position for position, text in enumerate(self._text) if search in text), len(self._ids))
+            self._searches[search] = mask
+            if len(self._searches) > QUERY_CACHE_SIZE:
+                self._searches.popitem(last=False)
+        return mask
+
+    def _price_mask(self, low, high):
+        mask = 0
+        for index, rows in enumerate(self._bin_rows):
+            bin_low, bin_high = self._edges[index], self._edges[index + 1]
+            if high < bin_low or low >= bin_high:
+                continue
+            if low <= bin_low and bin_high <= high:
+                mask |= self._bins[index]
+                continue
+            start = bisect.bisect_left(rows, (low, -1))
+            end = bisect.bisect_right(rows, (high, len(self._ids)))
+            mask |= _bitmap((position for _, position in rows[start:end]), len(self._ids))
+        return mask
+
+    # --- Queries ---
+    def query(self, search="", price=None, flags=(), **selected):
+        """Results and counts for one filter state.
+
+        `selected` maps a facet field to one value or a collection of values;
+        None or an empty collection leaves that field unfiltered.
+        """
+        selected = {field: value for field, value in selected.items() if value not in (None, (), [])}
+        key = (search.strip().lower(), tuple(price) if price else None, tuple(sorted(flags)),
+               tuple(sorted((field, tuple(sorted(value)) if isinstance(value, (list, tuple, set, frozenset))
+                             else (value,)) for field, value in selected.items())))
+        with self._lock:
+            result = self._queries.get(key)
+            record_cache("facet_query", result is not None)
+            if result is None:
+                result = self._run(key)
+                self._queries[key] = result
+                if len(self._queries) > QUERY_CACHE_SIZE:
+                    self._queries.popitem(last=False)
+            else:
+                self._queries.move_to_end(key)
+            return result
+
+    def _run(self, key):
+        search, price, flags, selected = key
+        # One mask per constraint; each facet is counted against all the others
+        constraints = {"search": self._search_mask(search)}
+        if price:
+            constraints["price"] = self._price_mask(*price)
+        for flag in flags:
+            constraints[f"flag:{flag}"] = self._flags[flag]
+        for field, values in selected:
+            mask = 0
+            for value in values:
+                mask |= self._values[field].get(value, 0)
+            constraints[field] = mask
+
+        def excluding(name):
+            mask = self._all
+            for other, other_mask in constraints.items():
+                if other != name:
+                    mask &= other_mask
+            return mask
+
+        counts = {}
+        for field in self.fields:
+            base = excluding(field)
+            counts[field] = {value: (bitmap & base).bit_count() for value, bitmap in self._values[field].items()
+                             if value is not None}
+        flag_counts = {flag: (bitmap & excluding(f"flag:{flag}")).bit_count() for flag, bitmap in self._flags.items()}
+        base = excluding("price")
+        histogram = [(self._edges[i], self._edges[i + 1], (bitmap & base).bit_count())
+                     for i, bitmap in enumerate(self._bins)]
+        mask = excluding(None)
+        ids = [self._ids[position] for position in _positions(mask)]
+        return FacetResult(mask, ids, counts, flag_counts, histogram)
+
+    def page(self, result, order=None, number=1, size=12):
+        """IDs on page `number` of `result`, in the sort order labelled `order`."""
+        start = (number - 1) * size
+        sort = self.sort_orders.get(order)
+        if sort is None:
+            return result.ids[start:start + size]
+        field, descending = sort
+        permutation = self._permutations[field]
+        walk = reversed(permutation) if descending else iter(permutation)
+        if len(result.ids) == len(self._ids):
+            positions = itertools.islice(walk, start, start + size)
+        else:
+            bits = result.mask.to_bytes((len(self._ids) + 7) // 8, "little")
+            matches = (position for position in walk if bits[position >> 3] >> (position & 7) & 1)
+            positions = itertools.islice(matches, start, start + size)
+        return [self._ids[position] for position in positions]
+
+
+class FacetCache:
+    """One FacetIndex per catalog version, rebuilt only when the version changes."""
+
+    def __init__(self, name, **options):
+        self.name = name
+        self._options = options
+        self._lock = threading.Lock()
+        self._version = None
+        self._index = None
+
+    def get(self, version, load_listings):
+        """Returns the FacetIndex; `load_listings` is only called on a miss."""
+        with self._lock:
+            hit = self._version == version
+            record_cache(self.name, hit)
+            if not hit:
+                self._index = FacetIndex(load_listings(), **self._options)
+                self._version = version
+            return self._index
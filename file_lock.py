@@ -0,0 +1,64 @@
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+# --- Cross-Process File Locks (NF-SR-02) ---
+# Several app processes on one host share files such as the asset manifest
+# and the settlement batches. An advisory lock on a side file serialises
+# their read-modify-write cycles. The operating system drops the lock when
+# its holder exits, so a crashed process never leaves it stuck.
+
+
+class FileLock:
+    """Exclusive lock on `path`, usable as a context manager; also excludes threads."""
+
+    def __init__(self, path):
+        self.path = path
+        self._thread_lock = threading.Lock()
+        self._fh = None
+
+    def acquire(self, blocking=True):
+        """Takes the lock; returns False if `blocking` is False and it is held elsewhere."""
+        if not self._thread_lock.acquire(blocking):
+            return False
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        fh = open(self.path, "a+b")
+        try:
+            if fcntl is not None:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            else:
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+        except OSError:
+            fh.close()
+            self._thread_lock.release()
+            if blocking:
+                raise
+            return False
+        self._fh = fh
+        return True
+
+    def release(self):
+        fh, self._fh = self._fh, None
+        if fcntl is not None:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+        else:
+            fh.seek(0)
+            msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+        fh.close()
+        self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
@@ -0,0 +1,205 @@
+import atexit
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+from session_backend import SESSION_DB
+
+
+# --- Transaction Reference Generator (FR-EC-01) ---
+# 64-bit, time-ordered IDs built from a millisecond timestamp, a worker ID
+# and a per-millisecond sequence, so every process can issue references
+# without coordinating and later IDs always sort after earlier ones. Refs are
+# the ID in fixed-width Crockford base32 behind a short prefix, so they sort
+# the same way as strings.
+#
+#   | 41 bits: ms since EPOCH_MS | 10 bits: worker | 12 bits: sequence |
+#
+# Uniqueness rests on no two live processes sharing a worker ID. Unless
+# RENAISSANCE_WORKER_ID pins one, each process leases the lowest free ID
+# from a table in the shared SQLite file and renews the lease in the
+# background. A crashed process's ID becomes free again once its lease
+# expires, which is long after its last ID was issued.
+
+EPOCH_MS = 1_735_689_600_000  # 2025-01-01T00:00:00Z
+WORKER_BITS = 10
+SEQUENCE_BITS = 12
+MAX_WORKER = (1 << WORKER_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+
+CROCKFORD = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+REF_WIDTH = 13  # 13 base32 digits hold 65 bits
+
+WORKER_DB = os.environ.get("RENAISSANCE_WORKER_DB", SESSION_DB)
+LEASE_SECONDS = 60
+
+
+def configured_worker_id():
+    """RENAISSANCE_WORKER_ID as an int, or None when it is not set."""
+    configured = os.environ.get("RENAISSANCE_WORKER_ID")
+    if configured is None:
+        return None
+    worker_id = int(configured)
+    if not 0 <= worker_id <= MAX_WORKER:
+        raise ValueError(f"RENAISSANCE_WORKER_ID must be between 0 and {MAX_WORKER}, got {configured}.")
+    return worker_id
+
+
+class WorkerLease:
+    """A worker ID held in the shared SQLite file until released or expired."""
+
+    def __init__(self, path=WORKER_DB, ttl=LEASE_SECONDS):
+        self.path = path
+        self.ttl = ttl
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex}"
+        self.worker_id = None
+        self._pid = os.getpid()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("CREATE TABLE IF NOT EXISTS worker_leases ("
+                     "worker_id INTEGER PRIMARY KEY, holder TEXT NOT NULL, expires REAL NOT NULL)")
+        return conn
+
+    def acquire(self):
+        """Takes the lowest free or expired worker ID; raises RuntimeError when all are held."""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            now = time.time()
+            held = {row[0] for row in conn.execute("SELECT worker_id FROM worker_leases WHERE expires > ?", (now,))}
+            worker_id = next((w for w in range(MAX_WORKER + 1) if w not in held), None)
+            if worker_id is None:
+                raise RuntimeError(f"All {MAX_WORKER + 1} worker IDs are leased.")
+            conn.execute("INSERT OR REPLACE INTO worker_leases (worker_id, holder, expires) VALUES (?, ?, ?)",
+                         (worker_id, self.holder, now + self.ttl))
+            conn.execute("COMMIT")
+        finally:
+            conn.close()  # Rolls back if the commit was not reached
+        self.worker_id = worker_id
+        return worker_id
+
+    def renew(self):
+        """Extends the lease; False if it lapsed and another process took the ID."""
+        conn = self._connect()
+        try:
+            cursor = conn.execute("UPDATE worker_leases SET expires = ? WHERE worker_id = ? AND holder = ?",
+                                  (time.time() + self.ttl, self.worker_id, self.holder))
+        finally:
+            conn.close()
+        return cursor.rowcount == 1
+
+    def release(self):
+        if self.worker_id is None or os.getpid() != self._pid:
+            return  # A forked child inherits this handler but not the lease
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM worker_leases WHERE worker_id = ? AND holder = ?", (self.worker_id, self.holder))
+        finally:
+            conn.close()
+
+
+def encode(value):
+    digits = []
+    for _ in range(REF_WIDTH):
+        value, digit = divmod(value, 32)
+        digits.append(CROCKFORD[digit])
+    return "".join(reversed(digits))
+
+
+def decode(text):
+    value = 0
+    for char in text.upper():
+        value = value * 32 + CROCKFORD.index(char)
+    return value
+
+
+def parse(id_value):
+    """(unix ms, worker, sequence) for an ID."""
+    return ((id_value >> (WORKER_BITS + SEQUENCE_BITS)) + EPOCH_MS,
+            (id_value >> SEQUENCE_BITS) & MAX_WORKER,
+            id_value & MAX_SEQUENCE)
+
+
+class IdGenerator:
+    """Thread-safe k-sortable ID source for one worker."""
+
+    def __init__(self, worker_id=None, lease=None):
+        """Uses `worker_id`, else RENAISSANCE_WORKER_ID, else an ID leased via `lease`."""
+        if worker_id is None:
+            worker_id = configured_worker_id()
+        self._lease = None
+        if worker_id is None:
+            self._lease = lease or WorkerLease()
+            worker_id = self._lease.acquire()
+            atexit.register(self._lease.release)
+            threading.Thread(target=self._renew_lease, name="worker-lease", daemon=True).start()
+        if not 0 <= worker_id <= MAX_WORKER:
+            raise ValueError(f"Worker ID must be between 0 and {MAX_WORKER}.")
+        self.worker_id = worker_id
+        self._lock = threading.Lock()
+        self._last_ms = 0
+        self._sequence = 0
+
+    def _renew_lease(self):
+        lease = self._lease
+        while True:
+            time.sleep(lease.ttl / 3)
+            try:
+                if not lease.renew():
+                    # Stalled past the lease and the ID was handed out again
+                    with self._lock:
+                        self.worker_id = lease.acquire()
+            except (sqlite3.Error, RuntimeError):
+                continue  # Retried on the next round, well inside the lease
+
+    def next_id(self):
+        with self._lock:
+            now_ms = time.time_ns() // 1_000_000 - EPOCH_MS
+            if now_ms > self._last_ms:
+                self._last_ms = now_ms
+                self._sequence = 0
+            elif self._sequence < MAX_SEQUENCE:
+                self._sequence += 1
+            else:
+                # Sequence exhausted (or the clock stepped back): borrow the next
+                # millisecond instead of waiting, so IDs stay unique and ordered.
+                self._last_ms += 1
+                self._sequence = 0
+            return (self._last_ms << (WORKER_BITS + SEQUENCE_BITS)) | (self.worker_id << SEQUENCE_BITS) | self._sequence
+
+    def next_ref(self, prefix):
+        return f"{prefix}-{encode(self.next_id())}"
+
+
+_generator = None
+_generator_lock = threading.Lock()
+
+
+def get_generator():
+    """The process-wide generator."""
+    global _generator
+    with _generator_lock:
+        if _generator is None:
+            _generator = IdGenerator()
+        return _generator
+
+
+def _reset_after_fork():
+    # A forked worker must not share its parent's worker ID and sequence
+    global _generator
+    _generator = None
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def next_id():
+    return get_generator().next_id()
+
+
+def next_ref(prefix):
+    return get_generator().next_ref(prefix)
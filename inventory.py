@@ -0,0 +1,251 @@
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from session_backend import current_session_id
+
+
+# --- Inventory Reservations (FR-EC-01) ---
+# Every artwork is a unique piece. Adding it to a cart takes a time-limited
+# hold, and purchase is a compare-and-set against the version recorded in
+# that hold, so two sessions can never both buy the same piece. Holds and
+# sales live in a SQLite file of their own, shared by every app process on
+# the host, so workers behind the load balancer see one inventory and a
+# restart never makes a sold piece available again. The file is separate
+# from the session store, so a drop never queues behind session flushes.
+# Taking a hold is a single autocommit statement that only matches a free,
+# lapsed or already-own row, so the losers of a race fail fast and nothing
+# holds the write lock for longer than that one statement. Only purchase
+# and restore, which must change several pieces at once or none, open a
+# short transaction. Expiry is a timestamp compared on every read and
+# write, so lapsed holds need no sweeper.
+
+INVENTORY_DB = os.environ.get("RENAISSANCE_INVENTORY_DB", "inventory.db")
+HOLD_SECONDS = 600
+
+AVAILABLE = "Available"
+RESERVED = "Reserved"
+SOLD = "Sold"
+
+
+class InventoryError(Exception):
+    """Base class for reservation failures."""
+
+
+class ItemUnavailable(InventoryError):
+    """Another buyer holds or has bought the item."""
+
+
+class ReservationExpired(InventoryError):
+    """The hold lapsed or the item changed since it was taken."""
+
+
+class Inventory:
+    """Holds and sales for unique items; any ID not seen yet is available."""
+
+    def __init__(self, path=INVENTORY_DB, hold_seconds=HOLD_SECONDS):
+        self.path = path
+        self.hold_seconds = hold_seconds
+        self._local = threading.local()
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS inventory ("
+            " item_id TEXT PRIMARY KEY, version INTEGER NOT NULL, state TEXT NOT NULL,"
+            " holder TEXT, token TEXT, expires REAL NOT NULL) WITHOUT ROWID"
+        )
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit; multi-statement changes open their own transaction
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _row(self, conn, item_id):
+        return conn.execute("SELECT state, holder, token, version, expires FROM inventory WHERE item_id = ?",
+                            (str(item_id),)).fetchone()
+
+    def reserve(self, item_id, holder):
+        """Takes or extends a hold; returns the reservation to purchase with."""
+        now = time.time()
+        conn = self._connection()
+        # An unseen item is inserted as held; an existing row is only taken over
+        # when it is free or lapsed. A live hold by `holder` keeps its token.
+        row = conn.execute(
+            "INSERT INTO inventory VALUES (:item, 1, :reserved, :holder, :token, :expires)"
+            " ON CONFLICT (item_id) DO UPDATE SET state = :reserved, holder = :holder, expires = :expires,"
+            " version = version + 1,"
+            " token = CASE WHEN state = :reserved AND holder = :holder AND expires > :now THEN token ELSE :token END"
+            " WHERE state = :available OR (state = :reserved AND (expires <= :now OR holder = :holder))"
+            " RETURNING token, version, expires",
+            {"reserved": RESERVED, "available": AVAILABLE, "holder": holder, "expires": now + self.hold_seconds,
+             "now": now, "token": uuid.uuid4().hex, "item": str(item_id)},
+        ).fetchone()
+        if row is None:
+            raise ItemUnavailable(f"Item {item_id} is {self.state(item_id).lower()}.")
+        token, version, expires = row
+        return {"item": item_id, "token": token, "version": version, "expires": expires}
+
+    def release(self, reservation):
+        self._connection().execute(
+            "UPDATE inventory SET state = ?, holder = NULL, token = NULL, version = version + 1"
+            " WHERE item_id = ? AND state = ? AND token = ?",
+            (AVAILABLE, str(reservation["item"]), RESERVED, reservation["token"]),
+        )
+
+    def purchase(self, reservations, buyer):
+        """Marks every reserved item sold, or none of them.
+
+        Each reservation must still match its item's version and be live;
+        otherwise ReservationExpired names the first item that moved on.
+        """
+        now = time.time()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for reservation in reservations:
+                changed = conn.execute(
+                    "UPDATE inventory SET state = ?, holder = ?, token = NULL, version = version + 1"
+                    " WHERE item_id = ? AND state = ? AND version = ? AND token = ? AND expires > ?",
+                    (SOLD, buyer, str(reservation["item"]), RESERVED, reservation["version"], reservation["token"], now),
+                ).rowcount
+                if not changed:
+                    raise ReservationExpired(f"The hold on item {reservation['item']} is no longer valid.")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def restore(self, items, buyer):
+        """Undoes a purchase whose payment did not stand: each item sold to `buyer`
+        becomes their hold again. Returns the new reservations."""
+        now = time.time()
+        reservations = []
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for item_id in items:
+                token = uuid.uuid4().hex
+                changed = conn.execute(
+                    "UPDATE inventory SET state = ?, token = ?, expires = ?, version = version + 1"
+                    " WHERE item_id = ? AND state = ? AND holder = ?",
+                    (RESERVED, token, now + self.hold_seconds, str(item_id), SOLD, buyer),
+                ).rowcount
+                if changed:
+                    _, _, _, version, expires = self._row(conn, item_id)
+                    reservations.append({"item": item_id, "token": token, "version": version, "expires": expires})
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return reservations
+
+    def state(self, item_id, holder=None):
+        """AVAILABLE, SOLD, or RESERVED (AVAILABLE to `holder` if it is their own hold)."""
+        row = self._row(self._connection(), item_id)
+        if row is None:
+            return AVAILABLE
+        state, item_holder, _, _, expires = row
+        if state == RESERVED and (expires <= time.time() or (holder is not None and item_holder == holder)):
+            return AVAILABLE
+        return state
+
+    def stats(self):
+        counts = {AVAILABLE: 0, RESERVED: 0, SOLD: 0}
+        rows = self._connection().execute(
+            "SELECT CASE WHEN state = ? AND expires <= ? THEN ? ELSE state END, COUNT(*) FROM inventory GROUP BY 1",
+            (RESERVED, time.time(), AVAILABLE),
+        )
+        for state, count in rows:
+            counts[state] += count
+        return counts
+
+
+_inventory = None
+_inventory_lock = threading.Lock()
+
+
+def get_inventory():
+    """The process's handle on the shared inventory."""
+    global _inventory
+    with _inventory_lock:
+        if _inventory is None:
+            _inventory = Inventory()
+        return _inventory
+
+
+# --- Streamlit helpers ---
+# Holds live in the "holds" session key (item ID as a string -> reservation),
+# which the demos persist alongside the cart.
+def _holds():
+    import streamlit as st
+
+    return st.session_state.setdefault("holds", {})
+
+
+def reserve_cart_item(item):
+    """Reserves the item for this session and adds it to the cart; raises ItemUnavailable."""
+    import streamlit as st
+
+    _holds()[str(item["ID"])] = get_inventory().reserve(item["ID"], current_session_id())
+    if item not in st.session_state.cart:
+        st.session_state.cart.append(item)
+
+
+def remove_from_cart(item):
+    import streamlit as st
+
+    reservation = _holds().pop(str(item["ID"]), None)
+    if reservation is not None:
+        get_inventory().release(reservation)
+    st.session_state.cart.remove(item)
+
+
+def hold_remaining(item):
+    """Seconds left on this session's hold for the item, 0 if it has lapsed."""
+    reservation = _holds().get(str(item["ID"]))
+    return max(reservation["expires"] - time.time(), 0) if reservation else 0
+
+
+def refresh_holds(cart):
+    """Extends this session's holds before payment; re-takes lapsed ones if still free."""
+    holds = _holds()
+    inventory = get_inventory()
+    holder = current_session_id()
+    for item in cart:
+        try:
+            holds[str(item["ID"])] = inventory.reserve(item["ID"], holder)
+        except ItemUnavailable:
+            raise ItemUnavailable(f"{item['Title']} has been taken by another collector.") from None
+
+
+def cart_reservations(cart):
+    """This session's reservations for the cart, for Inventory.purchase off the script thread."""
+    holds = _holds()
+    missing = [item["Title"] for item in cart if str(item["ID"]) not in holds]
+    if missing:
+        raise ReservationExpired(f"{', '.join(missing)} is not reserved for you.")
+    return [holds[str(item["ID"])] for item in cart]
+
+
+def restore_holds(cart):
+    """Turns this session's purchase of the cart back into holds, after a failed payment."""
+    holds = _holds()
+    for reservation in get_inventory().restore([item["ID"] for item in cart], current_session_id()):
+        holds[str(reservation["item"])] = reservation
+
+
+def clear_holds(cart):
+    holds = _holds()
+    for item in cart:
+        holds.pop(str(item["ID"]), None)
+
+
+def purchase_cart(cart):
+    """Commits the held items as sold to this session; raises InventoryError."""
+    get_inventory().purchase(cart_reservations(cart), current_session_id())
+    clear_holds(cart)
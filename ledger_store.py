@@ -0,0 +1,223 @@
+import csv
+import datetime
+import io
+import os
+import sqlite3
+import threading
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional; exports then offer CSV only
+    pa = pq = None
+
+
+# --- Transaction Ledger Store (FR-EC-01, NF-SR-02) ---
+# Settled payments are appended to a SQLite table indexed by account and
+# date, alongside one sale line per artwork sold (or refunded) for artist
+# settlement. Reads are keyset-paginated in fixed-size chunks with the date
+# range applied in the query, so an export walks years of history holding
+# one chunk at a time and never scans rows outside the requested range.
+
+LEDGER_DB = os.environ.get("RENAISSANCE_LEDGER_DB", "ledger.db")
+LEDGER_COLUMNS = ("ref", "date", "total", "subtotal", "vat", "status")
+ENTRY_COLUMNS = LEDGER_COLUMNS + ("invoice",)  # Exports keep LEDGER_COLUMNS; invoices also need the number
+SALE_LINE_COLUMNS = ("date", "ref", "artist", "tier", "studio", "studio_pct", "amount", "kind")
+SALE_KINDS = ("sale", "refund")
+EXPORT_CHUNK_ROWS = 10_000
+EXPORT_FORMATS = ("csv", "parquet") if pq is not None else ("csv",)
+
+
+class LedgerStore:
+    def __init__(self, path=LEDGER_DB):
+        self.path = path
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS ledger ("
+                " seq INTEGER PRIMARY KEY AUTOINCREMENT, account TEXT NOT NULL,"
+                " ref TEXT NOT NULL, date TEXT NOT NULL, total REAL NOT NULL,"
+                " subtotal REAL NOT NULL, vat REAL NOT NULL, status TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ledger_account_date ON ledger (account, date, seq)")
+            if "invoice" not in [row[1] for row in conn.execute("PRAGMA table_info(ledger)")]:
+                try:
+                    conn.execute("ALTER TABLE ledger ADD COLUMN invoice TEXT")
+                except sqlite3.OperationalError:
+                    pass  # Another process added it first
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sale_lines ("
+                " seq INTEGER PRIMARY KEY AUTOINCREMENT, date TEXT NOT NULL, ref TEXT NOT NULL,"
+                " artist TEXT NOT NULL, tier TEXT, studio TEXT, studio_pct REAL NOT NULL DEFAULT 0,"
+                " amount REAL NOT NULL, kind TEXT NOT NULL CHECK (kind IN ('sale', 'refund')))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS sale_lines_date ON sale_lines (date, seq)")
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # --- Writes ---
+    def append(self, account, entry):
+        self.append_many(account, [entry])
+
+    def append_many(self, account, entries):
+        with self._connection() as conn:
+            conn.executemany(
+                "INSERT INTO ledger (account, ref, date, total, subtotal, vat, status, invoice)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(account, *(entry[column] for column in LEDGER_COLUMNS), entry.get("invoice")) for entry in entries],
+            )
+
+    def append_lines(self, lines):
+        """Records sale/refund lines; `tier`, `studio` and `studio_pct` are optional."""
+        rows = [(line["date"], line["ref"], line["artist"], line.get("tier"), line.get("studio"),
+                 line.get("studio_pct", 0), line["amount"], line.get("kind", "sale")) for line in lines]
+        with self._connection() as conn:
+            conn.executemany(
+                f"INSERT INTO sale_lines ({', '.join(SALE_LINE_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def backfill(self, account, entries):
+        """Imports a ledger kept elsewhere (e.g. session state) if the account has no rows yet."""
+        if entries and not self.count(account):
+            self.append_many(account, entries)
+
+    # --- Reads ---
+    @staticmethod
+    def _range(start, end):
+        # Dates are stored as "YYYY-MM-DD HH:MM", so ISO bounds compare as strings
+        clauses, params = [], []
+        if start:
+            clauses.append("date >= ?")
+            params.append(start)
+        if end:
+            clauses.append("date < ?")
+            params.append(end)
+        return "".join(f" AND {clause}" for clause in clauses), params
+
+    def count(self, account, start=None, end=None):
+        where, params = self._range(start, end)
+        return self._connection().execute(
+            f"SELECT COUNT(*) FROM ledger WHERE account = ?{where}", [account, *params]).fetchone()[0]
+
+    def totals(self, account):
+        """(transactions, total, VAT, first date) for the account's whole ledger."""
+        return self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(total), 0), COALESCE(SUM(vat), 0), MIN(date) FROM ledger WHERE account = ?",
+            (account,)).fetchone()
+
+    def first_line_date(self):
+        """Date of the earliest sale line, or None if there are none."""
+        first, = self._connection().execute("SELECT MIN(date) FROM sale_lines").fetchone()
+        return datetime.date.fromisoformat(first[:10]) if first else None
+
+    def months(self, account):
+        """Distinct YYYY-MM months with transactions, newest first."""
+        return [row[0] for row in self._connection().execute(
+            "SELECT DISTINCT substr(date, 1, 7) FROM ledger WHERE account = ? ORDER BY 1 DESC", (account,))]
+
+    def iter_chunks(self, account, start=None, end=None, chunk_size=EXPORT_CHUNK_ROWS, columns=LEDGER_COLUMNS):
+        """Yields lists of `columns` tuples in date order; `end` is exclusive."""
+        where, params = self._range(start, end)
+        query = (f"SELECT seq, date, {', '.join(columns)} FROM ledger WHERE account = ?{where}"
+                 " AND (date, seq) > (?, ?) ORDER BY date, seq LIMIT ?")
+        last = ("", 0)
+        while True:
+            rows = self._connection().execute(query, [account, *params, *last, chunk_size]).fetchall()
+            if not rows:
+                return
+            last = (rows[-1][1], rows[-1][0])
+            yield [row[2:] for row in rows]
+            if len(rows) < chunk_size:
+                return
+
+    def iter_entries(self, account, start=None, end=None, chunk_size=EXPORT_CHUNK_ROWS):
+        """Yields ledger entries as dicts of ENTRY_COLUMNS, fetched in chunks; `end` is exclusive."""
+        for chunk in self.iter_chunks(account, start, end, chunk_size, ENTRY_COLUMNS):
+            for row in chunk:
+                yield dict(zip(ENTRY_COLUMNS, row))
+
+    def iter_lines(self, start=None, end=None, chunk_size=EXPORT_CHUNK_ROWS):
+        """Yields sale lines one at a time as dicts, fetched in chunks; `end` is exclusive."""
+        where, params = self._range(start, end)
+        query = (f"SELECT seq, {', '.join(SALE_LINE_COLUMNS)} FROM sale_lines WHERE 1 = 1{where}"
+                 " AND (date, seq) > (?, ?) ORDER BY date, seq LIMIT ?")
+        last = ("", 0)
+        while True:
+            rows = self._connection().execute(query, [*params, *last, chunk_size]).fetchall()
+            for row in rows:
+                yield dict(zip(SALE_LINE_COLUMNS, row[1:]))
+            if len(rows) < chunk_size:
+                return
+            last = (rows[-1][1], rows[-1][0])
+
+
+# --- Export ---
+def iter_csv(chunks):
+    """CSV bytes, one piece per chunk, starting with the header row."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(LEDGER_COLUMNS)
+    for chunk in chunks:
+        writer.writerows(chunk)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _Drain(io.RawIOBase):
+    """Write-only sink whose contents are handed out and discarded as they arrive."""
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def take(self):
+        data, self._parts = b"".join(self._parts), []
+        return data
+
+
+def iter_parquet(chunks):
+    """Parquet bytes with one row group per chunk; requires pyarrow."""
+    if pq is None:
+        raise RuntimeError("Parquet export requires pyarrow.")
+    schema = pa.schema([("ref", pa.string()), ("date", pa.string()), ("total", pa.float64()),
+                        ("subtotal", pa.float64()), ("vat", pa.float64()), ("status", pa.string())])
+    sink = _Drain()
+    with pq.ParquetWriter(sink, schema, compression="snappy") as writer:
+        for chunk in chunks:
+            columns = list(zip(*chunk))
+            writer.write_table(pa.Table.from_arrays([pa.array(col, type=field.type) for col, field in zip(columns, schema)],
+                                                    schema=schema))
+            yield sink.take()
+    yield sink.take()
+
+
+EXPORTERS = {"csv": iter_csv, "parquet": iter_parquet}
+
+
+def export(store, account, fmt, out, start=None, end=None, chunk_size=EXPORT_CHUNK_ROWS):
+    """Streams the account's ledger into the binary file `out`; returns the bytes written."""
+    written = 0
+    for piece in EXPORTERS[fmt](store.iter_chunks(account, start, end, chunk_size)):
+        out.write(piece)
+        written += len(piece)
+    return written
@@ -0,0 +1,54 @@
+# --- Inventory Table (FR-AM-01) ---
+# Studio inventories run to tens of thousands of listings, and a DataFrame
+# (let alone a Styler) over all of them is slow and memory hungry. This
+# table asks the catalog store for one page at a time: filters come from the
+# catalog's indexes, sorting selects only the rows up to the page, and
+# highlighting is computed on the displayed slice alone.
+
+PAGE_SIZES = (25, 50, 100)
+DEFAULT_COLUMNS = ("ID", "Title", "Artist", "Medium", "Price", "Tier")
+
+
+def render_listing_table(catalog, key, columns=DEFAULT_COLUMNS, filters=("Medium", "Tier"), highlight=("Price",),
+                         where=None):
+    """Search, filter, sort and page controls plus the current page of listings.
+
+    `where` fixes filters the user cannot change, such as the signed-in artist.
+    """
+    import pandas as pd
+    import streamlit as st
+
+    col_search, col_sort, col_order, col_size = st.columns([3, 2, 1, 1])
+    search = col_search.text_input("Search listings", key=f"{key}_search", placeholder="Title or artist")
+    sort = col_sort.selectbox("Sort by", columns, index=columns.index("ID") if "ID" in columns else 0, key=f"{key}_sort")
+    descending = col_order.toggle("Descending", key=f"{key}_desc")
+    page_size = col_size.selectbox("Rows", PAGE_SIZES, key=f"{key}_size")
+
+    where = dict(where or {})
+    if filters:
+        for field, col in zip(filters, st.columns(len(filters))):
+            value = col.selectbox(field, ["All"] + catalog.values(field), key=f"{key}_{field}")
+            if value != "All":
+                where[field] = value
+
+    # The page number is read before it is drawn, so the query can say how
+    # many pages there are; a page beyond the new last page is clamped.
+    page_key = f"{key}_page"
+    page = st.session_state.get(page_key, 1)
+    total, rows = catalog.page(where, search, sort, descending, (page - 1) * page_size, page_size, columns)
+    pages = max((total - 1) // page_size + 1, 1)
+    if page > pages:
+        page = st.session_state[page_key] = pages
+        total, rows = catalog.page(where, search, sort, descending, (page - 1) * page_size, page_size, columns)
+
+    if not rows:
+        st.info("No listings match these filters.")
+        return
+    frame = pd.DataFrame(rows, columns=list(columns))
+    styled = frame.style.highlight_max(subset=[c for c in highlight if c in columns], axis=0)
+    st.dataframe(styled, hide_index=True, use_container_width=True)
+    col_page, col_caption = st.columns([1, 3])
+    col_page.number_input("Page", min_value=1, max_value=pages, key=page_key)
+    start = (page - 1) * page_size
+    col_caption.caption(f"Showing {start + 1:,}–{start + len(rows):,} of {total:,} listings. "
+                        "Highlights mark the page's highest values.")
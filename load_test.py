@@ -0,0 +1,335 @@
+import argparse
+import json
+import os
+import random
+import multiprocessing
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+
+
+# --- Concurrent Session Load Generator (NF-PR-01) ---
+# Replays recorded interaction scripts (browse, filter, add to cart, checkout)
+# from many simulated sessions at once and reports rerun latency percentiles
+# and throughput. Sessions drive the real demo scripts through Streamlit's
+# AppTest harness, so every step is a genuine script rerun. AppTest keeps
+# its runtime in process-wide state, so each session runs in a process of
+# its own; that also keeps the GIL from serializing them.
+#
+# What is measured is script execution: the time AppTest takes to rerun the
+# app script in process. It does not include the browser, the websocket or
+# rendering, so it is a lower bound on page loads, not a page load time.
+# With --url, a launched app is probed concurrently as well, but only its
+# HTTP shell and health endpoint; those samples are reported separately.
+#
+# By default each session gets its own inventory, ledger and session
+# database in a scratch directory, so scripts measure the happy path rather
+# than "already reserved", and steps that target a piece rotate through the
+# candidate IDs per session and iteration. With --shared-stores all sessions
+# use one set of databases, as app processes on one host do, so holds,
+# purchases and ledger writes contend for the same SQLite locks and pieces.
+
+PAGE_LOAD_TARGET = 2.0  # NF-PR-01: 95% of page loads under 2 seconds
+
+# Steps are {"action": <widget type>, "label"|"key": ..., "value": ...};
+# "button" steps click, "think" steps pause like a real user. A key may
+# contain "{item}", which is filled in from the step's "items" list.
+RECORDED_SCRIPTS = {
+    "renaissance_demo.py": [
+        {"action": "radio", "label": "Navigation", "value": "Art Discovery Portal"},
+        {"action": "checkbox", "key": "browse_ar", "value": True},
+        {"action": "think", "seconds": 0.5},
+        {"action": "radio", "label": "Navigation", "value": "Commission & Sales Split Simulator"},
+        {"action": "number_input", "label": "Final Sale Price ($)", "value": 4800.0},
+        {"action": "slider", "label": "Studio/Gallery Commission Rate (%)", "value": 20},
+        {"action": "radio", "label": "Navigation", "value": "Immersive Art Experience Demo"},
+    ],
+    "renaissance_demo_2.py": [
+        {"action": "text_input", "label": "Search Artworks, Artists, or Keywords", "value": "Sunset"},
+        {"action": "think", "seconds": 0.5},
+        {"action": "text_input", "label": "Search Artworks, Artists, or Keywords", "value": ""},
+        {"action": "button", "key": "buy_{item}", "items": [0, 1, 2, 3, 4]},
+        {"action": "button", "key": "nav_Transactions"},
+        {"action": "button", "key": "nav_Dashboard"},
+        {"action": "button", "key": "nav_Messages"},
+    ],
+    "renaissance_demo_4.py": [
+        {"action": "radio", "label": "Navigation", "value": "Discovery Portal"},
+        {"action": "text_input", "label": "Search artists or styles...", "value": "Muse"},
+        {"action": "think", "seconds": 0.5},
+        {"action": "text_input", "label": "Search artists or styles...", "value": ""},
+        {"action": "button", "key": "buy_{item}", "items": [1, 2, 3]},
+        {"action": "radio", "label": "Navigation", "value": "Dashboard & Logic"},
+        {"action": "radio", "label": "Navigation", "value": "Cart & Checkout"},
+        {"action": "button", "label": "Complete Secure Transaction"},
+    ],
+    "renaissance_demo_5.py": [
+        {"action": "radio", "label": "Navigate Pages", "value": "Art Discovery Portal"},
+        {"action": "checkbox", "label": "AR Enabled Only", "value": True},
+        {"action": "button", "key": "cart_{item}", "items": [1, 2]},
+        {"action": "think", "seconds": 0.5},
+        {"action": "radio", "label": "Navigate Pages", "value": "Cart & Checkout"},
+        {"action": "button", "label": "Finalize Purchase"},
+    ],
+    "renaissance_demo_6.py": [
+        {"action": "radio", "label": "Navigate Pages", "value": "Art Discovery Portal"},
+        {"action": "checkbox", "key": "gallery_ar", "value": True},  # Label carries the facet count
+        {"action": "button", "key": "cart_{item}", "items": [1, 2]},
+        {"action": "radio", "label": "Navigate Pages", "value": "Cart & Checkout"},
+        {"action": "button", "label": "Finalize Purchase"},
+    ],
+    "renaissance_demo_777.py": [
+        {"action": "radio", "label": "Navigate", "value": "Art Discovery Portal"},
+        {"action": "selectbox", "label": "Category", "value": "Abstract"},
+        {"action": "slider", "label": "Price Range ($)", "value": [0, 5000]},
+        {"action": "button", "key": "add_1"},
+        {"action": "think", "seconds": 0.5},
+        {"action": "radio", "label": "Navigate", "value": "Cart & Checkout"},
+        {"action": "text_input", "label": "Card / Wallet Address", "value": "4111 1111 1111 1111"},
+        {"action": "button", "label": "Complete Purchase"},
+    ],
+    "renaissance_demo_8.py": [
+        {"action": "radio", "label": "Navigation", "value": "Art Discovery Portal"},
+        {"action": "text_input", "label": "🔍 Search unique collections...", "value": "Neon"},
+        {"action": "button", "key": "add_4"},
+        {"action": "radio", "label": "Navigation", "value": "Cart & Checkout"},
+        {"action": "button", "label": "Confirm & Pay via Bank"},
+        {"action": "radio", "label": "Navigation", "value": "Financial Operations"},
+    ],
+    "ren_9.py": [
+        {"action": "radio", "label": "Navigate", "value": "Art Discovery Portal"},
+        {"action": "selectbox", "label": "Category", "value": "Modern"},
+        {"action": "button", "key": "add_2"},
+        {"action": "radio", "label": "Navigate", "value": "Cart & Checkout"},
+        {"action": "button", "label": "Continue"},
+    ],
+}
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def _step_name(step):
+    target = step.get("key") or step.get("label")
+    return f"{step['action']}:{target}" if target else step["action"]
+
+
+# --- Session replay (runs inside worker processes) ---
+def _resolve_step(step, session, iteration):
+    """Fills a "{item}" key with this session's piece for this iteration."""
+    if "items" not in step:
+        return step
+    items = step["items"]
+    item = items[(session + iteration) % len(items)]
+    return dict(step, key=step["key"].format(item=item))
+
+
+def _find_widget(at, step):
+    widgets = getattr(at, step["action"])
+    if "key" in step:
+        return widgets(key=step["key"])
+    for widget in widgets:
+        if widget.label == step["label"]:
+            return widget
+    raise LookupError(f"No {step['action']} labelled {step['label']!r} on the current page.")
+
+
+def _apply(at, step):
+    widget = _find_widget(at, step)
+    if step["action"] == "button":
+        widget.click()
+    else:
+        value = step["value"]
+        widget.set_value(tuple(value) if isinstance(value, list) else value)
+
+
+def run_session(app_path, steps, session, iterations, timeout, state_dir, shared_stores=False):
+    """Replays `steps` as session number `session`; returns (step, seconds, error) samples.
+
+    Must run in a process of its own (see main). Its databases are its own
+    unless `shared_stores` is set.
+    """
+    suffix = "shared" if shared_stores else session
+    for variable, name in (("RENAISSANCE_SESSION_DB", "session"), ("RENAISSANCE_INVENTORY_DB", "inventory"),
+                           ("RENAISSANCE_LEDGER_DB", "ledger")):
+        os.environ[variable] = os.path.join(state_dir, f"{name}-{suffix}.db")
+    os.environ.setdefault("RENAISSANCE_COA_KEY", "load-test")  # Certificates go to the scratch ledger
+    from streamlit.testing.v1 import AppTest
+
+    samples = []
+    at = AppTest.from_file(app_path, default_timeout=timeout)
+    started = time.perf_counter()
+    at.run()
+    samples.append(("initial_load", time.perf_counter() - started, None))
+    for iteration in range(iterations):
+        for step in steps:
+            if step["action"] == "think":
+                time.sleep(step["seconds"] * random.uniform(0.5, 1.5))
+                continue
+            name = _step_name(step)
+            step = _resolve_step(step, session, iteration)
+            try:
+                _apply(at, step)
+                started = time.perf_counter()
+                at.run()
+                error = at.exception[0].message if at.exception else None
+                samples.append((name, time.perf_counter() - started, error))
+            except Exception as exc:
+                samples.append((name, 0.0, f"{type(exc).__name__}: {exc}"))
+    return samples
+
+
+# --- HTTP probe against a launched app ---
+def probe_http(url, requests_per_client, clients):
+    """Concurrent GETs of the app shell and health endpoint; returns samples."""
+    samples = []
+    lock = threading.Lock()
+    endpoints = [("http:/", url.rstrip("/") + "/"), ("http:/_stcore/health", url.rstrip("/") + "/_stcore/health")]
+
+    def client():
+        for _ in range(requests_per_client):
+            for name, target in endpoints:
+                started = time.perf_counter()
+                try:
+                    with urllib.request.urlopen(target, timeout=30) as response:
+                        response.read()
+                    error = None
+                except OSError as exc:
+                    error = str(exc)
+                with lock:
+                    samples.append((name, time.perf_counter() - started, error))
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples
+
+
+# --- Reporting ---
+def summarize(samples, wall_seconds):
+    by_step = {}
+    for name, seconds, error in samples:
+        entry = by_step.setdefault(name, {"latencies": [], "errors": 0})
+        if error:
+            entry["errors"] += 1
+        else:
+            entry["latencies"].append(seconds)
+
+    rows = []
+    for name, entry in sorted(by_step.items()):
+        lat = entry["latencies"]
+        rows.append({
+            "step": name,
+            "count": len(lat),
+            "errors": entry["errors"],
+            "p50_ms": round(percentile(lat, 50) * 1000, 1),
+            "p95_ms": round(percentile(lat, 95) * 1000, 1),
+            "p99_ms": round(percentile(lat, 99) * 1000, 1),
+            "mean_ms": round(statistics.fmean(lat) * 1000, 1) if lat else 0.0,
+        })
+
+    ok = [seconds for _, seconds, error in samples if not error]
+    return {
+        "requests": len(samples),
+        "errors": sum(1 for _, _, error in samples if error),
+        "wall_seconds": round(wall_seconds, 2),
+        "throughput_rps": round(len(ok) / wall_seconds, 2) if wall_seconds else 0.0,
+        "p50_ms": round(percentile(ok, 50) * 1000, 1),
+        "p95_ms": round(percentile(ok, 95) * 1000, 1),
+        "p99_ms": round(percentile(ok, 99) * 1000, 1),
+        "under_target_pct": round(100 * sum(s < PAGE_LOAD_TARGET for s in ok) / len(ok), 1) if ok else 0.0,
+        "steps": rows,
+    }
+
+
+def _print_section(title, report, unit):
+    print(f"\n{title}")
+    print(f"{'Step':<48}{'n':>6}{'err':>5}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for row in report["steps"]:
+        print(f"{row['step'][:47]:<48}{row['count']:>6}{row['errors']:>5}{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}")
+    print(f"Total {unit}: {report['requests']} ({report['errors']} errors) in {report['wall_seconds']}s "
+          f"-> {report['throughput_rps']}/s")
+    print(f"Overall p50/p95/p99: {report['p50_ms']} / {report['p95_ms']} / {report['p99_ms']} ms")
+
+
+def print_report(report):
+    stores = "shared databases" if report["shared_stores"] else "a database set per session"
+    _print_section(f"Script execution latency (AppTest reruns, {stores}; excludes browser, websocket and rendering)",
+                   report, "reruns")
+    verdict = "PASS" if report["under_target_pct"] >= 95 else "FAIL"
+    print(f"NF-PR-01 proxy ({PAGE_LOAD_TARGET:.0f}s page load target, applied to script execution only): "
+          f"{report['under_target_pct']}% of reruns under target -> {verdict}")
+    if "http_probe" in report:
+        _print_section("HTTP probe of the launched app (static shell and health endpoint only, not page loads)",
+                       report["http_probe"], "requests")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay interaction scripts from many concurrent sessions.")
+    parser.add_argument("app", help="Demo entry point, e.g. renaissance_demo_6.py")
+    parser.add_argument("--sessions", type=int, default=20, help="Concurrent simulated sessions, one process each")
+    parser.add_argument("--iterations", type=int, default=1, help="Script repetitions per session")
+    parser.add_argument("--script", help="JSON file with a recorded step list (defaults to the built-in one)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-rerun timeout in seconds")
+    parser.add_argument("--url", help="Also probe a launched app's HTTP shell and health endpoint, e.g. http://localhost:8501")
+    parser.add_argument("--shared-stores", action="store_true",
+                        help="Share one inventory, ledger and session database between all sessions to exercise lock contention")
+    parser.add_argument("--json", dest="json_out", help="Write the report as JSON to this path")
+    args = parser.parse_args(argv)
+
+    if args.script:
+        with open(args.script, encoding="utf-8") as fh:
+            steps = json.load(fh)
+    else:
+        steps = RECORDED_SCRIPTS.get(os.path.basename(args.app))
+        if steps is None:
+            parser.error(f"No built-in script for {args.app}; pass --script.")
+    # AppTest resolves relative paths against the calling module, not the cwd
+    app_path = os.path.abspath(args.app)
+    if not os.path.isfile(app_path):
+        parser.error(f"No such app: {app_path}")
+    sessions = max(args.sessions, 1)
+
+    started = time.perf_counter()
+    samples, http_samples = [], []
+    # A fresh spawned process per session: AppTest sessions sharing a
+    # process interfere with each other's runtime and widget state.
+    with tempfile.TemporaryDirectory(prefix="renaissance-load-") as state_dir, \
+            ProcessPoolExecutor(max_workers=sessions, mp_context=multiprocessing.get_context("spawn"),
+                                max_tasks_per_child=1) as pool:
+        futures = [pool.submit(run_session, app_path, steps, session, args.iterations, args.timeout, state_dir,
+                               args.shared_stores)
+                   for session in range(sessions)]
+        if args.url:
+            http_samples = probe_http(args.url, args.iterations * len(steps), sessions)
+        for future in futures:
+            samples.extend(future.result())
+    wall_seconds = time.perf_counter() - started
+    report = summarize(samples, wall_seconds)
+    report["measures"] = "script_execution"
+    report["shared_stores"] = args.shared_stores
+    if args.url:
+        report["http_probe"] = summarize(http_samples, wall_seconds)
+
+    print_report(report)
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+    return 0 if report["errors"] == 0 and not report.get("http_probe", {}).get("errors") else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,286 @@
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# --- Operational Metrics (NF-PR-01, NF-PR-02) ---
+# A small Prometheus-compatible registry: counters, gauges and fixed-bucket
+# histograms with labels, plus a local HTTP endpoint that serves them in the
+# text exposition format. Recording is a dict lookup, a bisect and an add
+# under a per-series lock, cheap enough to wrap every rerun.
+#
+# Each app process keeps its own registry, so each one serves its own
+# endpoint: a process takes the first free port from METRICS_PORT upwards,
+# within METRICS_PORT_SPAN ports, and the scraper lists that whole range as
+# targets. The endpoint binds to loopback unless RENAISSANCE_METRICS_HOST
+# says otherwise.
+
+METRICS_HOST = os.environ.get("RENAISSANCE_METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.environ.get("RENAISSANCE_METRICS_PORT", 9464))
+METRICS_PORT_SPAN = int(os.environ.get("RENAISSANCE_METRICS_PORT_SPAN", 16))
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{_escape(value)}"' for name, value in extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        (REGISTRY if registry is None else registry).register(self)
+
+    def labels(self, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _default(self):
+        if self.labelnames:
+            raise ValueError(f"{self.name} requires labels: {', '.join(self.labelnames)}")
+        return self.labels()
+
+    def collect(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            children = list(self._children.items())
+        for key, child in sorted(children):
+            lines.extend(self._sample_lines(key, child))
+        return lines
+
+
+class _Value:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount=1.0):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount=1.0):
+        self.inc(-amount)
+
+    def set(self, value):
+        with self._lock:
+            self.value = float(value)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount=1.0):
+        if amount < 0:
+            raise ValueError("Counters can only increase.")
+        self._default().inc(amount)
+
+    def _sample_lines(self, key, child):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _Value()
+
+    def set(self, value):
+        self._default().set(value)
+
+    def _sample_lines(self, key, child):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"]
+
+
+class _HistogramValue:
+    def __init__(self, buckets):
+        self._lock = threading.Lock()
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    @contextmanager
+    def time(self):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value):
+        self._default().observe(value)
+
+    def _sample_lines(self, key, child):
+        with child._lock:
+            counts, total = list(child.counts), child.sum
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            labels = _format_labels(self.labelnames, key, [("le", _format_value(float(bound)))])
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered.")
+            self._metrics[metric.name] = metric
+
+    def get(self, name):
+        return self._metrics[name]
+
+    def exposition(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# --- Platform metrics ---
+PAGE_LATENCY = Histogram(
+    "renaissance_page_rerun_seconds", "Wall time of one Streamlit script rerun per page.", ["app", "page"])
+CHECKOUTS = Counter(
+    "renaissance_checkouts_total", "Checkout attempts by outcome.", ["app", "result"])
+CART_SIZE = Histogram(
+    "renaissance_cart_items", "Number of items in the cart at checkout.", ["app"],
+    buckets=(1, 2, 3, 5, 8, 13, 21, 34))
+CACHE_REQUESTS = Counter(
+    "renaissance_cache_requests_total", "Cache lookups by cache and hit/miss.", ["cache", "result"])
+SESSION_STATE_BYTES = Histogram(
+    "renaissance_session_state_bytes", "Size of one session's state at the end of a rerun.", ["app"],
+    buckets=(16_384, 65_536, 262_144, 1_048_576, 2_097_152, 4_194_304, 16_777_216))
+SESSION_EVICTIONS = Counter(
+    "renaissance_session_evictions_total", "Session state keys evicted to meet the memory budget.", ["app", "key"])
+
+
+@contextmanager
+def page_timer(app, page):
+    """Records the rerun latency of `page`; also covers reruns cut short by st.rerun()."""
+    with PAGE_LATENCY.labels(app=app, page=page).time():
+        yield
+
+
+def record_checkout(app, success, cart_items):
+    CHECKOUTS.labels(app=app, result="success" if success else "failure").inc()
+    CART_SIZE.labels(app=app).observe(cart_items)
+
+
+def record_cache(cache, hit):
+    CACHE_REQUESTS.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+
+def record_session_memory(app, size, evicted=()):
+    SESSION_STATE_BYTES.labels(app=app).observe(size)
+    for key in evicted:
+        SESSION_EVICTIONS.labels(app=app, key=key).inc()
+
+
+# --- HTTP endpoint ---
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        body = self.registry.exposition().encode("utf-8")
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http_server(host=METRICS_HOST, port=METRICS_PORT, registry=REGISTRY):
+    """Serves /metrics on a daemon thread and returns the server."""
+    handler = type("BoundMetricsRequestHandler", (MetricsRequestHandler,), {"registry": registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
+
+
+_server = None
+_server_attempted = False
+_server_lock = threading.Lock()
+
+
+def ensure_http_server():
+    """Starts this process's endpoint on the first free port in the span.
+
+    Returns None when every port in the span is taken; that is only tried once.
+    """
+    global _server, _server_attempted
+    with _server_lock:
+        if _server is None and not _server_attempted:
+            _server_attempted = True
+            for port in range(METRICS_PORT, METRICS_PORT + METRICS_PORT_SPAN):
+                try:
+                    _server = start_http_server(port=port)
+                    break
+                except OSError:
+                    continue
+        return _server
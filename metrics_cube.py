@@ -0,0 +1,96 @@
+import threading
+import time
+
+
+# --- Dashboard Rollup Cube (FR-AM-02) ---
+# Every sale, listing change and profile view is added to all of its rollup
+# cells at write time: each combination of (artist, tier, medium) with ALL,
+# crossed with the month, its year and ALL. A dashboard metric is then a
+# single dict lookup, however many sales the studio has.
+
+ALL = "*"
+MEASURES = ("sales", "orders", "listings", "ar_ready", "vr_ready", "listed_value", "views")
+
+
+def month_key(ts=None):
+    """'YYYY-MM' for a Unix timestamp (defaults to now)."""
+    return time.strftime("%Y-%m", time.localtime(time.time() if ts is None else ts))
+
+
+def previous_month(month):
+    year, mon = int(month[:4]), int(month[5:7])
+    if mon == 1:
+        return f"{year - 1}-12"
+    return f"{year}-{mon - 1:02d}"
+
+
+def pct_change(current, previous):
+    """Percentage change, or None when there is nothing to compare against."""
+    if not previous:
+        return None
+    return (current - previous) / previous * 100
+
+
+class RollupCube:
+    """Pre-aggregated measures keyed by (artist, tier, medium, month)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cells = {}
+
+    # --- Writes ---
+    def add(self, artist, tier, medium, month, **measures):
+        unknown = set(measures) - set(MEASURES)
+        if unknown:
+            raise ValueError(f"Unknown measures: {sorted(unknown)}")
+        with self._lock:
+            for key in self._rollup_keys(artist, tier, medium, month):
+                cell = self._cells.get(key)
+                if cell is None:
+                    cell = self._cells[key] = dict.fromkeys(MEASURES, 0)
+                for measure, value in measures.items():
+                    cell[measure] += value
+
+    def record_sale(self, artist, tier, medium, amount, ts=None, sign=1):
+        """Adds a sale; pass sign=-1 to book a refund against the same month."""
+        self.add(artist, tier, medium, month_key(ts), sales=sign * amount, orders=sign)
+
+    def record_view(self, artist, tier, medium, ts=None):
+        self.add(artist, tier, medium, month_key(ts), views=1)
+
+    def record_listing(self, listing, sign=1):
+        """Adds (or with sign=-1 removes) a catalog listing's contribution."""
+        self.add(
+            listing["Artist"], listing["Tier"], listing["Medium"], month_key(listing.get("Listed")),
+            listings=sign,
+            ar_ready=sign * int(bool(listing.get("AR_Ready"))),
+            vr_ready=sign * int(bool(listing.get("VR_Ready"))),
+            listed_value=sign * listing["Price"],
+        )
+
+    def update_listing(self, old, new):
+        self.record_listing(old, sign=-1)
+        self.record_listing(new)
+
+    # --- Reads ---
+    def cell(self, artist=ALL, tier=ALL, medium=ALL, month=ALL):
+        """All measures for one cell; month may be 'YYYY-MM', 'YYYY' or ALL."""
+        with self._lock:
+            cell = self._cells.get((artist, tier, medium, month))
+            return dict(cell) if cell else dict.fromkeys(MEASURES, 0)
+
+    def month_over_month(self, measure, month=None, **dims):
+        """(this month, last month, % change) for one measure."""
+        month = month or month_key()
+        current = self.cell(month=month, **dims)[measure]
+        previous = self.cell(month=previous_month(month), **dims)[measure]
+        return current, previous, pct_change(current, previous)
+
+    @staticmethod
+    def _rollup_keys(artist, tier, medium, month):
+        months = (month, month[:4], ALL)
+        for a in (artist, ALL):
+            for t in (tier, ALL):
+                for m in (medium, ALL):
+                    for mo in months:
+                        yield a, t, m, mo
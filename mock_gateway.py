@@ -0,0 +1,166 @@
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from id_generator import next_ref
+
+
+# --- Mock Payment Gateway ---
+# A local stand-in for the card, bank, crypto and credits gateways, used by
+# the demos and for load testing the gateway client. It speaks HTTP/1.1 with
+# keep-alive, answers after a configurable latency, injects transient 503s
+# and declines at configurable rates, and honours Idempotency-Key headers:
+# a retried request with the same key gets the original response replayed
+# instead of a second charge. Refunds of earlier charges are accepted the
+# same way and are never declined.
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = int(os.environ.get("RENAISSANCE_GATEWAY_PORT", 8503))
+DEFAULT_LATENCY = float(os.environ.get("RENAISSANCE_GATEWAY_LATENCY", 0.3))
+DEFAULT_FAILURE_RATE = float(os.environ.get("RENAISSANCE_GATEWAY_FAILURE_RATE", 0.0))
+DEFAULT_DECLINE_RATE = float(os.environ.get("RENAISSANCE_GATEWAY_DECLINE_RATE", 0.0))
+
+# Extra latency per gateway, on top of the configured base latency
+GATEWAY_LATENCY = {"card": 0.0, "bank": 0.2, "capitec": 0.2, "eft": 0.1, "crypto": 0.8, "credits": -0.2}
+
+
+class MockGatewayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep connections open between requests
+    latency = DEFAULT_LATENCY
+    failure_rate = DEFAULT_FAILURE_RATE
+    decline_rate = DEFAULT_DECLINE_RATE
+    responses = None  # Idempotency key -> (status, body); shared per server
+    lock = None
+
+    def do_POST(self):
+        parts = self.path.strip("/").split("/")
+        length = int(self.headers.get("Content-Length", 0))
+        raw = self.rfile.read(length)
+        if len(parts) != 3 or parts[0] != "v1" or parts[2] not in ("charges", "refunds") or parts[1] not in GATEWAY_LATENCY:
+            self._reply(HTTPStatus.NOT_FOUND, {"error": "Unknown endpoint."})
+            return
+        gateway, resource = parts[1], parts[2]
+        key = self.headers.get("Idempotency-Key")
+        if not key:
+            self._reply(HTTPStatus.BAD_REQUEST, {"error": "Idempotency-Key header is required."})
+            return
+
+        with self.lock:
+            replay = self.responses.get(key)
+            if replay is None:
+                self.responses[key] = "pending"
+        if replay == "pending":
+            self._reply(HTTPStatus.CONFLICT, {"error": "A request with this key is in progress."})
+            return
+        if replay is not None:
+            self._reply(*replay, replayed=True)
+            return
+
+        time.sleep(max(self.latency + GATEWAY_LATENCY[gateway], 0) * random.uniform(0.8, 1.2))
+        if random.random() < self.failure_rate:
+            # Transient failures are not remembered, so a retry can succeed
+            with self.lock:
+                del self.responses[key]
+            self._reply(HTTPStatus.SERVICE_UNAVAILABLE, {"error": "Gateway temporarily unavailable."})
+            return
+
+        try:
+            charge = json.loads(raw)
+            amount = float(charge["amount"])
+        except (ValueError, KeyError, TypeError):
+            status, body = HTTPStatus.BAD_REQUEST, {"error": "Expected a JSON body with an amount."}
+        else:
+            if amount <= 0:
+                status, body = HTTPStatus.BAD_REQUEST, {"error": "Amount must be positive."}
+            elif resource == "refunds":
+                status, body = HTTPStatus.OK, {
+                    "id": next_ref(f"GW-{gateway.upper()}-RF"), "gateway": gateway, "status": "refunded",
+                    "amount": amount, "charge": charge.get("charge"), "created": time.time(),
+                }
+            elif random.random() < self.decline_rate:
+                status, body = HTTPStatus.PAYMENT_REQUIRED, {"error": "Payment declined by issuer."}
+            else:
+                status, body = HTTPStatus.OK, {
+                    "id": next_ref(f"GW-{gateway.upper()}"), "gateway": gateway, "status": "succeeded",
+                    "amount": amount, "currency": charge.get("currency", "ZAR"),
+                    "reference": charge.get("reference"), "created": time.time(),
+                }
+        with self.lock:
+            self.responses[key] = (status, body)
+        self._reply(status, body)
+
+    def _reply(self, status, body, replayed=False):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        if replayed:
+            self.send_header("Idempotent-Replayed", "true")
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(host=DEFAULT_HOST, port=DEFAULT_PORT, latency=DEFAULT_LATENCY,
+                failure_rate=DEFAULT_FAILURE_RATE, decline_rate=DEFAULT_DECLINE_RATE):
+    handler = type("BoundMockGatewayHandler", (MockGatewayHandler,), {
+        "latency": latency, "failure_rate": failure_rate, "decline_rate": decline_rate,
+        "responses": {}, "lock": threading.Lock(),
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def start_background(**kwargs):
+    """Starts the mock gateway on a daemon thread and returns it."""
+    server = make_server(**kwargs)
+    threading.Thread(target=server.serve_forever, name="mock-gateway", daemon=True).start()
+    return server
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def ensure_running():
+    """Starts the mock gateway once per process.
+
+    Returns None when another app process on this host already runs it.
+    """
+    global _server
+    with _server_lock:
+        if _server is None:
+            try:
+                _server = start_background()
+            except OSError:
+                return None
+        return _server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local mock payment gateway with configurable latency.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--latency", type=float, default=DEFAULT_LATENCY, help="Base response latency in seconds")
+    parser.add_argument("--failure-rate", type=float, default=DEFAULT_FAILURE_RATE, help="Share of transient 503s")
+    parser.add_argument("--decline-rate", type=float, default=DEFAULT_DECLINE_RATE, help="Share of declined payments")
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port, args.latency, args.failure_rate, args.decline_rate)
+    print(f"Mock gateway on http://{args.host}:{args.port}/v1/<gateway>/charges and /refunds")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import threading
+import time
+
+
+# --- Order Tracking Store (FR-EC-01) ---
+# Orders move through a fixed lifecycle; anything else is rejected so the
+# buyer-facing status can never go backwards. Secondary indexes by buyer and
+# by status let the purchase-history page pull one page of a collector's
+# orders without scanning every order on the platform.
+
+ORDER_STATUSES = ["Processing", "Shipped", "Delivered"]
+
+STATUS_TRANSITIONS = {
+    "Processing": {"Shipped"},
+    "Shipped": {"Delivered"},
+    "Delivered": set(),
+}
+
+ORDER_COLUMNS = ["ID", "Item", "Artist", "Price", "Status"]
+
+
+class InvalidTransition(ValueError):
+    """Raised when an order is moved to a status its lifecycle does not allow."""
+
+
+class OrderStore:
+    """In-memory order table with buyer and status indexes."""
+
+    def __init__(self, first_id=101):
+        self._next_id = first_id
+        self._lock = threading.Lock()
+        self._orders = {}
+        self._by_buyer = {}
+        self._by_status = {status: set() for status in ORDER_STATUSES}
+
+    def create(self, buyer, item, artist, price, order_id=None):
+        with self._lock:
+            if order_id is None:
+                order_id = self._next_id
+            if order_id in self._orders:
+                raise ValueError(f"Order #{order_id} already exists.")
+            self._next_id = max(self._next_id, order_id + 1)
+            now = time.time()
+            order = {
+                "ID": order_id, "Buyer": buyer, "Item": item, "Artist": artist,
+                "Price": price, "Status": "Processing", "Placed": now, "Updated": now,
+            }
+            self._orders[order_id] = order
+            # Buyer lists are append-only and IDs are increasing, so they stay
+            # in creation order without sorting.
+            self._by_buyer.setdefault(buyer, []).append(order_id)
+            self._by_status["Processing"].add(order_id)
+        return order_id
+
+    def advance(self, order_id, new_status):
+        """Moves an order to `new_status`, enforcing the status state machine."""
+        with self._lock:
+            order = self._orders[order_id]
+            old_status = order["Status"]
+            if new_status not in STATUS_TRANSITIONS[old_status]:
+                raise InvalidTransition(f"Order #{order_id} cannot go from {old_status} to {new_status}.")
+            order["Status"] = new_status
+            order["Updated"] = time.time()
+            self._by_status[old_status].discard(order_id)
+            self._by_status[new_status].add(order_id)
+        return order
+
+    def get(self, order_id):
+        with self._lock:
+            return dict(self._orders[order_id])
+
+    def orders(self, buyer=None, status=None):
+        """Copies of all matching orders, oldest first."""
+        with self._lock:
+            return [dict(self._orders[order_id]) for order_id in self._select(buyer, status)]
+
+    def count(self, buyer=None, status=None):
+        with self._lock:
+            return len(self._select(buyer, status))
+
+    def status_counts(self, buyer=None):
+        with self._lock:
+            return {status: len(self._select(buyer, status)) for status in ORDER_STATUSES}
+
+    def page(self, buyer=None, status=None, page=1, page_size=25, newest_first=True):
+        """One page of matching orders as parallel column lists.
+
+        Only the rows on the requested page are materialized, so the caller can
+        hand the result straight to a single `st.dataframe`.
+        """
+        with self._lock:
+            ids = self._select(buyer, status)
+            if newest_first:
+                ids.reverse()
+            start = max(page - 1, 0) * page_size
+            rows = [self._orders[order_id] for order_id in ids[start:start + page_size]]
+            return {column: [row[column] for row in rows] for column in ORDER_COLUMNS}
+
+    def _select(self, buyer, status):
+        # Caller holds the lock. Returns matching IDs in creation order.
+        if buyer is not None:
+            ids = self._by_buyer.get(buyer, [])
+            if status is None:
+                return list(ids)
+            wanted = self._by_status[status]
+            return [order_id for order_id in ids if order_id in wanted]
+        if status is not None:
+            return sorted(self._by_status[status])
+        return sorted(self._orders)
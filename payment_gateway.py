@@ -0,0 +1,247 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import urllib.parse
+import uuid
+from collections import deque
+
+from id_generator import next_ref
+
+
+# --- Payment Gateway Client (FR-EC-01) ---
+# All gateway calls go through one asyncio event loop per process, over a
+# small pool of keep-alive HTTP/1.1 connections, so concurrent checkouts
+# overlap their round-trips instead of queueing, and no checkout pays for a
+# fresh TCP handshake. Each gateway has its own timeout and retry budget;
+# every attempt of a charge carries the same Idempotency-Key, so a retry
+# after a timeout can never charge the buyer twice.
+
+GATEWAY_URL = os.environ.get("RENAISSANCE_GATEWAY_URL")
+USE_MOCK_GATEWAY = GATEWAY_URL is None  # No real gateway configured: use the local mock
+if USE_MOCK_GATEWAY:
+    GATEWAY_URL = f"http://127.0.0.1:{os.environ.get('RENAISSANCE_GATEWAY_PORT', 8503)}"
+POOL_SIZE = 8
+RETRY_BACKOFF = 0.2  # Seconds, doubled on each retry
+
+GATEWAYS = {
+    "card": {"label": "Credit Card", "timeout": 8.0, "retries": 2},
+    "crypto": {"label": "Crypto", "timeout": 20.0, "retries": 1},
+    "credits": {"label": "Renaissance Credits", "timeout": 3.0, "retries": 2},
+    "bank": {"label": "Pay by bank", "timeout": 10.0, "retries": 2},
+    "capitec": {"label": "Capitec Pay", "timeout": 10.0, "retries": 2},
+    "eft": {"label": "Manual EFT", "timeout": 5.0, "retries": 2},
+}
+
+
+class GatewayError(Exception):
+    """The gateway could not be reached or returned an error."""
+
+
+class PaymentDeclined(GatewayError):
+    """The gateway answered, and the payment was refused."""
+
+
+class ConnectionPool:
+    """Keep-alive HTTP/1.1 connections to one host, at most `size` in use at once."""
+
+    def __init__(self, host, port, size=POOL_SIZE):
+        self.host = host
+        self.port = port
+        self._idle = deque()
+        self._slots = asyncio.Semaphore(size)
+
+    async def request(self, method, path, body=b"", headers=None, timeout=None):
+        """Returns (status, body bytes)."""
+        async with self._slots:
+            while self._idle:
+                reader, writer = self._idle.pop()
+                if writer.is_closing() or reader.at_eof():
+                    writer.close()
+                    continue
+                try:
+                    return await self._exchange(reader, writer, method, path, body, headers, timeout)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    # The server closed an idle connection; try the next one
+                    continue
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(self.host, self.port), timeout)
+            return await self._exchange(reader, writer, method, path, body, headers, timeout)
+
+    async def _exchange(self, reader, writer, method, path, body, headers, timeout):
+        try:
+            head = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}",
+                    "Content-Type: application/json", f"Content-Length: {len(body)}"]
+            head.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+            writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+            status, response_headers, payload = await asyncio.wait_for(self._read_response(reader), timeout)
+        except BaseException:
+            writer.close()
+            raise
+        if response_headers.get("connection", "").lower() == "close":
+            writer.close()
+        else:
+            self._idle.append((reader, writer))
+        return status, payload
+
+    @staticmethod
+    async def _read_response(reader):
+        head = await reader.readuntil(b"\r\n\r\n")
+        lines = head.decode("latin-1").split("\r\n")
+        status = int(lines[0].split(" ", 2)[1])
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+        payload = await reader.readexactly(int(headers.get("content-length", 0)))
+        return status, headers, payload
+
+    def close(self):
+        while self._idle:
+            self._idle.pop()[1].close()
+
+
+class GatewayClient:
+    def __init__(self, base_url=GATEWAY_URL, gateways=GATEWAYS, pool_size=POOL_SIZE):
+        url = urllib.parse.urlsplit(base_url)
+        self.gateways = gateways
+        self._pool = ConnectionPool(url.hostname, url.port or 80, pool_size)
+
+    async def charge(self, gateway, amount, reference, currency="ZAR", idempotency_key=None):
+        """Charges `amount` and returns the gateway's charge record.
+
+        Timeouts, dropped connections and 5xx answers are retried with the
+        same idempotency key; declines and other 4xx answers are not.
+        """
+        return await self._post(gateway, "charges", {"amount": amount, "currency": currency, "reference": reference},
+                                idempotency_key)
+
+    async def refund(self, gateway, charge_id, amount, idempotency_key=None):
+        """Refunds `amount` of an earlier charge; retried like a charge."""
+        return await self._post(gateway, "refunds", {"charge": charge_id, "amount": amount}, idempotency_key)
+
+    async def _post(self, gateway, resource, document, idempotency_key):
+        config = self.gateways[gateway]
+        key = idempotency_key or uuid.uuid4().hex
+        body = json.dumps(document).encode("utf-8")
+        error = None
+        for attempt in range(config["retries"] + 1):
+            if attempt:
+                await asyncio.sleep(RETRY_BACKOFF * 2 ** (attempt - 1))
+            try:
+                status, payload = await self._pool.request(
+                    "POST", f"/v1/{gateway}/{resource}", body, {"Idempotency-Key": key}, config["timeout"])
+            except (asyncio.TimeoutError, OSError, asyncio.IncompleteReadError) as exc:
+                error = GatewayError(f"{config['label']} gateway unreachable ({type(exc).__name__}).")
+                continue
+            # 409: an earlier attempt with this key is still being processed
+            if status >= 500 or status == 409:
+                error = GatewayError(f"{config['label']} gateway returned HTTP {status}.")
+                continue
+            result = json.loads(payload)
+            if status == 402:
+                raise PaymentDeclined(result.get("error", "Payment declined."))
+            if status >= 400:
+                raise GatewayError(result.get("error", f"HTTP {status}"))
+            return result
+        raise error
+
+    async def charge_many(self, charges):
+        """Runs several charges concurrently; failures come back as exceptions in place."""
+        return await asyncio.gather(*(self.charge(**charge) for charge in charges), return_exceptions=True)
+
+    def close(self):
+        self._pool.close()
+
+
+class GatewayRunner:
+    """Runs a GatewayClient on a background event loop for synchronous callers.
+
+    One runner per process lets every Streamlit session share the same
+    connection pool, with calls from different sessions in flight together.
+    """
+
+    def __init__(self, base_url=GATEWAY_URL):
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, name="payment-gateway", daemon=True).start()
+        self.client = self.run(self._make_client(base_url))
+
+    @staticmethod
+    async def _make_client(base_url):
+        return GatewayClient(base_url)
+
+    def run(self, coro, timeout=None):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(timeout)
+
+    def charge(self, gateway, amount, reference, currency="ZAR", idempotency_key=None):
+        return self.run(self.client.charge(gateway, amount, reference, currency, idempotency_key))
+
+    def charge_many(self, charges):
+        return self.run(self.client.charge_many(charges))
+
+    def refund(self, gateway, charge_id, amount, idempotency_key=None):
+        return self.run(self.client.refund(gateway, charge_id, amount, idempotency_key))
+
+
+# --- Streamlit helpers ---
+_runner = None
+_runner_lock = threading.Lock()
+
+
+def get_gateway():
+    """The process-wide runner, starting the local mock gateway when it is in use."""
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            if USE_MOCK_GATEWAY:
+                from mock_gateway import ensure_running
+                ensure_running()
+            _runner = GatewayRunner()
+        return _runner
+
+
+def _checkout_fingerprint(gateway, amount, currency):
+    import streamlit as st
+
+    from session_backend import current_session_id
+
+    cart = json.dumps(st.session_state.get("cart", []), sort_keys=True, default=str)
+    document = json.dumps([current_session_id(), gateway, round(amount, 2), currency, cart])
+    return hashlib.sha256(document.encode("utf-8")).hexdigest()
+
+
+def checkout_key(gateway, amount, currency="ZAR"):
+    """The current session's checkout idempotency key.
+
+    It is kept in session state until the charge succeeds or is declined
+    (see end_checkout), so pressing pay again after a timeout cannot
+    double-charge. It is bound to the session, cart, amount, currency and
+    gateway: if any of them changes, the gateway would replay the earlier
+    charge for the old amount, so a new key is issued instead.
+    """
+    import streamlit as st
+
+    fingerprint = _checkout_fingerprint(gateway, amount, currency)
+    current = st.session_state.get("checkout_key")
+    if not current or current[0] != fingerprint:
+        current = st.session_state["checkout_key"] = (fingerprint, next_ref("CHK"))
+    return current[1]
+
+
+def end_checkout():
+    import streamlit as st
+
+    st.session_state.pop("checkout_key", None)
+
+
+def charge_checkout(gateway, amount, currency="ZAR"):
+    """Charges the current session's checkout."""
+    key = checkout_key(gateway, amount, currency)
+    try:
+        result = get_gateway().charge(gateway, amount, key, currency, key)
+    except PaymentDeclined:
+        end_checkout()
+        raise
+    end_checkout()
+    return result
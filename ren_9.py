@@ -1,6 +1,10 @@
 import streamlit as st
 import pandas as pd
-import time
+
+from facets import FacetIndex
+from metrics import ensure_http_server, page_timer, record_checkout
+from payment_gateway import GatewayError, charge_checkout
+from sprite_sheets import grid_sheet
 
 # --- 1. Configuration ---
 st.set_page_config(
@@ -40,34 +44,57 @@ ART_DATA = [
     {"ID": 6, "Title": "Fragmented Soul", "Artist": "Elena Rossi", "Price": 3100, "AR": True, "Cat": "Abstract", "Img": "https://placehold.co/600x400/4B0082/FFFFFF?text=Abstract"}
 ]
 
+# Checkout method -> payment gateway
+PAYMENT_GATEWAYS = {"Pay by bank": "bank", "Card": "card", "Capitec Pay": "capitec", "Manual EFT": "eft"}
+
 if 'cart' not in st.session_state:
     st.session_state.cart = []
 
+
+@st.cache_resource
+def get_facets():
+    """Category and price bitmaps for the filter bar; ART_DATA is static."""
+    return FacetIndex(ART_DATA, fields=("Cat",), text_fields=("Title", "Artist"))
+
 # --- 3. Page 1: Art Discovery Portal ---
 def page_art_discovery():
     st.title("🎨 Art Discovery Portal")
     
     # Filter Bar
+    # Counts use this run's widget values from session state; the category
+    # index keeps the choice when its count-bearing labels change.
+    facet_index = get_facets()
+    categories = ["All"] + facet_index.values("Cat")
+    cat = st.session_state.get("filter_cat", "All")
+    facets = facet_index.query(search=st.session_state.get("filter_search", ""),
+                               price=st.session_state.get("filter_price", (0, 15000)),
+                               Cat=None if cat == "All" else cat)
     with st.container(border=True):
         c1, c2, c3 = st.columns([2, 1, 1])
-        search = c1.text_input("🔍 Search Artist or Title", placeholder="Start typing...")
-        price_range = c2.slider("Price Range (ZAR)", 0, 15000, (0, 15000))
-        cat = c3.selectbox("Category", ["All"] + list(set(i['Cat'] for i in ART_DATA)))
+        c1.text_input("🔍 Search Artist or Title", placeholder="Start typing...", key="filter_search")
+        c2.slider("Price Range (ZAR)", 0, 15000, (0, 15000), key="filter_price")
+        c2.bar_chart(pd.DataFrame({"Pieces": [count for _, _, count in facets.histogram]},
+                                  index=[low for low, _, _ in facets.histogram]), height=100)
+        c3.selectbox("Category", categories, index=categories.index(cat), key="filter_cat",
+                     format_func=lambda value: facets.label("Cat", value))
+        sort_order = c3.selectbox("Sort by", list(facet_index.sort_orders), key="filter_sort")
 
-    filtered = [
-        i for i in ART_DATA if (search.lower() in i['Title'].lower() or search.lower() in i['Artist'].lower())
-        and (price_range[0] <= i['Price'] <= price_range[1])
-        and (cat == "All" or i['Cat'] == cat)
-    ]
+    # Filtered IDs in the chosen order, from the presorted permutation
+    by_id = {i['ID']: i for i in ART_DATA}
+    filtered = [by_id[art_id] for art_id in facet_index.page(facets, sort_order, 1, len(ART_DATA))]
 
     st.divider()
     
     # Clean 2x3 Grid
+    sheet = grid_sheet([item['Img'] for item in filtered])
     cols = st.columns(3)
     for idx, item in enumerate(filtered):
         with cols[idx % 3]:
             with st.container(border=True):
-                st.image(item['Img'], use_column_width=True)
+                if sheet:
+                    st.markdown(sheet.card_html(item['Img'], item['Title']), unsafe_allow_html=True)
+                else:
+                    st.image(item['Img'], use_column_width=True)
                 st.subheader(item['Title'])
                 st.write(f"**{item['Artist']}** | :green[ZAR {item['Price']:,}]")
                 if st.button("Add to Cart", key=f"add_{item['ID']}", use_container_width=True):
@@ -114,13 +141,20 @@ def page_cart_checkout():
         st.divider()
         st.markdown("🏛️ **Manual EFT**")
         st.write("")
-        
+
+        method = st.radio("Payment Method", list(PAYMENT_GATEWAYS), label_visibility="collapsed")
         if st.button("Continue", type="primary", use_container_width=True):
-            with st.status("Processing Pay by Bank...", expanded=True) as status:
+            with st.status(f"Processing {method}...", expanded=True) as status:
                 st.write("Connecting to South African banking gateway...")
-                time.sleep(1.5)
+                try:
+                    charge_checkout(PAYMENT_GATEWAYS[method], total_val)
+                except GatewayError as exc:
+                    status.update(label=f"Payment failed: {exc}", state="error")
+                    record_checkout("ren_9", False, len(st.session_state.cart))
+                    return
                 status.update(label="Transaction Complete!", state="complete", expanded=False)
             st.balloons()
+            record_checkout("ren_9", True, len(st.session_state.cart))
             st.session_state.cart = []
             st.success("Art secured! Check your profile for certificates.")
 
@@ -131,8 +165,10 @@ def main():
     st.sidebar.divider()
     st.sidebar.metric("Cart", f"{len(st.session_state.cart)} Items")
 
-    if pg == "Art Discovery Portal": page_art_discovery()
-    elif pg == "Cart & Checkout": page_cart_checkout()
+    ensure_http_server()
+    with page_timer("ren_9", pg):
+        if pg == "Art Discovery Portal": page_art_discovery()
+        elif pg == "Cart & Checkout": page_cart_checkout()
 
 if __name__ == "__main__":
     main()
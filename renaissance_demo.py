@@ -1,7 +1,22 @@
 import streamlit as st
 import pandas as pd
+import datetime
 import random
 
+from asset_pipeline import AssetPipeline
+from asset_server import PUBLIC_URL, asset_url, ensure_running, list_assets
+from bulk_import import import_listings
+from card_renderer import GRID_CSS, ViewModelCache, browser_card, grid_html
+from catalog import CatalogStore
+from catalog_sync import SNAPSHOT, SyncServer, decode
+from comment_store import CommentStore
+from facets import FacetCache
+from id_generator import next_ref
+from listing_table import render_listing_table
+from ledger_store import LedgerStore
+from metrics import ensure_http_server, page_timer
+from settlement import DailyScheduler, SettlementOrderError, run_settlement, unsettled_days
+
 # --- Configuration and Data ---
 st.set_page_config(
     page_title="Renaissance App Proposal Demo",
@@ -21,32 +36,90 @@ ARTIST_TIERS = {
 ART_DATA = [
     {
         "ID": 1, "Title": "Digital Sunset", "Artist": "Alex Turner", "Medium": "Digital Arts",
-        "Price": 550, "Tier": "Semi-Pro", "AR_Ready": True, "VR_Ready": False,
+        "Price": 550, "Tier": "Semi-Pro", "AR_Ready": True, "VR_Ready": False, "Popularity": 420,
         "Description": "A vibrant, abstract piece designed for AR viewing in a home setting."
     },
     {
         "ID": 2, "Title": "The Iron Muse", "Artist": "Maria Rodriguez", "Medium": "Sculptor",
-        "Price": 12000, "Tier": "Studio/Gallery", "AR_Ready": True, "VR_Ready": True,
+        "Price": 12000, "Tier": "Studio/Gallery", "AR_Ready": True, "VR_Ready": True, "Popularity": 1310,
         "Description": "A large-scale metal sculpture. VR feature allows a tour of the physical studio where it was crafted."
     },
     {
         "ID": 3, "Title": "A Quiet Day", "Artist": "John Smith", "Medium": "Painter",
-        "Price": 150, "Tier": "Emerging", "AR_Ready": False, "VR_Ready": False,
+        "Price": 150, "Tier": "Emerging", "AR_Ready": False, "VR_Ready": False, "Popularity": 95,
         "Description": "A small, traditional oil on canvas. Limited digital presence."
     },
     {
         "ID": 4, "Title": "Metropolis Rhapsody", "Artist": "Art Collective 7", "Medium": "Graphic Designer",
-        "Price": 3500, "Tier": "Studio/Gallery", "AR_Ready": True, "VR_Ready": True,
+        "Price": 3500, "Tier": "Studio/Gallery", "AR_Ready": True, "VR_Ready": True, "Popularity": 780,
         "Description": "Architectural design concept, includes full 3D model for VR walkthrough."
     },
     {
         "ID": 5, "Title": "Winter's Poem", "Artist": "Poet Laureate", "Medium": "Literary Arts",
-        "Price": 50, "Tier": "Semi-Pro", "AR_Ready": False, "VR_Ready": False,
+        "Price": 50, "Tier": "Semi-Pro", "AR_Ready": False, "VR_Ready": False, "Popularity": 260,
         "Description": "First edition digital copy of a celebrated contemporary poem."
     }
 ]
 
-df = pd.DataFrame(ART_DATA)
+MEDIUMS = ["Painter", "Sculptor", "Digital Arts", "Literary Arts", "Graphic Designer"]
+
+
+@st.cache_resource
+def get_catalog():
+    """Process-wide artwork catalog, seeded with the demo pieces."""
+    return CatalogStore(ART_DATA)
+
+
+@st.cache_resource
+def get_sync_server():
+    """Snapshot and delta feed for offline client caches."""
+    return SyncServer(get_catalog())
+
+
+@st.cache_resource
+def get_browser_facets():
+    """Facet bitmaps for the browser's filter bar, rebuilt when the catalog changes."""
+    return FacetCache("browser_facets", fields=("Medium", "Tier"), flags=("AR_Ready", "VR_Ready"),
+                      text_fields=("Title", "Artist", "Description"))
+
+
+@st.cache_resource
+def get_browser_cards():
+    """Pre-rendered card HTML per listing, rebuilt when the catalog changes."""
+    return ViewModelCache("browser_cards", browser_card, ARTIST_TIERS)
+
+
+@st.cache_resource
+def get_asset_pipeline():
+    """Background process pool that turns uploaded 3D models into AR/VR LODs."""
+    return AssetPipeline("renaissance_demo")
+
+
+@st.cache_resource
+def get_ledger_store():
+    """Sale and refund lines shared with the checkout apps."""
+    return LedgerStore()
+
+
+def settle_day(day, overwrite=False):
+    """Nets the day's sale lines into a payout batch, using catalog tiers for lines without one."""
+    artist_tiers = {listing["Artist"]: listing["Tier"] for listing in get_catalog().listings()}
+    return run_settlement(get_ledger_store(), day, ARTIST_TIERS, artist_tiers, overwrite=overwrite)
+
+
+@st.cache_resource
+def get_settlement_scheduler():
+    """Settles each completed day in order; one process per host leads, the rest stand by."""
+    return DailyScheduler(settle_day, lambda until: unsettled_days(get_ledger_store(), until))
+
+
+@st.cache_resource
+def get_comment_store():
+    """One comment store per server process, shared by every session."""
+    store = CommentStore()
+    store.add_comment("Digital Sunset", "user", "Amazing colors! How long did this take to render?", likes=3)
+    store.add_comment("Digital Sunset", "artist", "Thank you! It was about 40 hours of modeling and rendering.", likes=1)
+    return store
 
 # --- NEW PAGE: Artist/Art Management ---
 def page_artist_management():
@@ -63,7 +136,7 @@ def page_artist_management():
     with st.form("new_art_listing"):
         st.write("Create a new artwork listing.")
         title = st.text_input("Artwork Title", "My New Masterpiece")
-        medium = st.selectbox("Medium (Type of Artist)", ["Painter", "Sculptor", "Digital Arts", "Literary Arts"])
+        medium = st.selectbox("Medium (Type of Artist)", MEDIUMS)
         price_type = st.radio("Sale Type", ["Fixed Price", "Auction (FR-EC-02)"])
         
         col_price, col_immersive = st.columns(2)
@@ -72,16 +145,59 @@ def page_artist_management():
         with col_immersive:
             is_ar = st.checkbox("AR Ready Upload (3D/Model)", True)
             is_vr = st.checkbox("VR Ready (Gallery Tour)", False)
+        model = st.file_uploader("3D Model for AR/VR (glTF, GLB or OBJ)", type=["gltf", "glb", "obj"])
 
         description = st.text_area("Description and Tags", "A piece using bold colors...")
         submitted = st.form_submit_button("Publish Artwork")
 
         if submitted:
-            st.success(f"Artwork '{title}' submitted! Status: Draft. Checkboxes confirm AR:{is_ar}, VR:{is_vr}")
+            listing_id = get_catalog().insert({
+                "Title": title, "Artist": "Alex Turner", "Medium": medium, "Price": price, "Tier": current_tier,
+                "AR_Ready": is_ar, "VR_Ready": is_vr, "Description": description,
+            })
+            st.success(f"Artwork '{title}' submitted as listing #{listing_id}! Status: Draft. Checkboxes confirm AR:{is_ar}, VR:{is_vr}")
+            if model is not None and (is_ar or is_vr):
+                pipeline = get_asset_pipeline()
+                pipeline.submit(listing_id, pipeline.save_upload(listing_id, model.name, model.getvalue()))
+                st.info("3D model queued for processing. Mobile AR and VR levels of detail will appear in the asset manifest.")
+
+    with st.expander("Bulk Import (CSV / JSON)"):
+        st.caption("Columns: Title, Artist, Medium, Price, Tier, AR_Ready, VR_Ready, Description. "
+                   "Rows are validated and inserted in batches as the file is read.")
+        upload = st.file_uploader("Inventory file", type=["csv", "json", "jsonl"])
+        if upload is not None and st.button("Import Listings"):
+            progress = st.progress(0.0, text="Importing...")
+
+            def on_progress(report, fraction):
+                progress.progress(fraction or 0.0, text=f"{report.inserted:,} listings imported, {report.rejected:,} rejected")
+
+            fmt = upload.name.rsplit(".", 1)[-1].lower()
+            report = import_listings(upload, fmt, get_catalog(), ARTIST_TIERS, MEDIUMS, on_progress=on_progress)
+            progress.progress(1.0, text="Import complete")
+            if report.failure:
+                st.error(f"Import stopped early. {report.failure}")
+            st.success(f"Imported {report.inserted:,} of {report.rows:,} rows. Catalog now holds {len(get_catalog()):,} listings.")
+            if report.errors:
+                st.warning(f"{report.rejected:,} rows were rejected.")
+                st.dataframe(pd.DataFrame(report.errors), hide_index=True, use_container_width=True)
 
     st.markdown("---")
     st.subheader("3. Sales and Inventory Status")
-    st.dataframe(df[['Title', 'Medium', 'Price', 'Tier']].head(3).style.highlight_max(axis=0), use_container_width=True)
+    catalog = get_catalog()
+    artists = catalog.values("Artist")
+    artist = st.selectbox("Viewing as", artists, index=artists.index("Alex Turner") if "Alex Turner" in artists else 0)
+    # Maintained per-artist counters; nothing here scans the catalog
+    stats = catalog.artist_stats(artist)
+    col_total, col_ar, col_vr, col_value = st.columns(4)
+    col_total.metric("Listings", f"{stats['listings']:,}")
+    col_ar.metric("AR Ready", f"{stats['ar_ready']:,}")
+    col_vr.metric("VR Ready", f"{stats['vr_ready']:,}")
+    col_value.metric("Listed Value", f"${stats['listed_value']:,.0f}")
+    if stats['listings']:
+        st.progress(stats['ar_ready'] / stats['listings'],
+                    text=f"{stats['ar_ready']} of your {stats['listings']} artworks are AR Ready.")
+    render_listing_table(catalog, "artist_inventory", columns=("ID", "Title", "Medium", "Price", "Tier"),
+                         filters=("Medium", "Tier"), where={"Artist": artist})
     st.caption("Sales history and net payout details are handled by the Transaction Service (See Sales Split Simulator).")
 
 # --- NEW PAGE: User/Buyer Experience ---
@@ -117,11 +233,14 @@ def page_communication():
     st.markdown("### Fostering Community and Direct Communication")
     
     st.subheader("1. Public Comments (FR-CM-01)")
-    st.info("Simulated Public Comment Feed on 'Digital Sunset'")
-    st.chat_message("user").write("Amazing colors! How long did this take to render?")
-    st.chat_message("artist").write("Thank you! It was about 40 hours of modeling and rendering.")
-    st.text_area("Post a new public comment...")
-    st.button("Post Comment")
+    st.info("Public Comment Feed on 'Digital Sunset' (most liked first)")
+    comments = get_comment_store()
+    for comment in comments.top_comments("Digital Sunset"):
+        st.chat_message(comment["User"]).write(f"{comment['Comment']}  \n❤️ {comment['Likes']}")
+    new_comment = st.text_area("Post a new public comment...")
+    if st.button("Post Comment") and new_comment:
+        comments.add_comment("Digital Sunset", "user", new_comment)
+        st.rerun()
     st.markdown("---")
 
     st.subheader("2. Private Chat (FR-CM-02)")
@@ -185,6 +304,26 @@ def page_technical_overview():
         - **Data Security:** All sensitive data (PII, passwords) encrypted at rest and in transit (TLS 1.3+, AES-256).
         - **Data Persistence:** Use of a robust database with regular backups for all transactional and user data.
         """)
+    st.markdown("---")
+
+    st.subheader("4. Offline Catalog Sync (NF-SR-03)")
+    st.markdown("Clients cache the catalog locally and, on reconnect, download only the listings changed since the version they hold.")
+    catalog = get_catalog()
+    sync_server = get_sync_server()
+    snapshot = sync_server.snapshot()
+    cached_version = st.number_input("Client's cached catalog version", min_value=0, max_value=catalog.version, value=catalog.version, step=1)
+    payload = sync_server.sync(int(cached_version) if cached_version else None)
+    summary = decode(payload)
+
+    col_ver, col_full, col_sync = st.columns(3)
+    col_ver.metric("Current Catalog Version", catalog.version)
+    col_full.metric("Full Snapshot", f"{len(snapshot) / 1024:,.1f} KB")
+    col_sync.metric("Sync Payload", f"{len(payload) / 1024:,.1f} KB", summary["type"].title(), delta_color="off")
+    if summary["type"] == SNAPSHOT:
+        st.caption(f"Full snapshot of {len(summary['listings']):,} listings.")
+    else:
+        st.caption(f"{len(summary['upserts']):,} changed and {len(summary['deletes']):,} deleted listings since version {summary['from_version']}.")
+    st.download_button("Download Sync Payload", payload, file_name=f"catalog_v{summary['version']}.json.gz", mime="application/gzip")
 
 
 # --- EXISTING PAGES (Updated from previous turn) ---
@@ -198,93 +337,70 @@ def page_art_browser():
     # --- Sidebar for Filtering ---
     st.sidebar.header("Advanced Search & Filter")
 
+    # Widget values from this run are already in session state, so the facet
+    # counts for every option can be looked up before the widgets are drawn.
+    # Counts are part of the option labels, and a relabelled widget starts
+    # from its default, so each default is the current value.
+    catalog = get_catalog()
+    facet_index = get_browser_facets().get(catalog.version, catalog.listings)
+    state = st.session_state
+    tiers = state.get("browse_tier", ["All"])
+    ar_filter = state.get("browse_ar", False)
+    vr_filter = state.get("browse_vr", False)
+    flags = [flag for flag, on in (("AR_Ready", ar_filter), ("VR_Ready", vr_filter)) if on]
+    all_mediums = ["All"] + facet_index.values("Medium")
+    medium = state.get("browse_medium", "All")
+    medium = medium if medium in all_mediums else "All"
+    facets = facet_index.query(search=state.get("browse_search", ""), flags=flags,
+                               Medium=None if medium == "All" else medium,
+                               Tier=[tier for tier in tiers if tier != "All"])
+
     # 1. Search Bar
-    search_query = st.sidebar.text_input("Search by Title or Keyword", "")
+    st.sidebar.text_input("Search by Title or Keyword", "", key="browse_search")
 
     # 2. Medium Filter
-    all_mediums = ["All"] + sorted(df['Medium'].unique().tolist())
-    selected_medium = st.sidebar.selectbox("Filter by Medium", all_mediums)
+    st.sidebar.selectbox("Filter by Medium", all_mediums, index=all_mediums.index(medium), key="browse_medium",
+                         format_func=lambda value: facets.label("Medium", value))
 
     # 3. Tier Filter (Simulating access/quality)
     all_tiers = ["All"] + list(ARTIST_TIERS.keys())
-    selected_tier = st.sidebar.multiselect("Filter by Artist Tier", all_tiers, default=["All"])
-    if "All" in selected_tier and len(selected_tier) > 1:
-        selected_tier.remove("All")
-    elif "All" in selected_tier and len(selected_tier) == 1:
-        selected_tier = list(ARTIST_TIERS.keys())
+    st.sidebar.multiselect("Filter by Artist Tier", all_tiers, default=tiers, key="browse_tier",
+                           format_func=lambda value: facets.label("Tier", value))
 
     # 4. Immersive Capability Filter (The differentiator)
-    ar_filter = st.sidebar.checkbox("Show AR-Enabled Art Only", value=False)
-    vr_filter = st.sidebar.checkbox("Show VR-Enabled Art Only", value=False)
-
-
-    # --- Apply Filters ---
-    filtered_df = df.copy()
-
-    # Search
-    if search_query:
-        filtered_df = filtered_df[
-            filtered_df['Title'].str.contains(search_query, case=False) |
-            filtered_df['Artist'].str.contains(search_query, case=False) |
-            filtered_df['Description'].str.contains(search_query, case=False)
-        ]
+    st.sidebar.checkbox(f"Show AR-Enabled Art Only ({facets.flags['AR_Ready']:,})", value=ar_filter, key="browse_ar")
+    st.sidebar.checkbox(f"Show VR-Enabled Art Only ({facets.flags['VR_Ready']:,})", value=vr_filter, key="browse_vr")
 
-    # Medium
-    if selected_medium != "All":
-        filtered_df = filtered_df[filtered_df['Medium'] == selected_medium]
-
-    # Tier
-    filtered_df = filtered_df[filtered_df['Tier'].isin(selected_tier)]
-
-    # AR/VR
-    if ar_filter:
-        filtered_df = filtered_df[filtered_df['AR_Ready'] == True]
-    if vr_filter:
-        filtered_df = filtered_df[filtered_df['VR_Ready'] == True]
+    # 5. Price distribution of the current results
+    st.sidebar.caption("Price distribution ($)")
+    st.sidebar.bar_chart(pd.DataFrame({"Listings": [count for _, _, count in facets.histogram]},
+                                      index=[low for low, _, _ in facets.histogram]), height=160)
 
 
     # --- Display Results ---
-    if filtered_df.empty:
+    if not facets.ids:
         st.info("No art pieces match your current filters. Try broadening your search!")
     else:
-        st.metric(label="Total Results Found", value=len(filtered_df))
+        col_count, col_sort = st.columns([2, 1])
+        col_count.metric(label="Total Results Found", value=len(facets.ids))
+        sort_order = col_sort.selectbox("Sort by", list(facet_index.sort_orders))
         cols_per_row = 3
-        cols = st.columns(cols_per_row)
-
-        for i, row in filtered_df.iterrows():
-            with cols[i % cols_per_row]:
-                
-                with st.container(border=True): # Gives a nice visual grouping/border for the card
-                    # Image
-                    st.image("https://placehold.co/600x400/1e293b/FFFFFF?text=ART+ID+"+str(row['ID']), 
-                             caption=f"{row['Title']} by {row['Artist']}", use_column_width=True)
-                    
-                    # Title and Price
-                    st.subheader(f"{row['Title']}")
-                    st.markdown(f"**Price:** <span style='font-size: 1.2em; color: #10b981;'>${row['Price']:,}</span>", unsafe_allow_html=True)
-                    
-                    # Description
-                    with st.expander("Details"):
-                        st.markdown(f"**Artist:** {row['Artist']}")
-                        st.markdown(f"**Medium:** {row['Medium']}")
-                        st.markdown(f"*{row['Description']}*")
-                
-                # Highlight Immersive Features
-                immersive_tags = []
-                if row['AR_Ready']:
-                    immersive_tags.append("📱 AR View")
-                if row['VR_Ready']:
-                    immersive_tags.append("👓 VR Gallery")
-
-                st.markdown(f"**Tier:** <span style='background-color:#{ARTIST_TIERS[row['Tier']]['color']}30; padding: 4px; border-radius: 5px; font-size: 0.8em;'>{row['Tier']}</span>", unsafe_allow_html=True)
-
-                if immersive_tags:
-                    st.markdown(" ".join(f"<span style='background-color:#34d399; padding: 3px 6px; border-radius: 5px; color: white; font-size: 0.75em;'>{tag}</span>" for tag in immersive_tags), unsafe_allow_html=True)
-                else:
-                    st.markdown("<span style='color: #ef4444; font-size: 0.8em;'>Standard Listing</span>", unsafe_allow_html=True)
-
-                st.button("View Details", key=f"details_{row['ID']}", use_container_width=True)
-                st.markdown("---")
+        page_size = 12
+
+        # Pages come from the presorted permutation for this catalog version
+        total_pages = (len(facets.ids) - 1) // page_size + 1
+        page = st.number_input("Page", min_value=1, max_value=total_pages, value=1) if total_pages > 1 else 1
+        page_ids = facet_index.page(facets, sort_order, page, page_size)
+
+        # Card markup is pre-rendered per catalog version; each row of cards is a
+        # single HTML block and only the buttons are widgets.
+        cards = get_browser_cards().get(catalog.version, catalog.listings)
+        st.markdown(GRID_CSS, unsafe_allow_html=True)
+        for start in range(0, len(page_ids), cols_per_row):
+            row_ids = page_ids[start:start + cols_per_row]
+            st.markdown(grid_html([cards[art_id] for art_id in row_ids], cols_per_row), unsafe_allow_html=True)
+            for col, art_id in zip(st.columns(cols_per_row), row_ids):
+                col.button("View Details", key=f"details_{art_id}", use_container_width=True)
 
 
 def page_sales_simulator():
@@ -357,9 +473,48 @@ def page_sales_simulator():
         else:
             st.info("No Studio/Gallery commission applied.")
             
+    col_sale, col_refund = st.columns(2)
+    for col, kind in ((col_sale, "sale"), (col_refund, "refund")):
+        if col.button(f"Record {kind.title()} to Today's Ledger", key=f"record_{kind}", use_container_width=True):
+            get_ledger_store().append_lines([{
+                "date": datetime.datetime.now().strftime("%Y-%m-%d %H:%M"),
+                "ref": next_ref(f"SIM-{kind.upper()}"),
+                "artist": "Simulated Artist", "tier": selected_artist_tier,
+                "studio": "Simulated Studio" if studio_involvement else None,
+                "studio_pct": studio_fee_rate, "amount": sale_price, "kind": kind,
+            }])
+            col.success(f"{kind.title()} of ${sale_price:,.2f} recorded.")
+
     st.markdown("---")
     st.info("**Key Feature:** This transparent, automated process eliminates disputes and simplifies legal and financial tracking for all parties.")
 
+    st.subheader("4. End-of-Day Settlement")
+    scheduler = get_settlement_scheduler()
+    st.markdown(f"Sales and refunds are netted per artist and studio, and paid out as **one EFT batch per day**. Next scheduled run: **{scheduler.next_run():%Y-%m-%d %H:%M}**, settling every day not yet settled"
+                f"{'' if scheduler.is_leader else ', run by another app process'}. Refunds exceeding sales are carried forward into the next day's settlement.")
+    col_day, col_run = st.columns([2, 1])
+    # Only complete days can be settled, in order, since each day opens with the previous day's carry
+    yesterday = datetime.date.today() - datetime.timedelta(days=1)
+    settle_date = col_day.date_input("Settlement Date", yesterday, max_value=yesterday)
+    overwrite = col_run.checkbox("Regenerate if already settled")
+    if col_run.button("Run Settlement Now", type="primary"):
+        try:
+            summary = settle_day(settle_date, overwrite)
+        except SettlementOrderError as exc:
+            st.error(str(exc))
+            return
+        if summary["skipped"]:
+            st.warning(f"{summary['batch_id']} has already been settled.")
+        else:
+            st.success(f"{summary['batch_id']}: {summary['lines']:,} ledger lines netted into {summary['credits']:,} payouts in {summary['seconds']:.2f}s.")
+            st.dataframe(pd.DataFrame([{
+                "Payee": f"{p['payee']} ({p['payee_type']})", "Tier": p["tier"],
+                "Net Sales": p["gross_cents"] / 100, "Fees": p["fee_cents"] / 100,
+                "Brought Forward": p["carried_cents"] / 100, "Payout": p["net_cents"] / 100, "Status": p["status"],
+            } for p in summary["payouts"]]), use_container_width=True)
+        with open(summary["path"], "rb") as fh:
+            st.download_button("Download EFT Payout Batch", fh.read(), file_name=f"{summary['batch_id']}.txt", mime="text/plain")
+
 
 def page_immersive_demo():
     """Focuses on the AR/VR features as the core differentiator."""
@@ -386,6 +541,14 @@ def page_immersive_demo():
     **Demo Scenario:** The user selects "The Iron Muse" (Studio/Gallery Tier), which is 'VR Ready'. 
     They connect via a VR headset and are transported into the artist's private virtual studio, allowing them to walk around the sculpture and view its texture and scale in a fully immersive 3D environment.
     """)
+
+    # Real models and tours stream from the asset server, not through this script
+    ensure_running()
+    assets = list_assets()
+    if assets:
+        st.markdown("#### Streamed AR Models & VR Tours")
+        st.markdown("\n".join(f"- [{path}]({asset_url(path)})" for path in assets[:50]))
+        st.caption(f"Served from {PUBLIC_URL} with HTTP range requests, so viewers start rendering before the download finishes.")
     
     
 # --- Main App Logic ---
@@ -416,20 +579,23 @@ def main():
         st.sidebar.markdown(f"**{tier}:** {data['description']}")
 
 
-    if app_mode == "Art Discovery Portal":
-        page_art_browser()
-    elif app_mode == "Commission & Sales Split Simulator":
-        page_sales_simulator()
-    elif app_mode == "Immersive Art Experience Demo":
-        page_immersive_demo()
-    elif app_mode == "Artist/Art Management":
-        page_artist_management()
-    elif app_mode == "User/Buyer Experience":
-        page_user_buyer()
-    elif app_mode == "Communication & Alerts":
-        page_communication()
-    elif app_mode == "System Technical Overview":
-        page_technical_overview()
+    ensure_http_server()
+    get_settlement_scheduler()
+    with page_timer("renaissance_demo", app_mode):
+        if app_mode == "Art Discovery Portal":
+            page_art_browser()
+        elif app_mode == "Commission & Sales Split Simulator":
+            page_sales_simulator()
+        elif app_mode == "Immersive Art Experience Demo":
+            page_immersive_demo()
+        elif app_mode == "Artist/Art Management":
+            page_artist_management()
+        elif app_mode == "User/Buyer Experience":
+            page_user_buyer()
+        elif app_mode == "Communication & Alerts":
+            page_communication()
+        elif app_mode == "System Technical Overview":
+            page_technical_overview()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -3,6 +3,12 @@ import pandas as pd
 import random
 import time
 
+from card_renderer import GRID_CSS, ViewModelCache, feed_card
+from comment_store import CommentStore
+from metrics import ensure_http_server, page_timer
+from metrics_cube import RollupCube
+from order_store import ORDER_STATUSES, OrderStore
+
 # --- Configuration and Data ---
 st.set_page_config(
     page_title="Renaissance Mobile App Demo",
@@ -31,13 +37,51 @@ ART_DATA = [
 ] * 10 # Repeat data to create a longer scrollable feed
 
 df = pd.DataFrame(ART_DATA)
+ART_BY_TITLE = {row["Title"]: row for row in ART_DATA}
 # Add some dummy transactions/orders
 ORDERS_DATA = [
     {"ID": 101, "Item": "Digital Sunset", "Artist": "Alex Turner", "Price": 550, "Status": "Delivered"},
     {"ID": 102, "Item": "Metropolis Rhapsody", "Artist": "Art Collective 7", "Price": 3500, "Status": "Shipped"},
     {"ID": 103, "Item": "A Quiet Day", "Artist": "John Smith", "Price": 150, "Status": "Processing"}
 ]
-df_orders = pd.DataFrame(ORDERS_DATA)
+
+
+@st.cache_resource
+def get_comment_store():
+    """One comment store per server process, shared by every session."""
+    store = CommentStore()
+    store.add_comment("Digital Sunset", "ArtCritic", "Stunning work!", likes=12)
+    store.add_comment("Digital Sunset", "Buyer123", "How much for shipping?", likes=5)
+    return store
+
+
+@st.cache_resource
+def get_order_store():
+    """Seeds the shared order store from the demo orders."""
+    store = OrderStore()
+    for order in ORDERS_DATA:
+        store.create("ArtLover25", order["Item"], order["Artist"], order["Price"], order_id=order["ID"])
+        for status in ORDER_STATUSES[1:ORDER_STATUSES.index(order["Status"]) + 1]:
+            store.advance(order["ID"], status)
+    return store
+
+
+@st.cache_resource
+def get_metrics_cube():
+    """Dashboard cube, seeded once from the catalog and the existing orders."""
+    cube = RollupCube()
+    for listing in {row["ID"]: row for row in ART_DATA}.values():
+        cube.record_listing(listing)
+    for order in get_order_store().orders():
+        art = ART_BY_TITLE[order["Item"]]
+        cube.record_sale(art["Artist"], art["Tier"], art["Medium"], order["Price"], ts=order["Placed"])
+    return cube
+
+
+@st.cache_resource
+def get_feed_cards():
+    """Pre-rendered feed post HTML per artwork."""
+    return ViewModelCache("feed_cards", feed_card, ARTIST_TIERS)
 
 
 # --- Reusable Components (For the Mobile look) ---
@@ -47,40 +91,26 @@ def custom_header(title, icon="🔥"):
     st.markdown(f'<div style="text-align: center; font-size: 1.5em; font-weight: bold; padding: 10px 0; border-bottom: 1px solid #eee;">{icon} {title}</div>', unsafe_allow_html=True)
     st.markdown("---")
 
-def art_feed_card(row):
+def art_feed_card(row, cards):
     """Renders a single art piece as an Instagram-style post/card."""
-    artist_name = row['Artist']
-    tier = row['Tier']
-    
-    # 1. Profile Bar (like IG post header)
-    col_profile, col_title, col_icon = st.columns([1, 8, 1])
-    with col_profile:
-        # Placeholder for a round profile image
-        st.markdown(f'<div style="width: 40px; height: 40px; background-color: #{ARTIST_TIERS[tier]["color"]}aa; border-radius: 50%; display: flex; align-items: center; justify-content: center; font-size: 1.2em; font-weight: bold;">{artist_name[0]}</div>', unsafe_allow_html=True)
-    with col_title:
-        st.markdown(f"**{artist_name}** <span style='font-size: 0.8em; color: gray;'>- {tier}</span>", unsafe_allow_html=True)
-        st.caption(row['Title'])
-    with col_icon:
-        st.button("...", key=f"menu_{row['ID']}")
-
-    # 2. Art Image (the main content)
-    st.image(row['Image'], use_column_width=True)
-    
-    # 3. Engagement Icons (Like, Comment, Save)
-    col_like, col_comment, col_ar, col_price = st.columns([1, 1, 1, 7])
+    # Profile bar, image, price and caption are one pre-rendered HTML block
+    st.markdown(cards[row['ID']], unsafe_allow_html=True)
+
+    # Engagement buttons are the only widgets. The feed repeats artworks, so
+    # keys use the feed position rather than the artwork ID.
+    col_like, col_comment, col_ar, col_menu, col_buy = st.columns([1, 1, 1, 1, 6])
     with col_like:
-        st.button("❤️", key=f"like_{row['ID']}")
+        st.button("❤️", key=f"like_{row.name}")
     with col_comment:
-        st.button("💬", key=f"comment_{row['ID']}")
+        st.button("💬", key=f"comment_{row.name}")
     with col_ar:
         if row['AR_Ready']:
-             st.button("📱 AR", key=f"ar_{row['ID']}", help="View in Augmented Reality")
-    with col_price:
-        st.markdown(f"<p style='text-align: right; font-size: 1.4em; color: #10b981;'>**${row['Price']:,}**</p>", unsafe_allow_html=True)
-        
-    # 4. Description/Details
-    st.caption(f"**{row['Artist']}**: {row['Title']} - *{row['Medium']}*")
-    st.button("Purchase / View Details", key=f"buy_{row['ID']}", use_container_width=True)
+            st.button("📱", key=f"ar_{row.name}", help="View in Augmented Reality")
+    with col_menu:
+        st.button("...", key=f"menu_{row.name}")
+    with col_buy:
+        if st.button("Purchase / View Details", key=f"buy_{row.name}", use_container_width=True):
+            get_metrics_cube().record_view(row['Artist'], row['Tier'], row['Medium'])
     st.markdown("---")
 
 
@@ -116,8 +146,10 @@ def page_discover():
     if filtered_df.empty:
         st.info("No results found for your search.")
     else:
+        cards = get_feed_cards().get(0, lambda: ART_DATA)  # ART_DATA is static: version 0
+        st.markdown(GRID_CSS, unsafe_allow_html=True)
         for i, row in filtered_df.iterrows():
-            art_feed_card(row)
+            art_feed_card(row, cards)
 
 
 def page_transactions_orders():
@@ -127,20 +159,35 @@ def page_transactions_orders():
     st.subheader("My Purchase History")
     st.markdown("_Tracking the journey of your art from studio to your door._")
     
-    for i, order in df_orders.iterrows():
-        # Order Card
-        col_id, col_item, col_status = st.columns([2, 5, 3])
-        with col_id:
-            st.caption(f"Order #{order['ID']}")
-        with col_item:
-            st.markdown(f"**{order['Item']}** by {order['Artist']}")
-        with col_status:
-            status_style = 'green' if order['Status'] == 'Delivered' else 'orange'
-            st.markdown(f'<span style="color:{status_style}; font-weight:bold;">{order["Status"]}</span>', unsafe_allow_html=True)
-        
-        st.markdown(f"**Total:** ${order['Price']:,}")
-        st.markdown("---")
-        
+    orders = get_order_store()
+    buyer = "ArtLover25"
+
+    # Status counts come straight from the status index
+    counts = orders.status_counts(buyer)
+    col_filter, col_page = st.columns([3, 1])
+    with col_filter:
+        status = st.selectbox("Order Status", ["All"] + ORDER_STATUSES,
+                              format_func=lambda s: s if s == "All" else f"{s} ({counts[s]})")
+    status = None if status == "All" else status
+
+    page_size = 25
+    total_pages = max((orders.count(buyer, status) - 1) // page_size + 1, 1)
+    with col_page:
+        page = st.number_input("Page", min_value=1, max_value=total_pages, value=1)
+
+    # One table per rerun instead of a row of widgets per order
+    st.dataframe(
+        pd.DataFrame(orders.page(buyer, status, page=page, page_size=page_size)),
+        column_config={
+            "ID": st.column_config.NumberColumn("Order #", format="%d"),
+            "Price": st.column_config.NumberColumn("Total", format="$%d"),
+        },
+        hide_index=True,
+        use_container_width=True,
+    )
+    st.caption(f"Page {page} of {total_pages}")
+    st.markdown("---")
+
     st.subheader("Sales Payouts (Artist View)")
     st.info("View your detailed payout simulator in the **Dashboard** page.")
     st.dataframe(df[['Artist', 'Title', 'Price']].head(2), use_container_width=True)
@@ -151,14 +198,25 @@ def page_dashboard():
     custom_header("Dashboard", icon="📊")
     
     st.subheader("Your Performance Overview (Artist View)")
-    
+    artists = sorted({row['Artist'] for row in ART_DATA})
+    artist = st.selectbox("Viewing as", artists, index=artists.index("Art Collective 7"))
+    tier = next(row['Tier'] for row in ART_DATA if row['Artist'] == artist)
+
+    # Every figure below is a single pre-aggregated cube cell
+    cube = get_metrics_cube()
+    year_to_date = cube.cell(artist=artist, month=time.strftime("%Y"))
+    _, _, sales_delta = cube.month_over_month("sales", artist=artist)
+    _, _, views_delta = cube.month_over_month("views", artist=artist)
+
     col_sales, col_views, col_tier = st.columns(3)
     with col_sales:
-        st.metric("Total Sales (YTD)", "$16,200", delta="12% from last month")
+        st.metric("Total Sales (YTD)", f"${year_to_date['sales']:,}",
+                  delta=None if sales_delta is None else f"{sales_delta:.0f}% from last month")
     with col_views:
-        st.metric("Profile Views", "8,450", delta="5% from last month")
+        st.metric("Profile Views", f"{year_to_date['views']:,}",
+                  delta=None if views_delta is None else f"{views_delta:.0f}% from last month")
     with col_tier:
-        st.metric("Current Tier", "Studio/Gallery", delta_color="off")
+        st.metric("Current Tier", tier, delta_color="off")
         
     st.markdown("---")
     
@@ -169,8 +227,9 @@ def page_dashboard():
     
     st.markdown("---")
     st.subheader("Immersive Assets Status")
-    st.markdown("*5 of your 12 artworks are AR Ready.*")
-    st.progress(5/12)
+    inventory = cube.cell(artist=artist)
+    st.markdown(f"*{inventory['ar_ready']} of your {inventory['listings']} artworks are AR Ready.*")
+    st.progress(inventory['ar_ready'] / inventory['listings'] if inventory['listings'] else 0.0)
 
 
 def page_messages():
@@ -200,8 +259,19 @@ def page_messages():
     st.markdown("---")
     
     st.subheader("Public Post Comments")
-    st.caption("A feed of comments on your most recent post.")
-    st.dataframe(pd.DataFrame({"User": ["ArtCritic", "Buyer123"], "Comment": ["Stunning work!", "How much for shipping?"], "Likes": [12, 5]}), use_container_width=True)
+    st.caption("Top comments on your most recent post.")
+    comments = get_comment_store()
+    st.dataframe(pd.DataFrame(comments.columns("Digital Sunset")), use_container_width=True)
+
+    top = comments.top_comments("Digital Sunset")
+    if top:
+        col_pick, col_like = st.columns([3, 1])
+        with col_pick:
+            picked = st.selectbox("Comment", top, format_func=lambda c: f"{c['User']}: {c['Comment']}", label_visibility="collapsed")
+        with col_like:
+            if st.button("❤️ Like", key="like_comment", use_container_width=True):
+                comments.like(picked["ID"])
+                st.rerun()
 
 
 def page_profile():
@@ -334,17 +404,19 @@ def main_app():
     st.markdown("<br><br><br><br>", unsafe_allow_html=True) 
 
     # 2. Render the selected page content
-    if st.session_state['current_page'] == "Discover":
-        page_discover()
-    elif st.session_state['current_page'] == "Transactions":
-        page_transactions_orders()
-    elif st.session_state['current_page'] == "Dashboard":
-        # The Dashboard page is where we'll incorporate the Sales Split Simulator
-        page_dashboard() 
-    elif st.session_state['current_page'] == "Messages":
-        page_messages()
-    elif st.session_state['current_page'] == "Profile":
-        page_profile()
+    ensure_http_server()
+    with page_timer("renaissance_demo_2", st.session_state['current_page']):
+        if st.session_state['current_page'] == "Discover":
+            page_discover()
+        elif st.session_state['current_page'] == "Transactions":
+            page_transactions_orders()
+        elif st.session_state['current_page'] == "Dashboard":
+            # The Dashboard page is where we'll incorporate the Sales Split Simulator
+            page_dashboard() 
+        elif st.session_state['current_page'] == "Messages":
+            page_messages()
+        elif st.session_state['current_page'] == "Profile":
+            page_profile()
 
 if __name__ == "__main__":
     main_app()
\ No newline at end of file
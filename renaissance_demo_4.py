@@ -2,6 +2,15 @@ import streamlit as st
 import pandas as pd
 import time
 
+from asset_pipeline import AssetPipeline
+from catalog import CatalogStore
+from inventory import (AVAILABLE, InventoryError, get_inventory, hold_remaining, purchase_cart, refresh_holds,
+                       remove_from_cart, reserve_cart_item)
+from listing_table import render_listing_table
+from metrics import ensure_http_server, page_timer, record_checkout
+from session_backend import bind_session_state, current_session_id, sync_session_state
+from sprite_sheets import grid_sheet
+
 # --- Configuration ---
 st.set_page_config(
     page_title="Renaissance Enterprise Demo",
@@ -10,10 +19,9 @@ st.set_page_config(
 )
 
 # --- State Management (The "Engine" of the Demo) ---
-if 'cart' not in st.session_state:
-    st.session_state.cart = []
-if 'payout_sim_val' not in st.session_state:
-    st.session_state.payout_sim_val = 2500.0
+# Persisted to the shared session store so any app process can serve the user
+PERSISTED_STATE = {"cart": list, "holds": dict, "payout_sim_val": lambda: 2500.0}
+bind_session_state(PERSISTED_STATE)
 
 # --- Shared Data ---
 ARTIST_TIERS = {
@@ -32,9 +40,25 @@ ART_DATA = [
 ]
 
 
+@st.cache_resource
+def get_catalog():
+    """Listings store behind the inventory table, seeded with the demo pieces."""
+    return CatalogStore(ART_DATA)
+
+
+@st.cache_resource
+def get_asset_pipeline():
+    """Background process pool that turns uploaded 3D models into AR/VR LODs."""
+    return AssetPipeline("renaissance_demo_4")
+
+
 # --- UI Helper Components ---
 def add_to_cart(item):
-    st.session_state.cart.append(item)
+    try:
+        reserve_cart_item(item)
+    except InventoryError:
+        st.toast(f"{item['Title']} was just reserved by another collector.", icon="⛔")
+        return
     st.toast(f"Added {item['Title']} to your collection!", icon="🛒")
 
 
@@ -50,11 +74,15 @@ def page_discovery():
     st.divider()
 
     # Display Art Cards
+    sheet = grid_sheet([item['Img'] for item in ART_DATA])
     cols = st.columns(3)
     for i, item in enumerate(ART_DATA):
         with cols[i % 3]:
             with st.container(border=True):
-                st.image(item['Img'], use_column_width=True)
+                if sheet:
+                    st.markdown(sheet.card_html(item['Img'], item['Title']), unsafe_allow_html=True)
+                else:
+                    st.image(item['Img'], use_column_width=True)
                 st.subheader(item['Title'])
 
                 # Metadata Row
@@ -76,8 +104,11 @@ def page_discovery():
                 st.write(" ")  # Spacer
 
                 # THE BUY BUTTON (Functional)
-                if st.button(f"Purchase {item['Title']}", key=f"buy_{item['ID']}", use_container_width=True,
-                             type="primary"):
+                availability = get_inventory().state(item['ID'], current_session_id())
+                if availability != AVAILABLE:
+                    st.button(availability, key=f"buy_{item['ID']}", use_container_width=True, disabled=True)
+                elif st.button(f"Purchase {item['Title']}", key=f"buy_{item['ID']}", use_container_width=True,
+                               type="primary"):
                     add_to_cart(item)
 
 
@@ -112,8 +143,33 @@ def page_management():
 
     with tab2:
         st.subheader("Current Listings")
-        st.dataframe(pd.DataFrame(ART_DATA), use_container_width=True)
-        st.button("➕ Upload New 3D/AR Asset")
+        render_listing_table(get_catalog(), "inventory", columns=("ID", "Title", "Artist", "Price", "Tier", "AR"),
+                             filters=("Artist", "Tier"))
+
+        pipeline = get_asset_pipeline()
+        with st.form("asset_upload", clear_on_submit=True):
+            art_id = st.selectbox("Artwork", [item['ID'] for item in ART_DATA],
+                                  format_func=lambda i: next(item['Title'] for item in ART_DATA if item['ID'] == i))
+            model = st.file_uploader("3D Model (glTF, GLB or OBJ)", type=["gltf", "glb", "obj"])
+            if st.form_submit_button("➕ Upload New 3D/AR Asset") and model is not None:
+                pipeline.submit(art_id, pipeline.save_upload(art_id, model.name, model.getvalue()))
+                st.toast("Asset queued for LOD processing.", icon="🧊")
+
+        st.markdown("**Asset Manifest**")
+        entries = pipeline.entries()
+        if entries:
+            st.dataframe(pd.DataFrame([
+                {
+                    "Artwork ID": entry['listing'],
+                    "Status": entry['status'],
+                    "LODs": ", ".join(f"{lod['level']}: {lod['triangles']:,} tris" for lod in entry['lods']),
+                    "Error": entry.get('error', ""),
+                }
+                for entry in entries
+            ]), hide_index=True, use_container_width=True)
+            st.button("🔄 Refresh Status")
+        else:
+            st.caption("No 3D assets uploaded yet.")
 
 
 # --- Page 3: Checkout & User (The E-commerce Finish) ---
@@ -128,8 +184,11 @@ def page_checkout():
         for item in st.session_state.cart:
             with st.expander(f"{item['Title']} - ${item['Price']}", expanded=True):
                 st.write(f"Artist: {item['Artist']} | Format: {item['Tier']} Tier Digital/Physical")
+                remaining = hold_remaining(item)
+                st.caption(f"Reserved for you for {remaining // 60:.0f} more minutes." if remaining
+                           else "Your hold has lapsed; it will be renewed at checkout if the piece is still free.")
                 if st.button("Remove", key=f"rem_{item['ID']}"):
-                    st.session_state.cart.remove(item)
+                    remove_from_cart(item)
                     st.rerun()
             total += item['Price']
 
@@ -137,10 +196,18 @@ def page_checkout():
         st.markdown(f"## Total: :green[${total:,}]")
         if st.button("Complete Secure Transaction", use_container_width=True, type="primary"):
             with st.spinner("Processing via Secure Gateway..."):
-                time.sleep(2)
-                st.success("Transaction Successful! Assets available in your VR Gallery.")
-                st.balloons()
-                st.session_state.cart = []
+                try:
+                    refresh_holds(st.session_state.cart)
+                    time.sleep(2)
+                    purchase_cart(st.session_state.cart)
+                except InventoryError as exc:
+                    st.error(f"{exc} Please remove it from your cart.")
+                    record_checkout("renaissance_demo_4", False, len(st.session_state.cart))
+                else:
+                    st.success("Transaction Successful! Assets available in your VR Gallery.")
+                    st.balloons()
+                    record_checkout("renaissance_demo_4", True, len(st.session_state.cart))
+                    st.session_state.cart = []
 
 
 # --- Main Navigation ---
@@ -154,12 +221,16 @@ def main():
     st.sidebar.subheader("Cart Status")
     st.sidebar.metric("Items", len(st.session_state.cart))
 
-    if nav == "Discovery Portal":
-        page_discovery()
-    elif nav == "Dashboard & Logic":
-        page_management()
-    else:
-        page_checkout()
+    ensure_http_server()
+    with page_timer("renaissance_demo_4", nav):
+        if nav == "Discovery Portal":
+            page_discovery()
+        elif nav == "Dashboard & Logic":
+            page_management()
+        else:
+            page_checkout()
+
+    sync_session_state(PERSISTED_STATE)
 
 
 if __name__ == "__main__":
@@ -2,6 +2,15 @@ import streamlit as st
 import pandas as pd
 import time
 
+from asset_server import PUBLIC_URL, asset_url, ensure_running, list_assets
+from certificate_service import get_service as get_certificate_service
+from id_generator import next_ref
+from inventory import (AVAILABLE, InventoryError, get_inventory, hold_remaining, purchase_cart, refresh_holds,
+                       reserve_cart_item)
+from metrics import ensure_http_server, page_timer, record_checkout
+from session_backend import bind_session_state, current_session_id, sync_session_state
+from sprite_sheets import grid_sheet
+
 # --- 1. Configuration & Data ---
 st.set_page_config(
     page_title="Renaissance Unified Demo",
@@ -31,8 +40,8 @@ ART_DATA = [
 ]
 
 # Session State for Commerce (Version 4 Functionality)
-if 'cart' not in st.session_state:
-    st.session_state.cart = []
+PERSISTED_STATE = {"cart": list, "holds": dict, "certificates": list}
+bind_session_state(PERSISTED_STATE)
 
 
 # --- 2. Page Definitions ---
@@ -48,13 +57,16 @@ def page_art_discovery():
     ar_only = st.sidebar.checkbox("AR Enabled Only")
 
     # Display Gallery
+    shown = [item for item in ART_DATA if not ar_only or item['AR_Ready']]
+    sheet = grid_sheet([item['Img'] for item in shown])
     cols = st.columns(3)
-    for i, item in enumerate(ART_DATA):
-        if ar_only and not item['AR_Ready']: continue
-
+    for i, item in enumerate(shown):
         with cols[i % 3]:
             with st.container(border=True):
-                st.image(item['Img'], use_column_width=True)
+                if sheet:
+                    st.markdown(sheet.card_html(item['Img'], item['Title']), unsafe_allow_html=True)
+                else:
+                    st.image(item['Img'], use_column_width=True)
                 st.subheader(item['Title'])
                 st.write(f"**Artist:** {item['Artist']} | **Price:** :green[${item['Price']:,}]")
 
@@ -65,9 +77,16 @@ def page_art_discovery():
                     if item['AR_Ready']: st.info("📱 This piece is AR Ready")
 
                 # Purchase Button linked to Cart (v4)
-                if st.button(f"Add to Cart", key=f"cart_{item['ID']}", use_container_width=True, type="primary"):
-                    st.session_state.cart.append(item)
-                    st.toast(f"{item['Title']} added to cart!")
+                availability = get_inventory().state(item['ID'], current_session_id())
+                if availability != AVAILABLE:
+                    st.button(availability, key=f"cart_{item['ID']}", use_container_width=True, disabled=True)
+                elif st.button(f"Add to Cart", key=f"cart_{item['ID']}", use_container_width=True, type="primary"):
+                    try:
+                        reserve_cart_item(item)
+                    except InventoryError:
+                        st.toast(f"{item['Title']} was just reserved by another collector.")
+                    else:
+                        st.toast(f"{item['Title']} added to cart!")
 
 
 def page_immersive_demo():
@@ -84,6 +103,14 @@ def page_immersive_demo():
         st.image("https://placehold.co/800x400/0ea5e9/FFFFFF?text=VR+Gallery+Tour", use_column_width=True)
         st.caption("Full 360° VR immersion into an artist's personal studio.")
 
+    # Real models and tours stream from the asset server, not through this script
+    ensure_running()
+    assets = list_assets()
+    if assets:
+        st.markdown("#### Streamed AR Models & VR Tours")
+        st.markdown("\n".join(f"- [{path}]({asset_url(path)})" for path in assets[:50]))
+        st.caption(f"Served from {PUBLIC_URL} with HTTP range requests, so viewers start rendering before the download finishes.")
+
 
 def page_profile_management():
     """Version 2: Clean Profile Management Aesthetic"""
@@ -103,6 +130,17 @@ def page_profile_management():
     st.divider()
     st.button("My Commission History", use_container_width=True)
     st.button("Account Settings", use_container_width=True)
+    if st.session_state.certificates:
+        st.subheader("Certificates of Authenticity")
+        service = get_certificate_service()
+        rows = []
+        for cert in st.session_state.certificates:
+            record = service.certificate(cert["Certificate"])
+            status = record["status"] if record else "Unknown"
+            if status == "Sealed":
+                status = "Verified" if service.verify(record) else "Invalid"
+            rows.append(dict(cert, Status=status, Batch=record.get("batch", "—") if record else "—"))
+        st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
 
 
 def page_cart_checkout():
@@ -114,13 +152,32 @@ def page_cart_checkout():
         total = 0
         for item in st.session_state.cart:
             st.write(f"**{item['Title']}** by {item['Artist']} — ${item['Price']}")
+            remaining = hold_remaining(item)
+            if remaining:
+                st.caption(f"Reserved for you for {remaining // 60:.0f} more minutes.")
             total += item['Price']
         st.divider()
         st.subheader(f"Total: ${total:,}")
         if st.button("Finalize Purchase", type="primary"):
             with st.spinner("Processing..."):
-                time.sleep(1.5)
+                try:
+                    refresh_holds(st.session_state.cart)
+                    time.sleep(1.5)
+                    purchase_cart(st.session_state.cart)
+                except InventoryError as exc:
+                    st.error(str(exc))
+                    record_checkout("renaissance_demo_5", False, len(st.session_state.cart))
+                    return
+                payment_ref = next_ref("PAY-SIM")
+                service = get_certificate_service()
+                issued = time.strftime("%Y-%m-%d %H:%M:%S")
+                st.session_state.certificates.extend(
+                    {"Certificate": service.issue(item, current_session_id(), payment_ref),
+                     "Artwork": item["Title"], "Artist": item["Artist"], "Issued": issued}
+                    for item in st.session_state.cart
+                )
                 st.success("Transaction Complete! Certificates sent to your profile.")
+                record_checkout("renaissance_demo_5", True, len(st.session_state.cart))
                 st.session_state.cart = []
 
 
@@ -163,16 +220,20 @@ def main():
     st.sidebar.divider()
     st.sidebar.metric("Cart Items", len(st.session_state.cart))
 
-    if page == "Art Discovery Portal":
-        page_art_discovery()
-    elif page == "Cart & Checkout":
-        page_cart_checkout()
-    elif page == "Immersive Demo":
-        page_immersive_demo()
-    elif page == "My Profile":
-        page_profile_management()
-    elif page == "Technical Overview":
-        page_tech_overview()
+    ensure_http_server()
+    with page_timer("renaissance_demo_5", page):
+        if page == "Art Discovery Portal":
+            page_art_discovery()
+        elif page == "Cart & Checkout":
+            page_cart_checkout()
+        elif page == "Immersive Demo":
+            page_immersive_demo()
+        elif page == "My Profile":
+            page_profile_management()
+        elif page == "Technical Overview":
+            page_tech_overview()
+
+    sync_session_state(PERSISTED_STATE)
 
 
 if __name__ == "__main__":
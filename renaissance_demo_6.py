@@ -2,6 +2,18 @@ import streamlit as st
 import pandas as pd
 import time
 
+from asset_server import PUBLIC_URL, asset_url, ensure_running, list_assets
+from certificate_service import get_service as get_certificate_service
+from checkout_pipeline import Pipeline, PipelineError
+from facets import FacetIndex
+from inventory import (AVAILABLE, InventoryError, cart_reservations, clear_holds, get_inventory, hold_remaining,
+                       refresh_holds, reserve_cart_item, restore_holds)
+from ledger_store import LedgerStore
+from metrics import ensure_http_server, page_timer, record_checkout
+from payment_gateway import GATEWAYS, GatewayError, PaymentDeclined, checkout_key, end_checkout, get_gateway
+from session_backend import bind_session_state, current_session_id, sync_session_state
+from sprite_sheets import grid_sheet
+
 # --- 1. Configuration & Data ---
 st.set_page_config(
     page_title="Renaissance Unified Demo",
@@ -31,8 +43,110 @@ ART_DATA = [
 ]
 
 # Session State for Commerce
-if 'cart' not in st.session_state:
-    st.session_state.cart = []
+PERSISTED_STATE = {"cart": list, "holds": dict, "certificates": list}
+bind_session_state(PERSISTED_STATE)
+
+
+@st.cache_resource
+def get_ledger_store():
+    """Sale lines for the end-of-day artist settlement."""
+    return LedgerStore()
+
+
+@st.cache_resource
+def get_facets():
+    """Medium, AR and price bitmaps for the gallery filters; ART_DATA is static."""
+    return FacetIndex(ART_DATA, fields=("Medium",), flags=("AR_Ready",), text_fields=("Title", "Artist"))
+
+
+def issue_certificate(item, buyer, receipt_id):
+    """Certificate of authenticity for one paid-for artwork, sealed into the next Merkle batch."""
+    certificate_id = get_certificate_service().issue(item, buyer, receipt_id)
+    return {"Certificate": certificate_id, "Artwork": item["Title"], "Artist": item["Artist"],
+            "Issued": time.strftime("%Y-%m-%d %H:%M:%S")}
+
+
+def render_certificates(certificates):
+    """Certificates with their batch status, plus an inclusion-proof check for one of them."""
+    service = get_certificate_service()
+    records, rows = {}, []
+    for cert in certificates:
+        record = records[cert["Certificate"]] = service.certificate(cert["Certificate"])
+        rows.append(dict(cert, Status=record["status"] if record else "Unknown",
+                         Batch=record.get("batch", "—") if record else "—"))
+    st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
+    selected = st.selectbox("Verify a certificate", list(records))
+    record = records[selected]
+    if record is None:
+        st.warning("This certificate is not in the certificate ledger.")
+    elif record["status"] == "Revoked":
+        st.error(f"This certificate was revoked: {record['reason']}")
+    elif record["status"] == "Pending":
+        st.info("Waiting for the next Merkle batch to be sealed. Refresh in a moment.")
+    elif service.verify(record):
+        st.success(f"Verified against the signed root of {record['batch']} with {len(record['proof'])} proof hashes.")
+        st.code(f"Merkle root: {record['root']}\nRoot signature: {record['signature']}")
+    else:
+        st.error("Verification failed: the certificate does not match its batch root.")
+
+
+def sale_lines(cart, ref, kind="sale"):
+    """One settlement line per artwork; refunds reverse the same amounts."""
+    date = time.strftime("%Y-%m-%d %H:%M")
+    return [{"date": date, "ref": ref, "artist": item["Artist"], "tier": item["Tier"], "amount": item["Price"],
+             "kind": kind} for item in cart]
+
+
+def run_checkout(cart, gateway, total):
+    """The pieces are marked sold before the card is charged, so a charge never goes
+    through for a piece that could not be sold; see compensate_checkout for failures.
+    Once the sale is paid for, certificates fan out per item alongside the ledger write."""
+    key = checkout_key(gateway, total, "USD")
+    buyer = current_session_id()
+    refresh_holds(cart)
+    reservations = cart_reservations(cart)
+    pipeline = Pipeline()
+    pipeline.stage("Inventory commit", lambda done: get_inventory().purchase(reservations, buyer))
+    pipeline.stage("Payment authorization", lambda done: get_gateway().charge(gateway, total, key, "USD", key),
+                   after=["Inventory commit"])
+    pipeline.stage("Ledger write", lambda done: get_ledger_store().append_lines(
+        sale_lines(cart, done["Payment authorization"]["id"])
+    ), after=["Payment authorization"])
+    pipeline.stage("Certificates",
+                   lambda done, item: issue_certificate(item, buyer, done["Payment authorization"]["id"]),
+                   for_each=cart, after=["Inventory commit", "Payment authorization"])
+    pipeline.stage("Notification", lambda done: (
+        f"Transaction Complete! Receipt {done['Payment authorization']['id']} and "
+        f"{len(done['Certificates'])} certificate(s) sent to your profile."
+    ), after=["Ledger write", "Certificates"])
+    return pipeline.run()
+
+
+def compensate_checkout(run, cart, gateway, total):
+    """Undoes what a failed checkout finished: revokes certificates already issued,
+    refunds a charge that went through, reverses recorded sale lines so settlement
+    does not pay out for the sale, and turns sold pieces back into the buyer's holds.
+    Returns a note for the buyer."""
+    note = ""
+    issued = run.results.get("Certificates") or run.partial.get("Certificates", [])
+    for cert in issued:
+        get_certificate_service().revoke(cert["Certificate"], "Checkout failed; the sale was undone.")
+    charge = run.results.get("Payment authorization")
+    if charge is not None:
+        try:
+            refund = get_gateway().refund(gateway, charge["id"], total, f"{charge['id']}-refund")
+            note = f"Payment {charge['id']} was refunded ({refund['id']})."
+        except GatewayError as exc:
+            note = f"Payment {charge['id']} could not be refunded automatically ({exc}); support will refund it."
+        # That charge is settled, so trying again must charge under a new key
+        end_checkout()
+        if "Ledger write" in run.results:
+            get_ledger_store().append_lines(sale_lines(cart, charge["id"], kind="refund"))
+    if "Inventory commit" in run.results:
+        restore_holds(cart)
+    if issued:
+        note = f"{note} {len(issued)} certificate(s) were revoked.".strip()
+    return note
 
 
 # --- 2. Page Definitions ---
@@ -43,19 +157,36 @@ def page_art_discovery():
     st.markdown("### Browse & Purchase (Integrated Cart)")
 
     # Filtering Sidebar
+    # Counts use this run's widget values from session state; relabelled
+    # widgets start from their defaults, so the defaults are the current values.
+    facet_index = get_facets()
+    mediums = ["All"] + facet_index.values("Medium")
+    medium = st.session_state.get("gallery_medium", "All")
+    ar_only = st.session_state.get("gallery_ar", False)
+    facets = facet_index.query(search=st.session_state.get("gallery_search", ""),
+                               flags=["AR_Ready"] if ar_only else [], Medium=None if medium == "All" else medium)
     st.sidebar.subheader("Filter Gallery")
-    search = st.sidebar.text_input("Search Title/Artist")
-    ar_only = st.sidebar.checkbox("AR Enabled Only")
+    st.sidebar.text_input("Search Title/Artist", key="gallery_search")
+    st.sidebar.selectbox("Filter by Medium", mediums, index=mediums.index(medium), key="gallery_medium",
+                         format_func=lambda value: facets.label("Medium", value))
+    st.sidebar.checkbox(f"AR Enabled Only ({facets.flags['AR_Ready']:,})", value=ar_only, key="gallery_ar")
+    sort_order = st.sidebar.selectbox("Sort by", list(facet_index.sort_orders))
+    st.sidebar.caption("Price distribution ($)")
+    st.sidebar.bar_chart(pd.DataFrame({"Pieces": [count for _, _, count in facets.histogram]},
+                                      index=[low for low, _, _ in facets.histogram]), height=140)
 
     # Display Gallery
+    by_id = {item['ID']: item for item in ART_DATA}
+    shown = [by_id[art_id] for art_id in facet_index.page(facets, sort_order, 1, len(ART_DATA))]
+    sheet = grid_sheet([item['Img'] for item in shown])
     cols = st.columns(3)
-    for i, item in enumerate(ART_DATA):
-        if ar_only and not item['AR_Ready']:
-            continue
-
+    for i, item in enumerate(shown):
         with cols[i % 3]:
             with st.container():
-                st.image(item['Img'], use_column_width=True)
+                if sheet:
+                    st.markdown(sheet.card_html(item['Img'], item['Title']), unsafe_allow_html=True)
+                else:
+                    st.image(item['Img'], use_column_width=True)
                 st.subheader(item['Title'])
                 st.write(f"**Artist:** {item['Artist']} | **Price:** :green[${item['Price']:,}]")
 
@@ -67,9 +198,16 @@ def page_art_discovery():
                         st.info("📱 This piece is AR Ready")
 
                 # Purchase Button linked to Cart
-                if st.button(f"Add to Cart", key=f"cart_{item['ID']}", type="primary"):
-                    st.session_state.cart.append(item)
-                    st.success(f"{item['Title']} added to cart!")
+                availability = get_inventory().state(item['ID'], current_session_id())
+                if availability != AVAILABLE:
+                    st.button(availability, key=f"cart_{item['ID']}", disabled=True)
+                elif st.button(f"Add to Cart", key=f"cart_{item['ID']}", type="primary"):
+                    try:
+                        reserve_cart_item(item)
+                    except InventoryError:
+                        st.error(f"{item['Title']} was just reserved by another collector.")
+                    else:
+                        st.success(f"{item['Title']} added to cart!")
 
 
 def page_immersive_demo():
@@ -86,6 +224,14 @@ def page_immersive_demo():
         st.image("https://placehold.co/800x400/0ea5e9/FFFFFF?text=VR+Gallery+Tour", use_column_width=True)
         st.caption("Full 360° VR immersion into an artist's personal studio.")
 
+    # Real models and tours stream from the asset server, not through this script
+    ensure_running()
+    assets = list_assets()
+    if assets:
+        st.markdown("#### Streamed AR Models & VR Tours")
+        st.markdown("\n".join(f"- [{path}]({asset_url(path)})" for path in assets[:50]))
+        st.caption(f"Served from {PUBLIC_URL} with HTTP range requests, so viewers start rendering before the download finishes.")
+
 
 def page_profile_management():
     """Profile Management"""
@@ -103,6 +249,9 @@ def page_profile_management():
     st.divider()
     st.button("My Commission History", use_container_width=True)
     st.button("Account Settings", use_container_width=True)
+    if st.session_state.certificates:
+        st.subheader("Certificates of Authenticity")
+        render_certificates(st.session_state.certificates)
 
 
 def page_cart_checkout():
@@ -114,14 +263,35 @@ def page_cart_checkout():
         total = 0
         for item in st.session_state.cart:
             st.write(f"**{item['Title']}** by {item['Artist']} — ${item['Price']}")
+            remaining = hold_remaining(item)
+            if remaining:
+                st.caption(f"Reserved for you for {remaining // 60:.0f} more minutes.")
             total += item['Price']
         st.divider()
         st.subheader(f"Total: ${total:,}")
+        gateway = st.radio("Payment Method", ["card", "crypto", "credits"], format_func=lambda g: GATEWAYS[g]["label"], horizontal=True)
         if st.button("Finalize Purchase", type="primary"):
             with st.spinner("Processing..."):
-                time.sleep(1.5)
-                st.success("Transaction Complete! Certificates sent to your profile.")
-                st.session_state.cart = []
+                try:
+                    run = run_checkout(list(st.session_state.cart), gateway, total)
+                except InventoryError as exc:
+                    st.error(str(exc))
+                    record_checkout("renaissance_demo_6", False, len(st.session_state.cart))
+                except PipelineError as exc:
+                    if isinstance(exc.error, PaymentDeclined):
+                        end_checkout()
+                    note = compensate_checkout(exc.run, st.session_state.cart, gateway, total)
+                    st.error(f"Checkout failed at {exc.stage}: {exc.error} {note}".strip())
+                    record_checkout("renaissance_demo_6", False, len(st.session_state.cart))
+                else:
+                    end_checkout()
+                    clear_holds(st.session_state.cart)
+                    st.session_state.certificates.extend(run.results["Certificates"])
+                    st.success(run.results["Notification"])
+                    record_checkout("renaissance_demo_6", True, len(st.session_state.cart))
+                    st.session_state.cart = []
+                    with st.expander(f"Checkout timeline ({run.elapsed * 1000:,.0f} ms end to end)"):
+                        st.dataframe(pd.DataFrame(run.timeline()), hide_index=True, use_container_width=True)
 
 
 def page_tech_overview():
@@ -160,16 +330,20 @@ def main():
     st.sidebar.divider()
     st.sidebar.metric("Cart Items", len(st.session_state.cart))
 
-    if page == "Art Discovery Portal":
-        page_art_discovery()
-    elif page == "Cart & Checkout":
-        page_cart_checkout()
-    elif page == "Immersive Demo":
-        page_immersive_demo()
-    elif page == "My Profile":
-        page_profile_management()
-    elif page == "Technical Overview":
-        page_tech_overview()
+    ensure_http_server()
+    with page_timer("renaissance_demo_6", page):
+        if page == "Art Discovery Portal":
+            page_art_discovery()
+        elif page == "Cart & Checkout":
+            page_cart_checkout()
+        elif page == "Immersive Demo":
+            page_immersive_demo()
+        elif page == "My Profile":
+            page_profile_management()
+        elif page == "Technical Overview":
+            page_tech_overview()
+
+    sync_session_state(PERSISTED_STATE)
 
 
 if __name__ == "__main__":
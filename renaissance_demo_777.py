@@ -2,6 +2,12 @@ import streamlit as st
 import pandas as pd
 import time
 
+from facets import FacetIndex
+from metrics import ensure_http_server, page_timer, record_checkout
+from payment_gateway import GatewayError, charge_checkout
+from session_backend import bind_session_state, sync_session_state
+from sprite_sheets import grid_sheet
+
 # --- 1. Configuration & Data ---
 st.set_page_config(
     page_title="Renaissance Unified Demo",
@@ -28,9 +34,20 @@ ART_DATA = [
      "Desc": "Cyberpunk aesthetic for digital displays."}
 ]
 
+# Checkout method -> payment gateway
+PAYMENT_GATEWAYS = {"Credit Card": "card", "Crypto (Ethereum)": "crypto", "Renaissance Credits": "credits"}
+
 # Session State Initialization
-if 'cart' not in st.session_state:
-    st.session_state.cart = []
+PERSISTED_STATE = {"cart": list}
+bind_session_state(PERSISTED_STATE)
+
+CATEGORIES = ["All", "Abstract", "Modern", "Landscape", "Cyberpunk"]
+
+
+@st.cache_resource
+def get_facets():
+    """Category and price bitmaps for the filter bar; ART_DATA is static."""
+    return FacetIndex(ART_DATA, fields=("Category",), text_fields=("Title", "Artist"))
 
 # --- 2. Improved Page Definitions ---
 
@@ -38,35 +55,48 @@ def page_art_discovery():
     st.title("🎨 Art Discovery Portal")
     
     # --- Filter Bar ---
+    # Counts come from this run's widget values (already in session state) and
+    # are part of the category labels; relabelling resets a selectbox to its
+    # index, so the index is the current choice.
+    state = st.session_state
+    category = state.get("discover_category", "All")
+    facets = get_facets().query(search=state.get("discover_search", ""),
+                                price=state.get("discover_price", (0, 15000)),
+                                Category=None if category == "All" else category)
     with st.expander("🛠️ Advanced Search & Filters", expanded=True):
         f_col1, f_col2, f_col3 = st.columns([2, 1, 1])
         with f_col1:
-            search = st.text_input("Search by Title, Artist, or Style", placeholder="e.g. 'Modern'")
+            st.text_input("Search by Title, Artist, or Style", placeholder="e.g. 'Modern'", key="discover_search")
         with f_col2:
-            price_range = st.slider("Price Range ($)", 0, 15000, (0, 15000))
+            st.slider("Price Range ($)", 0, 15000, (0, 15000), key="discover_price")
+            st.bar_chart(pd.DataFrame({"Pieces": [count for _, _, count in facets.histogram]},
+                                      index=[low for low, _, _ in facets.histogram]), height=100)
         with f_col3:
-            category = st.selectbox("Category", ["All", "Abstract", "Modern", "Landscape", "Cyberpunk"])
+            st.selectbox("Category", CATEGORIES, index=CATEGORIES.index(category), key="discover_category",
+                         format_func=lambda value: facets.label("Category", value))
+
+    sort_order = st.selectbox("Sort by", list(get_facets().sort_orders), key="discover_sort")
 
     st.divider()
 
     # --- Gallery Logic ---
-    # Filtering the data
-    filtered_data = [
-        item for item in ART_DATA 
-        if (search.lower() in item['Title'].lower() or search.lower() in item['Artist'].lower())
-        and (price_range[0] <= item['Price'] <= price_range[1])
-        and (category == "All" or item['Category'] == category)
-    ]
+    # Filtered IDs in the chosen order, from the presorted permutation
+    by_id = {item['ID']: item for item in ART_DATA}
+    filtered_data = [by_id[art_id] for art_id in get_facets().page(facets, sort_order, 1, len(ART_DATA))]
 
     if not filtered_data:
         st.warning("No artwork matches your current filters.")
     
     # Responsive Grid
+    sheet = grid_sheet([item['Img'] for item in filtered_data])
     cols = st.columns(3)
     for i, item in enumerate(filtered_data):
         with cols[i % 3]:
             with st.container(border=True):
-                st.image(item['Img'], use_column_width=True)
+                if sheet:
+                    st.markdown(sheet.card_html(item['Img'], item['Title']), unsafe_allow_html=True)
+                else:
+                    st.image(item['Img'], use_column_width=True)
                 
                 # Visual Badges
                 badge_html = ""
@@ -123,25 +153,36 @@ def page_cart_checkout():
         
         # Checkout Flow
         with st.expander("💳 Payment Details", expanded=True):
-            method = st.radio("Payment Method", ["Credit Card", "Crypto (Ethereum)", "Renaissance Credits"])
+            method = st.radio("Payment Method", list(PAYMENT_GATEWAYS))
             card_no = st.text_input("Card / Wallet Address", placeholder="0000 0000 0000 0000")
             
             if st.button("Complete Purchase", type="primary", use_container_width=True):
                 if not card_no:
                     st.error("Please enter payment details.")
+                    record_checkout("renaissance_demo_777", False, len(st.session_state.cart))
                 else:
                     with st.status("Verifying Transaction...", expanded=True) as status:
-                        st.write("Authenticating with blockchain...")
-                        time.sleep(1)
-                        st.write("Generating Digital Certificate of Authenticity...")
-                        time.sleep(1)
-                        status.update(label="Purchase Successful!", state="complete", expanded=False)
-                    
-                    st.balloons()
-                    st.success(f"Success! {len(st.session_state.cart)} items are now in your collection.")
-                    st.session_state.cart = []
-                    time.sleep(2)
-                    st.rerun()
+                        st.write(f"Authorizing with the {method} gateway...")
+                        try:
+                            charge_checkout(PAYMENT_GATEWAYS[method], round(total, 2), "USD")
+                            paid = True
+                        except GatewayError as exc:
+                            paid = False
+                            status.update(label=f"Payment failed: {exc}", state="error")
+                        if paid:
+                            st.write("Generating Digital Certificate of Authenticity...")
+                            time.sleep(1)
+                            status.update(label="Purchase Successful!", state="complete", expanded=False)
+
+                    if not paid:
+                        record_checkout("renaissance_demo_777", False, len(st.session_state.cart))
+                    else:
+                        st.balloons()
+                        record_checkout("renaissance_demo_777", True, len(st.session_state.cart))
+                        st.success(f"Success! {len(st.session_state.cart)} items are now in your collection.")
+                        st.session_state.cart = []
+                        time.sleep(2)
+                        st.rerun()
 
 # --- Placeholder Pages for Navigation Consistency ---
 def page_immersive_demo(): st.title("👓 Immersive Demo")
@@ -163,16 +204,20 @@ def main():
         "Technical Overview"
     ])
 
-    if page == "Art Discovery Portal":
-        page_art_discovery()
-    elif page == "Cart & Checkout":
-        page_cart_checkout()
-    elif page == "Immersive Demo":
-        page_immersive_demo()
-    elif page == "My Profile":
-        page_profile_management()
-    elif page == "Technical Overview":
-        page_tech_overview()
+    ensure_http_server()
+    with page_timer("renaissance_demo_777", page):
+        if page == "Art Discovery Portal":
+            page_art_discovery()
+        elif page == "Cart & Checkout":
+            page_cart_checkout()
+        elif page == "Immersive Demo":
+            page_immersive_demo()
+        elif page == "My Profile":
+            page_profile_management()
+        elif page == "Technical Overview":
+            page_tech_overview()
+
+    sync_session_state(PERSISTED_STATE)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,7 +1,18 @@
 import streamlit as st
 import pandas as pd
+import datetime
+import os
 import time
 
+from asset_server import ensure_running, new_download
+from id_generator import next_ref
+from invoices import INVOICE_FORMATS, generate_zip, render_html_fragment
+from ledger_store import EXPORT_FORMATS, LedgerStore, export
+from metrics import ensure_http_server, page_timer, record_checkout
+from payment_gateway import GatewayError, charge_checkout
+from session_backend import bind_session_state, current_session_id, sync_session_state
+from session_memory import drop, keep_newest, memory_budget, render_memory_report
+
 # --- 1. Configuration ---
 st.set_page_config(
     page_title="Renaissance Pro Demo",
@@ -51,10 +62,20 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # --- 2. Data Persistence ---
-if 'cart' not in st.session_state:
-    st.session_state.cart = []
-if 'ledger' not in st.session_state:
-    st.session_state.ledger = []
+PERSISTED_STATE = {"cart": list, "ledger": list, "active_invoice": None}
+bind_session_state(PERSISTED_STATE)
+
+# Cold state the session memory budget may evict: downloads are rebuilt on
+# request, and ledger rows older than the newest stay in the LedgerStore.
+LEDGER_SESSION_ROWS = 200
+EVICTABLE_STATE = {"ledger_export": drop, "invoice_archive": drop, "ledger": keep_newest(LEDGER_SESSION_ROWS)}
+
+
+@st.cache_resource
+def get_ledger_store():
+    """Durable ledger shared by every session; exports read from here."""
+    return LedgerStore()
+
 
 # Mock Art Data
 ART_DATA = [
@@ -131,18 +152,33 @@ def page_cart_checkout():
             
             if st.button("Confirm & Pay via Bank", type="primary", use_container_width=True):
                 with st.status("Linking to Secure Banking Gateway...", expanded=True) as s:
-                    time.sleep(1)
+                    try:
+                        charge = charge_checkout("bank", total_val)
+                    except GatewayError as exc:
+                        s.update(label=f"Payment failed: {exc}", state="error")
+                        record_checkout("renaissance_demo_8", False, len(st.session_state.cart))
+                        return
                     # --- BUSINESS LOGIC: SAVE TO LEDGER ---
                     subtotal = total_val / 1.15
                     vat_amt = total_val - subtotal
-                    st.session_state.ledger.append({
-                        "ref": f"PAY-BANK-{int(time.time())}",
+                    entry = {
+                        "ref": next_ref("PAY-BANK"),
+                        "invoice": next_ref("INV"),
                         "date": time.strftime("%Y-%m-%d %H:%M"),
                         "total": total_val,
                         "subtotal": subtotal,
                         "vat": vat_amt,
-                        "status": "Settled"
-                    })
+                        "status": "Settled",
+                        "gateway_id": charge["id"]
+                    }
+                    st.session_state.ledger.append(entry)
+                    get_ledger_store().append(current_session_id(), entry)
+                    # Per-artwork lines feed the end-of-day artist settlement
+                    get_ledger_store().append_lines([
+                        {"date": entry["date"], "ref": entry["ref"], "artist": item["Artist"], "amount": item["Price"]}
+                        for item in st.session_state.cart
+                    ])
+                    record_checkout("renaissance_demo_8", True, len(st.session_state.cart))
                     st.session_state.cart = [] # Clear cart after success
                     s.update(label="Payment Verified!", state="complete")
                 st.balloons()
@@ -156,9 +192,12 @@ def page_financial_ops():
         st.info("No transactions found. Complete a purchase to generate financial records.")
         return
 
+    # Totals come from the LedgerStore, which keeps rows trimmed from the session
+    store = get_ledger_store()
+    account = current_session_id()
+    store.backfill(account, st.session_state.ledger)
+    txn_count, total_turnover, total_vat, first_date = store.totals(account)
     m1, m2, m3 = st.columns(3)
-    total_turnover = sum(txn['total'] for txn in st.session_state.ledger)
-    total_vat = sum(txn['vat'] for txn in st.session_state.ledger)
     m1.metric("Total Settlement", f"ZAR {total_turnover:,.2f}")
     m2.metric("VAT Liabilities (15%)", f"ZAR {total_vat:,.2f}")
     m3.metric("Settlement Success", "100%")
@@ -168,6 +207,9 @@ def page_financial_ops():
 
     with col_ledger:
         st.subheader("Transaction Ledger")
+        if txn_count > len(st.session_state.ledger):
+            st.caption(f"Showing the newest {len(st.session_state.ledger):,} of {txn_count:,} transactions; "
+                       "Ledger Export covers all of them.")
         for idx, txn in enumerate(st.session_state.ledger):
             with st.container(border=True):
                 c1, c2, c3 = st.columns([2, 1, 1])
@@ -175,42 +217,83 @@ def page_financial_ops():
                 c2.markdown(f":green[{txn['status']}]")
                 c3.markdown(f"**ZAR {txn['total']:,.2f}**")
                 if st.button("View Invoice", key=f"inv_{idx}", use_container_width=True):
-                    st.session_state.active_invoice = txn
+                    st.session_state.active_invoice = txn['ref']
 
     with col_invoice:
         st.subheader("Invoice Preview")
-        if 'active_invoice' in st.session_state:
-            inv = st.session_state.active_invoice
+        # Only the selected ref is kept, not a second copy of the ledger row
+        ref = st.session_state.get('active_invoice')
+        inv = next((txn for txn in st.session_state.ledger if txn['ref'] == ref), None)
+        if inv is not None:
             with st.container(border=True):
-                st.markdown(f"""
-                    <div style="font-family: sans-serif; padding: 10px;">
-                        <h2 style="color: #FF4B00;">RENAISSANCE</h2>
-                        <p style="font-size: 12px;">Tax Invoice: <b>{inv['ref']}</b><br>Date: {inv['date']}</p>
-                        <hr>
-                        <table style="width: 100%; font-size: 14px;">
-                            <tr><td>Subtotal (Excl. VAT)</td><td style="text-align: right;">ZAR {inv['subtotal']:,.2f}</td></tr>
-                            <tr><td>VAT (15.0%)</td><td style="text-align: right;">ZAR {inv['vat']:,.2f}</td></tr>
-                            <tr style="font-weight: bold; border-top: 1px solid #eee;">
-                                <td style="padding-top: 10px;">Total (Incl. VAT)</td>
-                                <td style="text-align: right; padding-top: 10px;">ZAR {inv['total']:,.2f}</td>
-                            </tr>
-                        </table>
-                    </div>
-                """, unsafe_allow_html=True)
+                st.markdown(render_html_fragment(inv), unsafe_allow_html=True)
         else:
             st.info("Select a transaction to preview.")
 
+    st.divider()
+    st.subheader("Batch Invoice Export")
+    # Read from the LedgerStore: the session ledger may be trimmed to its newest rows
+    months = store.months(account)
+    col_month, col_formats = st.columns(2)
+    month = col_month.selectbox("Billing Month", months)
+    formats = col_formats.multiselect("Formats", INVOICE_FORMATS, default=list(INVOICE_FORMATS))
+    if st.button("Generate Invoices", disabled=not formats):
+        progress = st.progress(0.0, text="Rendering invoices...")
+        year, month_number = (int(part) for part in month.split("-"))
+        next_month = f"{year + month_number // 12}-{month_number % 12 + 1:02d}"
+        start, end = f"{month}-01", f"{next_month}-01"
+        total = store.count(account, start, end)
+        # The archive is written to disk and served by the asset server; only its link is kept
+        path, url = new_download(f"invoices_{month}.zip")
+        with open(path, "wb") as archive:
+            count = generate_zip(store.iter_entries(account, start, end), archive, formats,
+                                 on_progress=lambda done: progress.progress(min(done / total, 1.0), text=f"Rendered {done:,} of {total:,} invoices"))
+        st.session_state.invoice_archive = (month, count, os.path.getsize(path), url)
+    if "invoice_archive" in st.session_state:
+        archive_month, count, size, url = st.session_state.invoice_archive
+        st.link_button(f"Download {count:,} invoices for {archive_month} ({size / 1024:,.1f} KB)", url)
+
+    st.divider()
+    st.subheader("Ledger Export")
+    first_day = datetime.date.fromisoformat(first_date[:10])
+    col_range, col_fmt = st.columns([2, 1])
+    date_range = col_range.date_input("Date Range", (first_day, datetime.date.today()))
+    fmt = col_fmt.radio("Export Format", EXPORT_FORMATS, format_func=str.upper, horizontal=True)
+    if len(date_range) == 2 and st.button("Prepare Export"):
+        start, end = date_range[0].isoformat(), (date_range[1] + datetime.timedelta(days=1)).isoformat()
+        # Chunks are streamed to disk and the file is served by the asset server; only its link is kept
+        file_name = f"ledger_{date_range[0]}_{date_range[1]}.{fmt}"
+        path, url = new_download(file_name)
+        with open(path, "wb") as out:
+            size = export(store, account, fmt, out, start, end)
+        st.session_state.ledger_export = (file_name, url)
+        st.caption(f"{store.count(account, start, end):,} transactions, {size / 1024:,.1f} KB")
+    if "ledger_export" in st.session_state:
+        file_name, url = st.session_state.ledger_export
+        st.link_button(f"Download {file_name}", url)
+
+# --- 6. Page: Memory Report (admin) ---
+def page_memory_report():
+    st.title("🧠 Session Memory")
+    render_memory_report()
+
 # --- Navigation ---
 def main():
     st.sidebar.title("⚜️ Renaissance")
     # UPDATED NAVIGATION
-    pg = st.sidebar.radio("Navigation", ["Art Discovery Portal", "Cart & Checkout", "Financial Operations"])
+    pg = st.sidebar.radio("Navigation", ["Art Discovery Portal", "Cart & Checkout", "Financial Operations", "Memory Report"])
     st.sidebar.divider()
     st.sidebar.metric("Cart Count", len(st.session_state.cart))
     
-    if pg == "Art Discovery Portal": page_art_discovery()
-    elif pg == "Cart & Checkout": page_cart_checkout()
-    elif pg == "Financial Operations": page_financial_ops()
+    ensure_http_server()
+    ensure_running()
+    with page_timer("renaissance_demo_8", pg), memory_budget("renaissance_demo_8", pg, EVICTABLE_STATE):
+        if pg == "Art Discovery Portal": page_art_discovery()
+        elif pg == "Cart & Checkout": page_cart_checkout()
+        elif pg == "Financial Operations": page_financial_ops()
+        elif pg == "Memory Report": page_memory_report()
+
+    sync_session_state(PERSISTED_STATE)
 
 if __name__ == "__main__":
     main()
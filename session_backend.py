@@ -0,0 +1,281 @@
+import atexit
+import hashlib
+import json
+import os
+import re
+import secrets
+import sqlite3
+import threading
+import time
+import zlib
+
+
+# --- External Session Store (NF-SR-02) ---
+# Carts, ledgers and other per-user state are mirrored out of Streamlit's
+# in-process session_state into a shared store, so any app process on the
+# host can pick a session up and nothing is lost on restart. The store is a
+# SQLite file, so it does not span hosts; a load balancer in front of
+# several hosts needs sticky sessions. Values are stored as compact JSON
+# (zlib-compressed when large), and writes are coalesced and flushed in
+# batches by a background thread.
+#
+# Sessions are identified by a random token kept in a cookie, never in the
+# URL, so copying or sharing a link does not hand over a cart or ledger.
+
+SESSION_DB = os.environ.get("RENAISSANCE_SESSION_DB", "session_state.db")
+SESSION_BACKEND = os.environ.get("RENAISSANCE_SESSION_BACKEND", "sqlite")
+SESSION_COOKIE = "renaissance_session"
+SESSION_COOKIE_MAX_AGE = 30 * 24 * 3600
+LEGACY_SESSION_PARAM = "sid"  # Where older versions kept the session ID
+SESSION_TOKEN = re.compile(r"[A-Za-z0-9_-]{43}")  # secrets.token_urlsafe(32)
+
+COMPRESS_MIN_BYTES = 512
+FLUSH_INTERVAL = 0.25
+FLUSH_MAX_PENDING = 200
+
+
+# --- Serialization ---
+def encode(value):
+    raw = json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    if len(raw) >= COMPRESS_MIN_BYTES:
+        return b"z" + zlib.compress(raw, 6)
+    return b"j" + raw
+
+
+def decode(blob):
+    kind, body = blob[:1], blob[1:]
+    if kind == b"z":
+        body = zlib.decompress(body)
+    return json.loads(body.decode("utf-8"))
+
+
+# --- Backends ---
+class MemoryBackend:
+    """Single-process backend, useful for tests and local development."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = {}
+
+    def get_many(self, session_id, keys):
+        with self._lock:
+            return {key: self._data[session_id, key] for key in keys if (session_id, key) in self._data}
+
+    def put_many(self, items):
+        with self._lock:
+            for session_id, key, blob in items:
+                self._data[session_id, key] = blob
+
+    def delete_session(self, session_id):
+        with self._lock:
+            for session_key in [k for k in self._data if k[0] == session_id]:
+                del self._data[session_key]
+
+
+class SQLiteBackend:
+    """Backend shared by every app process on a host through one SQLite file."""
+
+    def __init__(self, path=SESSION_DB):
+        self.path = path
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS session_state ("
+                " session_id TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL, updated REAL NOT NULL,"
+                " PRIMARY KEY (session_id, key)) WITHOUT ROWID"
+            )
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            # WAL lets readers in other processes proceed while a batch commits
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, session_id, keys):
+        keys = list(keys)
+        if not keys:
+            return {}
+        placeholders = ",".join("?" * len(keys))
+        rows = self._connection().execute(
+            f"SELECT key, value FROM session_state WHERE session_id = ? AND key IN ({placeholders})",
+            [session_id, *keys],
+        ).fetchall()
+        return dict(rows)
+
+    def put_many(self, items):
+        now = time.time()
+        with self._connection() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO session_state (session_id, key, value, updated) VALUES (?, ?, ?, ?)",
+                [(session_id, key, blob, now) for session_id, key, blob in items],
+            )
+
+    def delete_session(self, session_id):
+        with self._connection() as conn:
+            conn.execute("DELETE FROM session_state WHERE session_id = ?", (session_id,))
+
+
+class WriteBehindStore:
+    """Coalesces writes in memory and flushes them to `backend` in batches.
+
+    Reads see pending writes first, so a session always reads its own
+    latest value even before the batch has been committed.
+    """
+
+    def __init__(self, backend, interval=FLUSH_INTERVAL, max_pending=FLUSH_MAX_PENDING):
+        self.backend = backend
+        self.interval = interval
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="session-write-behind", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def get_many(self, session_id, keys):
+        found = {}
+        missing = []
+        with self._lock:
+            for key in keys:
+                if (session_id, key) in self._pending:
+                    found[key] = self._pending[session_id, key]
+                else:
+                    missing.append(key)
+        found.update(self.backend.get_many(session_id, missing))
+        return {key: decode(blob) for key, blob in found.items()}
+
+    def put(self, session_id, key, value):
+        blob = encode(value)
+        with self._lock:
+            self._pending[session_id, key] = blob
+            if len(self._pending) >= self.max_pending:
+                self._wake.set()
+
+    def flush(self):
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        if not batch:
+            return
+        try:
+            self.backend.put_many([(sid, key, blob) for (sid, key), blob in batch.items()])
+        except Exception:
+            with self._lock:
+                # Writes queued since the swap are newer and must win
+                self._pending = {**batch, **self._pending}
+            raise
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._wake.set()
+            self._thread.join(timeout=5)
+            self.flush()
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except sqlite3.Error:
+                time.sleep(self.interval)  # Database busy; the batch is retried next round
+
+
+def make_store(kind=SESSION_BACKEND, path=SESSION_DB):
+    if kind == "memory":
+        return WriteBehindStore(MemoryBackend())
+    if kind == "sqlite":
+        return WriteBehindStore(SQLiteBackend(path))
+    raise ValueError(f"Unknown session backend: {kind}")
+
+
+# --- Streamlit binding ---
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = make_store()
+        return _store
+
+
+def _digest(value):
+    return hashlib.blake2b(encode(value), digest_size=16).digest()
+
+
+def _set_session_cookie(token):
+    import streamlit.components.v1 as components
+
+    # Streamlit cannot set response headers, so the page sets the cookie; the
+    # component frame shares the app's origin. Scripts can read it (no HttpOnly).
+    components.html(f"<script>parent.document.cookie = '{SESSION_COOKIE}={token}; "
+                    f"Max-Age={SESSION_COOKIE_MAX_AGE}; Path=/; SameSite=Strict';</script>", height=0)
+
+
+def current_session_id():
+    """Stable session ID: an unguessable token kept in the session cookie."""
+    import streamlit as st
+
+    sid = st.session_state.get("_session_id")
+    if sid is None:
+        sid = st.context.cookies.get(SESSION_COOKIE)
+        if not sid or not SESSION_TOKEN.fullmatch(sid):
+            sid = secrets.token_urlsafe(32)
+            _set_session_cookie(sid)
+        st.session_state["_session_id"] = sid
+        if LEGACY_SESSION_PARAM in st.query_params:
+            # Never adopt an ID from a link; whoever shared it would share the session
+            del st.query_params[LEGACY_SESSION_PARAM]
+    return sid
+
+
+def bind_session_state(defaults):
+    """Restores persisted keys into st.session_state on a session's first run.
+
+    `defaults` maps each persisted key to a factory for its initial value,
+    or to None for keys that should only exist once the app sets them.
+    """
+    import streamlit as st
+
+    state = st.session_state
+    if "_persisted" not in state:
+        state["_persisted"] = {}
+    missing = [key for key in defaults if key not in state]
+    if not missing:
+        return
+    loaded = get_store().get_many(current_session_id(), missing)
+    for key in missing:
+        if key in loaded:
+            state[key] = loaded[key]
+            state["_persisted"][key] = _digest(loaded[key])
+        elif defaults[key] is not None:
+            state[key] = defaults[key]()
+
+
+def sync_session_state(keys):
+    """Queues changed keys for the write-behind flush; call at the end of a run.
+
+    Unchanged values are skipped by comparing digests of their encoding.
+    """
+    import streamlit as st
+
+    state = st.session_state
+    persisted = state.setdefault("_persisted", {})
+    store = get_store()
+    sid = current_session_id()
+    for key in keys:
+        if key not in state:
+            continue
+        digest = _digest(state[key])
+        if persisted.get(key) != digest:
+            store.put(sid, key, state[key])
+            persisted[key] = digest
@@ -0,0 +1,271 @@
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import types
+from contextlib import contextmanager
+
+from metrics import record_session_memory
+
+
+# --- Session Memory Budget (NF-PR-01, NF-SR-01) ---
+# A worker holds the session_state of every connected session, so a few
+# bloated sessions can get the whole pod OOM-killed. After each rerun the
+# session's state is sized key by key. The sizes go into a process-wide
+# report, and if the session is over its budget, registered eviction
+# policies are applied to its coldest keys until it fits again. A key is
+# cold when it has gone the most reruns without changing. Policies only
+# ever drop or shrink state that can be rebuilt, e.g. a generated download
+# or ledger rows already held by the LedgerStore.
+#
+# Setting RENAISSANCE_MEMORY_PROFILE=1 also starts tracemalloc. Every
+# SAMPLE_EVERY-th rerun of each page is then bracketed by two snapshots,
+# and the top allocators of the memory that survived the rerun are kept
+# per page. Snapshots are costly, so only one rerun is sampled at a time.
+
+SESSION_BUDGET = int(os.environ.get("RENAISSANCE_SESSION_BUDGET_KB", 2048)) * 1024
+MEMORY_PROFILE = os.environ.get("RENAISSANCE_MEMORY_PROFILE", "0") == "1"
+SAMPLE_EVERY = int(os.environ.get("RENAISSANCE_MEMORY_SAMPLE_EVERY", 20))
+TOP_ALLOCATORS = 10
+TRACE_FRAMES = 1
+SESSION_TTL = 3600  # Seconds before an idle session leaves the report
+
+_EVICTED = object()
+
+
+def deep_sizeof(value):
+    """Bytes held by `value` and everything it contains; shared objects count once."""
+    seen = set()
+    size = 0
+    stack = [value]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        elif hasattr(obj, "__dict__") and not isinstance(obj, (type, types.ModuleType)):
+            stack.append(vars(obj))
+    return size
+
+
+# --- Eviction policies ---
+# A policy takes a key's value and returns its replacement.
+def drop(value):
+    """Removes the key; only for state the app can rebuild and does not persist."""
+    return _EVICTED
+
+
+def keep_newest(rows):
+    """Keeps the last `rows` entries of a list that is appended to in order."""
+    def policy(value):
+        return value[-rows:]
+    return policy
+
+
+class SessionMemoryMonitor:
+    """Per-session state sizes, per-page allocator samples and budget enforcement."""
+
+    def __init__(self, budget=SESSION_BUDGET, profile=MEMORY_PROFILE, sample_every=SAMPLE_EVERY,
+                 top=TOP_ALLOCATORS):
+        self.budget = budget
+        self.profile = profile
+        self.sample_every = sample_every
+        self.top = top
+        self._lock = threading.Lock()
+        self._sessions = {}  # session ID -> report
+        self._pages = {}  # (app, page) -> {"runs", "sampled", "allocators", "peak"}
+        self._sampling = threading.Lock()
+        if profile and not tracemalloc.is_tracing():
+            tracemalloc.start(TRACE_FRAMES)
+
+    # --- Sizing and eviction ---
+    def record(self, session_id, app, page, state, policies=None):
+        """Sizes `state`, evicts cold keys if over budget; returns the evicted keys."""
+        policies = policies or {}
+        sizes = {key: deep_sizeof(state[key]) for key in list(state.keys())}
+        with self._lock:
+            report = self._sessions.get(session_id)
+            if report is None:
+                report = self._sessions[session_id] = {"runs": 0, "touched": {}, "evictions": 0}
+            report["runs"] += 1
+            runs = report["runs"]
+            touched = report["touched"]
+            for key, size in sizes.items():
+                signature = (id(state[key]), size)
+                if key not in touched or touched[key][0] != signature:
+                    touched[key] = (signature, runs)
+            for key in [key for key in touched if key not in sizes]:
+                del touched[key]
+
+            evicted = []
+            total = sum(sizes.values())
+            if total > self.budget:
+                # Coldest first; the larger key goes first among equally cold ones
+                candidates = sorted((key for key in policies if key in sizes),
+                                    key=lambda key: (touched[key][1], -sizes[key]))
+                for key in candidates:
+                    if total <= self.budget:
+                        break
+                    value = policies[key](state[key])
+                    if value is _EVICTED:
+                        del state[key]
+                        total -= sizes.pop(key)
+                        del touched[key]
+                    else:
+                        size = deep_sizeof(value)
+                        if size >= sizes[key]:
+                            continue
+                        state[key] = value
+                        total -= sizes[key] - size
+                        sizes[key] = size
+                        touched[key] = ((id(value), size), runs)
+                    evicted.append(key)
+                report["evictions"] += len(evicted)
+
+            report.update(app=app, page=page, bytes=total, keys=sizes, seen=time.time(),
+                          over_budget=total > self.budget)
+            self._prune(report["seen"])
+        record_session_memory(app, total, evicted)
+        return evicted
+
+    def _prune(self, now):
+        # Caller holds the lock
+        for session_id in [sid for sid, report in self._sessions.items() if now - report["seen"] > SESSION_TTL]:
+            del self._sessions[session_id]
+
+    # --- Allocator sampling ---
+    @contextmanager
+    def profile_page(self, app, page):
+        """Samples the allocators of every `sample_every`-th rerun of the page."""
+        with self._lock:
+            stats = self._pages.setdefault((app, page), {"runs": 0, "sampled": 0, "allocators": [], "peak": 0})
+            stats["runs"] += 1
+            due = self.profile and tracemalloc.is_tracing() and (stats["runs"] - 1) % self.sample_every == 0
+        if not due or not self._sampling.acquire(blocking=False):
+            yield
+            return
+        try:
+            before = tracemalloc.take_snapshot()
+            try:
+                yield
+            finally:
+                after = tracemalloc.take_snapshot()
+                self._store_sample(stats, before, after)
+        finally:
+            self._sampling.release()
+
+    def _store_sample(self, stats, before, after):
+        ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__),
+                  tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"), tracemalloc.Filter(False, "<unknown>")]
+        diff = after.filter_traces(ignore).compare_to(before.filter_traces(ignore), "lineno")
+        allocators = [
+            {"location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+             "retained_kb": stat.size_diff / 1024, "blocks": stat.count_diff, "total_kb": stat.size / 1024}
+            for stat in diff[:self.top] if stat.size_diff > 0
+        ]
+        with self._lock:
+            stats["sampled"] += 1
+            stats["allocators"] = allocators
+            stats["peak"] = tracemalloc.get_traced_memory()[1]
+
+    # --- Reports ---
+    def sessions(self):
+        """Session reports, largest first."""
+        with self._lock:
+            return sorted(({"session": session_id, **{k: v for k, v in report.items() if k != "touched"}}
+                           for session_id, report in self._sessions.items()),
+                          key=lambda report: -report.get("bytes", 0))
+
+    def session(self, session_id):
+        with self._lock:
+            report = self._sessions.get(session_id)
+            if report is None:
+                return None
+            runs = report["runs"]
+            cold = {key: runs - run for key, (_, run) in report["touched"].items()}
+            return {**{k: v for k, v in report.items() if k != "touched"}, "cold_runs": cold}
+
+    def pages(self):
+        with self._lock:
+            return {key: dict(stats) for key, stats in self._pages.items()}
+
+
+_monitor = None
+_monitor_lock = threading.Lock()
+
+
+def get_monitor():
+    """The process-wide session memory monitor."""
+    global _monitor
+    with _monitor_lock:
+        if _monitor is None:
+            _monitor = SessionMemoryMonitor()
+        return _monitor
+
+
+# --- Streamlit helpers ---
+@contextmanager
+def memory_budget(app, page, policies=None):
+    """Wraps a page's rerun: samples allocators, then sizes and trims the session.
+
+    Call sync_session_state afterwards, so trimmed values are persisted.
+    """
+    import streamlit as st
+
+    from session_backend import current_session_id
+
+    monitor = get_monitor()
+    try:
+        with monitor.profile_page(app, page):
+            yield
+    finally:
+        evicted = monitor.record(current_session_id(), app, page, st.session_state, policies)
+        if evicted:
+            st.toast(f"Freed session memory: {', '.join(evicted)}", icon="🧹")
+
+
+def render_memory_report():
+    """Admin view of session sizes, this session's keys and per-page allocators."""
+    import streamlit as st
+
+    from session_backend import current_session_id
+
+    monitor = get_monitor()
+    sessions = monitor.sessions()
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("Tracked Sessions", f"{len(sessions):,}")
+    m2.metric("Session State", f"{sum(s['bytes'] for s in sessions) / 1024 ** 2:,.2f} MB")
+    m3.metric("Budget per Session", f"{monitor.budget / 1024:,.0f} KB")
+    m4.metric("Over Budget", sum(s["over_budget"] for s in sessions))
+
+    st.subheader("Largest Sessions")
+    st.dataframe([{"Session": s["session"][:8], "App": s["app"], "Last Page": s["page"], "KB": s["bytes"] / 1024,
+                   "Keys": len(s["keys"]), "Evictions": s["evictions"],
+                   "Idle (s)": int(time.time() - s["seen"])} for s in sessions[:50]],
+                 hide_index=True, use_container_width=True)
+
+    own = monitor.session(current_session_id())
+    if own:
+        st.subheader("This Session's State")
+        st.dataframe([{"Key": key, "KB": size / 1024, "Reruns Unchanged": own["cold_runs"].get(key, 0)}
+                      for key, size in sorted(own["keys"].items(), key=lambda item: -item[1])],
+                     hide_index=True, use_container_width=True)
+
+    st.subheader("Top Allocators per Page")
+    if not monitor.profile:
+        st.info("Start the app with RENAISSANCE_MEMORY_PROFILE=1 to sample allocators with tracemalloc.")
+        return
+    for (app, page), stats in sorted(monitor.pages().items()):
+        with st.expander(f"{app} · {page} — {stats['sampled']} of {stats['runs']} reruns sampled, "
+                         f"peak {stats['peak'] / 1024 ** 2:,.1f} MB traced"):
+            if stats["allocators"]:
+                st.dataframe(stats["allocators"], hide_index=True, use_container_width=True)
+            else:
+                st.caption("No retained allocations sampled yet.")
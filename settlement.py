@@ -0,0 +1,299 @@
+import argparse
+import ast
+import datetime
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+
+from file_lock import FileLock
+from ledger_store import LedgerStore
+
+
+# --- End-of-Day Settlement (FR-EC-01) ---
+# Instead of paying out every sale as it happens, a daily job streams the
+# day's sale lines once, nets sales against refunds in a hash table keyed by
+# payee, applies the artist tier's platform fee and any studio commission,
+# and writes a single EFT-style payout batch with one credit per payee.
+# Amounts are handled in integer cents so totals reconcile exactly.
+#
+# A payee whose refunds exceed their sales ends the day with a negative
+# balance. It is written next to the batch as the day's closing carry file,
+# and the next day's settlement opens with it, so the debt is recovered from
+# later sales. Carries chain from one day to the next, so days are settled
+# strictly in order. A day can only be settled once the previous day has
+# been, and can no longer be settled or regenerated once a later day has
+# been, as either would apply a carry twice. A day is only settled after
+# midnight, once it is complete. One process per host runs the schedule,
+# chosen by a file lock; the others stand by and take over if it exits. On
+# every run the leader settles each day since the last batch, oldest first,
+# so days missed during downtime are caught up.
+
+SETTLEMENT_DIR = os.environ.get("RENAISSANCE_SETTLEMENT_DIR", "settlements")
+SETTLEMENT_TIME = os.environ.get("RENAISSANCE_SETTLEMENT_TIME", "00:15")  # Settles the previous day
+LEADER_RETRY_SECONDS = 60
+DEFAULT_TIER = "Emerging"  # Unknown artists pay the highest platform fee
+ORIGINATOR = "RENAISSANCE ART PLATFORM"
+TIERS_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "renaissance_demo.py")
+
+
+class SettlementOrderError(ValueError):
+    """Settling the day now would break the chain of carried balances."""
+
+
+def load_fee_schedule(path=TIERS_SOURCE):
+    """The app's ARTIST_TIERS, read from its source, for runs outside the app.
+
+    The app is a Streamlit script, so it is parsed rather than imported.
+    """
+    with open(path, encoding="utf-8") as fh:
+        tree = ast.parse(fh.read(), path)
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(getattr(t, "id", None) == "ARTIST_TIERS" for t in node.targets):
+            return {tier: {"fee_pct": spec["fee_pct"]} for tier, spec in ast.literal_eval(node.value).items()}
+    raise LookupError(f"No ARTIST_TIERS in {path}")
+
+
+def _cents(amount):
+    return int(round(amount * 100))
+
+
+def aggregate(lines):
+    """Single pass over `lines`: net cents per (artist, tier, studio, studio_pct)."""
+    groups = {}
+    count = 0
+    for line in lines:
+        key = (line["artist"], line.get("tier"), line.get("studio") or None, line.get("studio_pct") or 0)
+        cents = _cents(line["amount"])
+        groups[key] = groups.get(key, 0) + (-cents if line.get("kind") == "refund" else cents)
+        count += 1
+    return groups, count
+
+
+def net_payouts(groups, tiers, artist_tiers=None, carry=None):
+    """Turns aggregated groups into one payout per artist and per studio.
+
+    A line's own tier wins; otherwise the artist's tier is looked up in
+    `artist_tiers`, falling back to DEFAULT_TIER. `carry` maps
+    (payee type, payee) to a negative balance brought forward in cents.
+    """
+    artist_tiers = artist_tiers or {}
+    payees = {}
+    platform_cents = 0
+    for (payee_type, payee), cents in (carry or {}).items():
+        tier = artist_tiers.get(payee, DEFAULT_TIER) if payee_type == "Artist" else ""
+        payees[payee_type, payee] = {"tier": tier, "gross": 0, "fees": 0, "carried": cents}
+    for (artist, tier, studio, studio_pct), net in groups.items():
+        if tier not in tiers:
+            tier = artist_tiers.get(artist, DEFAULT_TIER)
+        platform = round(net * tiers[tier]["fee_pct"] / 100)
+        studio_cut = round(net * studio_pct / 100) if studio else 0
+        platform_cents += platform
+
+        artist_entry = payees.setdefault(("Artist", artist), {"tier": tier, "gross": 0, "fees": 0, "carried": 0})
+        artist_entry["gross"] += net
+        artist_entry["fees"] += platform + studio_cut
+        if studio:
+            studio_entry = payees.setdefault(("Studio", studio), {"tier": "", "gross": 0, "fees": 0, "carried": 0})
+            studio_entry["gross"] += studio_cut
+
+    payouts = []
+    for (payee_type, payee), entry in sorted(payees.items()):
+        net = entry["gross"] - entry["fees"] + entry["carried"]
+        payouts.append({
+            "payee_type": payee_type, "payee": payee, "tier": entry["tier"],
+            "gross_cents": entry["gross"], "fee_cents": entry["fees"], "carried_cents": entry["carried"],
+            "net_cents": net,
+            # Negative balances go into the closing carry and are recovered from later settlements
+            "status": "Pay" if net > 0 else ("Carry Forward" if net < 0 else "Nil"),
+        })
+    return payouts, platform_cents
+
+
+# --- EFT batch file ---
+def _field(value, width):
+    return str(value)[:width].upper().ljust(width)
+
+
+def _payee_code(payee_type, payee):
+    return f"{payee_type[0]}{hashlib.blake2b(payee.encode('utf-8'), digest_size=5).hexdigest().upper()}"
+
+
+def eft_batch(payouts, settlement_date, batch_id):
+    """Fixed-width header/detail/trailer records; only positive payouts are credited."""
+    day = settlement_date.strftime("%Y%m%d")
+    credits = [p for p in payouts if p["status"] == "Pay"]
+    records = [f"H{day}{_field(batch_id, 20)}{_field(ORIGINATOR, 30)}"]
+    hash_total = 0
+    for seq, payout in enumerate(credits, 1):
+        code = _payee_code(payout["payee_type"], payout["payee"])
+        hash_total += int(code[1:], 16)
+        records.append(f"D{seq:06d}{code}{_field(payout['payee'], 30)}{payout['net_cents']:015d}"
+                       f"{_field(f'ART PAYOUT {day}', 20)}")
+    total = sum(p["net_cents"] for p in credits)
+    records.append(f"T{len(credits):06d}{total:018d}{hash_total % 10**12:012d}")
+    return "\r\n".join(records) + "\r\n"
+
+
+# --- Carry balances ---
+def _carry_path(out_dir, settlement_date):
+    return os.path.join(out_dir, f"SETTLE-{settlement_date:%Y%m%d}.carry.json")
+
+
+def settled_days(out_dir=SETTLEMENT_DIR):
+    """Dates that have a payout batch, oldest first."""
+    days = []
+    for name in os.listdir(out_dir) if os.path.isdir(out_dir) else ():
+        if name.startswith("SETTLE-") and name.endswith(".txt"):
+            days.append(datetime.datetime.strptime(name[7:15], "%Y%m%d").date())
+    return sorted(days)
+
+
+def opening_carry(settlement_date, out_dir=SETTLEMENT_DIR, days=None):
+    """Closing carry of the day before `settlement_date`.
+
+    Raises SettlementOrderError if earlier days were settled but not the
+    previous one; with nothing settled before, the carry is empty.
+    """
+    earlier = [day for day in (settled_days(out_dir) if days is None else days) if day < settlement_date]
+    if not earlier:
+        return {}
+    previous = settlement_date - datetime.timedelta(days=1)
+    if earlier[-1] != previous:
+        raise SettlementOrderError(f"{previous} has not been settled yet; days are settled in order.")
+    with open(_carry_path(out_dir, previous), encoding="utf-8") as fh:
+        return {(payee_type, payee): cents for payee_type, payee, cents in json.load(fh)}
+
+
+def unsettled_days(store, until, out_dir=SETTLEMENT_DIR):
+    """Days after the last batch up to `until`, oldest first.
+
+    Before the first batch, they start at the first sale line's day.
+    """
+    days = settled_days(out_dir)
+    if days:
+        start = days[-1] + datetime.timedelta(days=1)
+    else:
+        first = store.first_line_date()
+        start = min(first, until) if first else until
+    return [start + datetime.timedelta(days=n) for n in range((until - start).days + 1)]
+
+
+def _write_atomic(path, text, encoding):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding=encoding, errors="replace", newline="") as fh:
+        fh.write(text)
+    os.replace(tmp_path, path)
+
+
+# --- Job ---
+def run_settlement(store, settlement_date, tiers, artist_tiers=None, out_dir=SETTLEMENT_DIR, overwrite=False):
+    """Settles one day; returns a summary. Re-running an already settled day is a no-op.
+
+    Runs hold a file lock, so a scheduled and a manual run never interleave.
+    Raises SettlementOrderError when the day is out of order (see above).
+    """
+    batch_id = f"SETTLE-{settlement_date:%Y%m%d}"
+    path = os.path.join(out_dir, f"{batch_id}.txt")
+    with FileLock(os.path.join(out_dir, "settlement.lock")):
+        if os.path.exists(path) and not overwrite:
+            return {"batch_id": batch_id, "path": path, "skipped": True}
+        days = settled_days(out_dir)
+        later = [day for day in days if day > settlement_date]
+        if later:
+            raise SettlementOrderError(f"{later[-1]} is already settled, so {settlement_date} can no longer be "
+                                       "settled without applying a carried balance twice.")
+
+        started = time.perf_counter()
+        day, next_day = settlement_date.isoformat(), (settlement_date + datetime.timedelta(days=1)).isoformat()
+        groups, line_count = aggregate(store.iter_lines(day, next_day))
+        payouts, platform_cents = net_payouts(groups, tiers, artist_tiers, opening_carry(settlement_date, out_dir, days))
+        batch = eft_batch(payouts, settlement_date, batch_id)
+        closing = [[p["payee_type"], p["payee"], p["net_cents"]] for p in payouts if p["net_cents"] < 0]
+
+        # The carry goes first: a day only counts as settled once its batch exists
+        os.makedirs(out_dir, exist_ok=True)
+        _write_atomic(_carry_path(out_dir, settlement_date), json.dumps(closing, indent=1), "utf-8")
+        _write_atomic(path, batch, "ascii")
+    return {
+        "batch_id": batch_id, "path": path, "skipped": False, "lines": line_count, "payouts": payouts,
+        "credits": sum(1 for p in payouts if p["status"] == "Pay"), "platform_cents": platform_cents,
+        "carried_forward": len(closing), "seconds": time.perf_counter() - started,
+    }
+
+
+class DailyScheduler:
+    """Runs `job(date)` once a day at `at` (HH:MM, local time), up to the previous day.
+
+    `days(until)` lists the dates still to run, oldest first (by default just
+    `until`). Only the process holding the leader lock runs the job; others
+    retry the lock every LEADER_RETRY_SECONDS. The leader also runs straight
+    away, which catches up every day missed during downtime.
+    """
+
+    def __init__(self, job, days=None, at=SETTLEMENT_TIME, lock_path=os.path.join(SETTLEMENT_DIR, "scheduler.lock")):
+        self.job = job
+        self.days = days or (lambda until: [until])
+        self.hour, self.minute = (int(part) for part in at.split(":"))
+        self.last_run = None
+        self.last_error = None
+        self._leader = FileLock(lock_path)
+        self.is_leader = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="settlement-scheduler", daemon=True)
+        self._thread.start()
+
+    def next_run(self, now=None):
+        now = now or datetime.datetime.now()
+        run_at = now.replace(hour=self.hour, minute=self.minute, second=0, microsecond=0)
+        return run_at if run_at > now else run_at + datetime.timedelta(days=1)
+
+    def stop(self):
+        self._stop.set()
+
+    def _settle_through_yesterday(self):
+        try:
+            for day in self.days(datetime.date.today() - datetime.timedelta(days=1)):
+                self.last_run = self.job(day)
+            self.last_error = None
+        except Exception as exc:  # Keep the scheduler alive; the next run resumes at the failed day
+            self.last_error = exc
+
+    def _run(self):
+        # The lock is held for the life of the process and released by the OS when it exits
+        while not self._leader.acquire(blocking=False):
+            if self._stop.wait(LEADER_RETRY_SECONDS):
+                return
+        self.is_leader = True
+        self._settle_through_yesterday()
+        while not self._stop.wait((self.next_run() - datetime.datetime.now()).total_seconds()):
+            self._settle_through_yesterday()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Net one day's sale lines into an EFT payout batch.")
+    parser.add_argument("--date", type=datetime.date.fromisoformat,
+                        default=datetime.date.today() - datetime.timedelta(days=1))
+    parser.add_argument("--ledger", default=None, help="Ledger database (defaults to RENAISSANCE_LEDGER_DB)")
+    parser.add_argument("--out-dir", default=SETTLEMENT_DIR)
+    parser.add_argument("--overwrite", action="store_true", help="Replace an existing batch for the date")
+    args = parser.parse_args(argv)
+
+    store = LedgerStore(args.ledger) if args.ledger else LedgerStore()
+    try:
+        summary = run_settlement(store, args.date, load_fee_schedule(), out_dir=args.out_dir, overwrite=args.overwrite)
+    except SettlementOrderError as exc:
+        print(exc, file=sys.stderr)
+        return 1
+    if summary["skipped"]:
+        print(f"{summary['batch_id']} already exists at {summary['path']}; pass --overwrite to regenerate.")
+    else:
+        print(f"{summary['batch_id']}: {summary['lines']:,} lines -> {summary['credits']:,} credits "
+              f"in {summary['seconds']:.2f}s, written to {summary['path']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
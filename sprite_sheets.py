@@ -0,0 +1,190 @@
+import hashlib
+import html
+import io
+import os
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional; grids then fall back to one st.image per card
+    Image = None
+
+from asset_pipeline import ASSET_DIR
+from asset_server import PUBLIC_URL_CONFIGURED, SPRITE_DIR, asset_url, ensure_running
+from metrics import record_cache
+
+
+# --- Grid Sprite Sheets (FR-DS-01) ---
+# Each card in a gallery grid used to be its own st.image, so every grid page
+# cost the browser one image request per card. Here the thumbnails of a page
+# are fetched once on the server, composited into one JPEG sheet, and
+# written under the asset store, where the asset server serves it with
+# ETags. Each card is a div showing its tile of the sheet through
+# percentage-based background offsets, so the cards stay responsive. A page
+# therefore costs one image request however many cards it has. Sheets are
+# named by a hash of their image URLs, so a page that was composited before,
+# by any process, is reused without fetching anything. A page whose
+# thumbnails cannot all be fetched gets no sheet; its cards fall back to
+# st.image and the page is retried after FAILED_RETRY_SECONDS.
+#
+# The sheet URL points at the asset server, so the option is off by default
+# unless RENAISSANCE_ASSET_URL names an address remote browsers can reach.
+
+TILE_WIDTH = 480
+TILE_HEIGHT = 320
+JPEG_QUALITY = 80
+FETCH_TIMEOUT = 5
+FETCH_WORKERS = 8
+LAYOUT_CACHE_SIZE = 512
+FAILED_RETRY_SECONDS = 300
+PLACEHOLDER_COLOR = (30, 41, 59)
+
+SPRITE_CSS = """
+<style>
+.rn-sprite { width: 100%; aspect-ratio: 3 / 2; background-repeat: no-repeat; border-radius: 0.5rem; margin-bottom: 0.5rem; }
+</style>
+"""
+
+
+class SpriteSheet:
+    def __init__(self, url, columns, rows, tiles):
+        self.url = url
+        self.columns = columns
+        self.rows = rows
+        self.tiles = tiles  # image URL -> (column, row)
+
+    def card_html(self, image_url, alt=""):
+        """A div showing `image_url`'s tile; scales with the card's width."""
+        column, row = self.tiles[image_url]
+        x = column * 100 / (self.columns - 1) if self.columns > 1 else 0
+        y = row * 100 / (self.rows - 1) if self.rows > 1 else 0
+        return (f"<div class='rn-sprite' role='img' aria-label='{html.escape(alt, quote=True)}' "
+                f"style=\"background-image: url('{self.url}'); background-size: {self.columns * 100}% {self.rows * 100}%; "
+                f"background-position: {x:.4f}% {y:.4f}%;\"></div>")
+
+
+def available():
+    return Image is not None
+
+
+def _fetch_tile(url):
+    """The image at `url` cropped to the tile's aspect ratio and resized; None on failure."""
+    try:
+        with urllib.request.urlopen(url, timeout=FETCH_TIMEOUT) as response:
+            image = Image.open(io.BytesIO(response.read())).convert("RGB")
+    except (OSError, ValueError):
+        return None
+    # Centre crop to 3:2 so every tile fills its cell exactly
+    width, height = image.size
+    target = TILE_WIDTH / TILE_HEIGHT
+    if width / height > target:
+        crop = int(height * target)
+        image = image.crop(((width - crop) // 2, 0, (width - crop) // 2 + crop, height))
+    else:
+        crop = int(width / target)
+        image = image.crop((0, (height - crop) // 2, width, (height - crop) // 2 + crop))
+    return image.resize((TILE_WIDTH, TILE_HEIGHT), Image.LANCZOS)
+
+
+def build_sheet(image_urls, columns=3, root=ASSET_DIR):
+    """Composites `image_urls` row by row into one sheet; returns its SpriteSheet.
+
+    Returns None, and writes nothing, if any thumbnail could not be fetched.
+    """
+    urls = list(dict.fromkeys(image_urls))
+    columns = max(min(columns, len(urls)), 1)
+    rows = max(-(-len(urls) // columns), 1)
+    digest = hashlib.sha1("\n".join([f"{TILE_WIDTH}x{TILE_HEIGHT}:{columns}"] + urls).encode("utf-8")).hexdigest()
+    relative = os.path.join(SPRITE_DIR, f"{digest}.jpg")
+    path = os.path.join(root, relative)
+    if not os.path.exists(path):
+        with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as pool:
+            tiles = list(pool.map(_fetch_tile, urls))
+        if any(tile is None for tile in tiles):
+            return None
+        sheet = Image.new("RGB", (TILE_WIDTH * columns, TILE_HEIGHT * rows), PLACEHOLDER_COLOR)
+        for index, tile in enumerate(tiles):
+            sheet.paste(tile, ((index % columns) * TILE_WIDTH, (index // columns) * TILE_HEIGHT))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename, so the asset server never serves a partial sheet
+        temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        sheet.save(temporary, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+        os.replace(temporary, path)
+    tiles = {url: (index % columns, index // columns) for index, url in enumerate(urls)}
+    return SpriteSheet(asset_url(relative), columns, rows, tiles)
+
+
+class SpriteCache:
+    """Sheets per result page, keyed by the page's image URLs."""
+
+    def __init__(self, columns=3, root=ASSET_DIR):
+        self.columns = columns
+        self.root = root
+        self._sheets = OrderedDict()
+        self._failed = {}  # page key -> time after which the page is retried
+        self._lock = threading.Lock()
+
+    def get(self, image_urls):
+        """The page's sheet, or None when it cannot be served.
+
+        That is when Pillow is missing, there are no images, the asset server
+        is not running in this process, or a thumbnail failed recently.
+        """
+        if not available() or not image_urls or ensure_running(self.root) is None:
+            return None
+        key = tuple(image_urls)
+        now = time.time()
+        with self._lock:
+            sheet = self._sheets.get(key)
+            record_cache("sprite_sheet", sheet is not None)
+            if sheet is not None:
+                self._sheets.move_to_end(key)
+                return sheet
+            if self._failed.get(key, 0) > now:
+                return None
+        sheet = build_sheet(image_urls, self.columns, self.root)
+        with self._lock:
+            if sheet is None:
+                self._failed[key] = now + FAILED_RETRY_SECONDS
+                for stale in [k for k, retry in self._failed.items() if retry <= now]:
+                    del self._failed[stale]
+                return None
+            self._failed.pop(key, None)
+            self._sheets[key] = sheet
+            if len(self._sheets) > LAYOUT_CACHE_SIZE:
+                self._sheets.popitem(last=False)
+        return sheet
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_sprite_cache():
+    """The process-wide sprite cache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SpriteCache()
+        return _cache
+
+
+# --- Streamlit helper ---
+def grid_sheet(image_urls, key="sprite_thumbnails"):
+    """Sidebar option plus the grid page's sheet; None means cards use st.image."""
+    import streamlit as st
+
+    if not available():
+        return None
+    if not st.sidebar.checkbox("Sprite-sheet thumbnails", value=PUBLIC_URL_CONFIGURED, key=key,
+                               help="Load each grid page's thumbnails as one composited image from the "
+                                    "asset server. Needs RENAISSANCE_ASSET_URL to be reachable by browsers."):
+        return None
+    sheet = get_sprite_cache().get(image_urls)
+    if sheet is not None:
+        st.markdown(SPRITE_CSS, unsafe_allow_html=True)
+    return sheet